@@ -0,0 +1,187 @@
+# scripts/benchmark_assisted.py
+
+"""
+Benchmark du décodage assisté : débit (tokens/s) et taux d'acceptation des
+propositions du modèle brouillon, comparés à la sortie de `summarize_single()`
+(beam search) sur le jeu d'évaluation.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+import torch
+
+# Permet d'importer le package src
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT_DIR)
+
+from src.api.summarizer import INDIVIDUAL_MIN_LENGTH, LoRASummarizer
+
+# --- CONFIGURATION ---
+MODEL_PATH = os.path.join(ROOT_DIR, "models/bart-lora-finetuned")
+DRAFT_MODEL = "sshleifer/distilbart-cnn-12-6"
+# Même jeu que evaluate_summaries.py (liste de {"article", "reference_summary"})
+TEST_DATA_FILE = os.path.join(ROOT_DIR, "test_data_example.json")
+OUTPUT_FILE = os.path.join(ROOT_DIR, "results/assisted_benchmark.json")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--draft", default=DRAFT_MODEL)
+    parser.add_argument("--test-data", default=TEST_DATA_FILE)
+    parser.add_argument("--num-articles", type=int, default=20)
+    parser.add_argument("--max-length", type=int, default=120)
+    parser.add_argument(
+        "--merge-adapter",
+        action="store_true",
+        help="Fusionne les adaptateurs LoRA (comme SUMMARIZER_MERGE_ADAPTER=1)",
+    )
+    parser.add_argument("--output", default=OUTPUT_FILE)
+    return parser.parse_args()
+
+
+def load_articles(test_data_file: str, limit: int) -> list:
+    with open(test_data_file, "r", encoding="utf-8") as f:
+        return [item["article"] for item in json.load(f)[:limit]]
+
+
+def draft_acceptance(summarizer, token_ids: list, output_ids: torch.Tensor):
+    """
+    Tokens de la sortie que le brouillon aurait proposés : prédiction gloutonne
+    du brouillon à chaque position, conditionnée sur la sortie du modèle LoRA
+    (critère d'acceptation du décodage assisté glouton).
+
+    Returns:
+        (tokens acceptés, tokens vérifiés)
+    """
+    input_ids = torch.tensor([token_ids], device=summarizer.device)
+    with torch.no_grad():
+        logits = summarizer.draft_model(
+            input_ids=input_ids,
+            attention_mask=torch.ones_like(input_ids),
+            decoder_input_ids=output_ids[None, :-1],
+        ).logits[0]
+    # Le premier token (début de séquence forcé) n'est pas proposé par le brouillon
+    predicted = logits.argmax(dim=-1)[1:]
+    targets = output_ids[2:]
+    return int((predicted == targets).sum()), int(targets.numel())
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    args = parse_args()
+
+    print("=" * 60)
+    print("Benchmark du décodage assisté (modèle brouillon)")
+    print("=" * 60)
+
+    articles = load_articles(args.test_data, args.num_articles)
+    print(f"✅ {len(articles)} articles chargés")
+
+    summarizer = LoRASummarizer(
+        args.model, merge_adapter=args.merge_adapter, draft_model_path=args.draft
+    )
+    greedy_kwargs = summarizer._generation_kwargs(
+        args.max_length, INDIVIDUAL_MIN_LENGTH, 1, 1.0
+    )
+    token_lists = summarizer._tokenize_prompts(articles)
+
+    # Préchauffage hors mesure
+    summarizer.generate_ids(token_lists[0], assisted=True, **greedy_kwargs)
+
+    modes = {"beam (summarize_single)": [], "greedy": [], "assisted": []}
+    accepted = 0
+    verified = 0
+    identical_greedy = 0
+    identical_beam = 0
+
+    for text, token_ids in zip(articles, token_lists):
+        beam_summary, beam_s = timed(
+            lambda: summarizer.summarize_single(
+                text, max_length=args.max_length, min_length=INDIVIDUAL_MIN_LENGTH
+            )
+        )
+        greedy_ids, greedy_s = timed(
+            lambda: summarizer.generate_ids(token_ids, **greedy_kwargs)
+        )
+        assisted_ids, assisted_s = timed(
+            lambda: summarizer.generate_ids(token_ids, assisted=True, **greedy_kwargs)
+        )
+
+        greedy_summary = summarizer.tokenizer.decode(
+            greedy_ids, skip_special_tokens=True
+        )
+        assisted_summary = summarizer.tokenizer.decode(
+            assisted_ids, skip_special_tokens=True
+        )
+        # Même décompte pour tous les modes : tokens du texte décodé (sans les
+        # tokens spéciaux)
+        modes["beam (summarize_single)"].append(
+            (summarizer.count_tokens(beam_summary), beam_s)
+        )
+        modes["greedy"].append((summarizer.count_tokens(greedy_summary), greedy_s))
+        modes["assisted"].append(
+            (summarizer.count_tokens(assisted_summary), assisted_s)
+        )
+
+        ok, total = draft_acceptance(summarizer, token_ids, assisted_ids)
+        accepted += ok
+        verified += total
+        identical_greedy += int(torch.equal(greedy_ids, assisted_ids))
+        identical_beam += int(assisted_summary == beam_summary)
+
+    results = {}
+    print(f"\n{'Mode':<26} {'tokens/s':>9} {'ms/résumé':>10} {'speedup':>8}")
+    beam_tps = None
+    for label, samples in modes.items():
+        tokens = sum(n for n, _ in samples)
+        seconds = sum(s for _, s in samples)
+        tps = tokens / seconds if seconds else 0.0
+        beam_tps = beam_tps or tps
+        results[label] = {
+            "tokens_per_s": tps,
+            "latency_ms": statistics.mean(s for _, s in samples) * 1000.0,
+            "speedup_vs_beam": tps / beam_tps if beam_tps else 0.0,
+        }
+        print(
+            f"{label:<26} {tps:>9.1f} {results[label]['latency_ms']:>10.1f} "
+            f"{results[label]['speedup_vs_beam']:>7.2f}x"
+        )
+
+    acceptance_rate = accepted / verified if verified else 0.0
+    print(f"\n🎯 Taux d'acceptation du brouillon: {acceptance_rate:.1%}")
+    print(f"   Sorties assistées = gloutonnes: {identical_greedy}/{len(articles)}")
+    print(f"   Sorties assistées = summarize_single: {identical_beam}/{len(articles)}")
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "model": args.model,
+                "draft_model": args.draft,
+                "num_articles": len(articles),
+                "max_length": args.max_length,
+                "acceptance_rate": acceptance_rate,
+                "identical_to_greedy": identical_greedy,
+                "identical_to_summarize_single": identical_beam,
+                "results": results,
+            },
+            f,
+            indent=2,
+            ensure_ascii=False,
+        )
+    print(f"\n💾 Résultats sauvegardés dans: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+# scripts/benchmark_cascade.py
+
+"""
+Benchmark de la cascade de re-ranking : appels au Cross-Encoder économisés
+contre nDCG perdu, sur un jeu de requêtes annotées.
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import time
+
+# Permet d'importer le package src (composants de recherche de l'API)
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT_DIR)
+
+from sentence_transformers import SentenceTransformer, CrossEncoder
+
+from src.api import main as api
+from src.api.reranking import CascadeSettings, cascade_rerank
+
+# --- CONFIGURATION ---
+LABELLED_QUERIES_FILE = os.path.join(ROOT_DIR, "data/eval/labelled_queries.json")
+OUTPUT_FILE = os.path.join(ROOT_DIR, "results/cascade_benchmark.json")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--queries", default=LABELLED_QUERIES_FILE)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument(
+        "--margins",
+        type=float,
+        nargs="+",
+        default=[0.02, 0.05, 0.1],
+        help="Marges de la cascade à comparer",
+    )
+    parser.add_argument(
+        "--max-depth-factor", type=int, default=api.CASCADE_MAX_DEPTH_FACTOR
+    )
+    parser.add_argument("--output", default=OUTPUT_FILE)
+    return parser.parse_args()
+
+
+def load_labelled_queries(path: str) -> list:
+    """
+    Format attendu :
+    [
+      {"query": "...", "relevant": {"doc_id": 2, "autre_id": 1}},
+      {"query": "...", "relevant": ["doc_id", "autre_id"]}   # pertinence binaire
+    ]
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        items = json.load(f)
+    for item in items:
+        if isinstance(item["relevant"], list):
+            item["relevant"] = {doc_id: 1 for doc_id in item["relevant"]}
+    return items
+
+
+def ndcg_at_k(ranked_ids: list, gains: dict, k: int) -> float:
+    dcg = sum(
+        (2 ** gains.get(doc_id, 0) - 1) / math.log2(rank + 2)
+        for rank, doc_id in enumerate(ranked_ids[:k])
+    )
+    ideal = sorted(gains.values(), reverse=True)[:k]
+    idcg = sum((2**g - 1) / math.log2(rank + 2) for rank, g in enumerate(ideal))
+    return dcg / idcg if idcg > 0 else 0.0
+
+
+def run_configuration(items, settings, top_k, reranker) -> dict:
+    """Exécute une configuration de cascade sur toutes les requêtes annotées"""
+    snapshot = api._current_index()
+    fetch_k = settings.fetch_k(top_k)
+
+    ndcgs = []
+    pairs = 0
+    elapsed = 0.0
+    for item in items:
+        embedding = api._encode_queries([item["query"]])
+        distances, indices = snapshot.index.search(embedding, fetch_k)
+        candidates = api._collect_candidates(distances[0], indices[0], snapshot)
+
+        start = time.perf_counter()
+        ranked, counts = cascade_rerank(
+            item["query"], candidates, top_k, reranker, settings
+        )
+        elapsed += time.perf_counter() - start
+
+        pairs += counts["survivors"]
+        ndcgs.append(ndcg_at_k([c["id"] for c in ranked], item["relevant"], top_k))
+
+    return {
+        "ndcg": sum(ndcgs) / len(ndcgs),
+        "reranker_pairs": pairs,
+        "avg_rerank_depth": pairs / len(items),
+        "rerank_ms_per_query": elapsed * 1000 / len(items),
+    }
+
+
+def main():
+    args = parse_args()
+
+    print("=" * 60)
+    print("Benchmark de la cascade de re-ranking")
+    print("=" * 60)
+
+    if not os.path.exists(args.queries):
+        print(f"❌ Fichier non trouvé: {args.queries}")
+        print(load_labelled_queries.__doc__)
+        return
+
+    items = load_labelled_queries(args.queries)
+    print(f"✅ {len(items)} requêtes annotées chargées")
+
+    # Les chemins de l'API sont relatifs à la racine du projet
+    os.chdir(ROOT_DIR)
+    print("Chargement des composants de recherche...")
+    api.search_engine_components["model"] = SentenceTransformer(api.MODEL_NAME)
+    reranker = CrossEncoder(api.RERANKER_MODEL_NAME)
+    api.search_engine_components["reranker"] = reranker
+    api.load_index_and_corpus()
+
+    # Référence : comportement historique (top_k x 3 candidats, tous re-rankés)
+    configurations = [("baseline (sans cascade)", CascadeSettings(enabled=False))]
+    for margin in args.margins:
+        for cheap in (False, True):
+            label = f"cascade marge={margin}" + (" + lexical" if cheap else "")
+            configurations.append(
+                (
+                    label,
+                    CascadeSettings(
+                        max_depth_factor=args.max_depth_factor,
+                        faiss_margin=margin,
+                        cheap_margin=margin,
+                        cheap_scorer=cheap,
+                    ),
+                )
+            )
+
+    results = {}
+    for label, settings in configurations:
+        results[label] = run_configuration(items, settings, args.top_k, reranker)
+
+    baseline = results["baseline (sans cascade)"]
+    print(f"\n{'Configuration':<34} {'nDCG@' + str(args.top_k):>8} {'Δ nDCG':>8} "
+          f"{'paires':>7} {'économisées':>12} {'ms/req':>7}")
+    for label, r in results.items():
+        r["ndcg_delta"] = r["ndcg"] - baseline["ndcg"]
+        r["pairs_saved_pct"] = (
+            100 * (1 - r["reranker_pairs"] / baseline["reranker_pairs"])
+            if baseline["reranker_pairs"]
+            else 0.0
+        )
+        print(
+            f"{label:<34} {r['ndcg']:>8.4f} {r['ndcg_delta']:>+8.4f} "
+            f"{r['reranker_pairs']:>7} {r['pairs_saved_pct']:>11.1f}% "
+            f"{r['rerank_ms_per_query']:>7.1f}"
+        )
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(
+            {"top_k": args.top_k, "num_queries": len(items), "results": results},
+            f,
+            indent=2,
+        )
+    print(f"\n💾 Résultats sauvegardés dans: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
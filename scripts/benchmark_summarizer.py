@@ -0,0 +1,151 @@
+# scripts/benchmark_summarizer.py
+
+"""
+Benchmark du résumeur : latence de génération et parité des résumés entre le
+modèle servi avec ses adaptateurs LoRA (référence) et les variantes optimisées.
+"""
+
+import argparse
+import gc
+import json
+import os
+import statistics
+import sys
+import time
+
+# Permet d'importer le package src
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT_DIR)
+
+from src.api.summarizer import LoRASummarizer
+
+# --- CONFIGURATION ---
+ADAPTER_PATH = os.path.join(ROOT_DIR, "models/bart-lora-finetuned")
+CORPUS_FILE = os.path.join(ROOT_DIR, "data/processed/processed_corpus.jsonl")
+OUTPUT_FILE = os.path.join(ROOT_DIR, "results/summarizer_benchmark.json")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--adapter", default=ADAPTER_PATH)
+    parser.add_argument(
+        "--merged-path",
+        default=None,
+        help="Checkpoint fusionné par merge_lora.py (variante supplémentaire)",
+    )
+    parser.add_argument("--corpus", default=CORPUS_FILE)
+    parser.add_argument("--num-articles", type=int, default=8)
+    parser.add_argument("--max-length", type=int, default=120)
+    parser.add_argument("--output", default=OUTPUT_FILE)
+    return parser.parse_args()
+
+
+def load_texts(corpus_file: str, limit: int) -> list:
+    """Textes d'articles au format utilisé par summarize_multiple"""
+    texts = []
+    with open(corpus_file, "r", encoding="utf-8") as f:
+        for line in f:
+            doc = json.loads(line)
+            texts.append(
+                f"Title: {doc.get('title', '')}\nContent: {doc.get('abstract', '')}"
+            )
+            if len(texts) >= limit:
+                break
+    return texts
+
+
+def run_variant(label: str, model_kwargs: dict, texts: list, max_length: int) -> dict:
+    """Charge une variante, la chauffe puis résume chaque texte séquentiellement"""
+    print(f"\n▶️  {label}")
+    start = time.perf_counter()
+    summarizer = LoRASummarizer(**model_kwargs)
+    load_s = time.perf_counter() - start
+
+    # Préchauffage (allocations, caches) hors mesure
+    summarizer.summarize_single(texts[0], max_length=max_length, min_length=40)
+
+    summaries = []
+    latencies_ms = []
+    for text in texts:
+        start = time.perf_counter()
+        summaries.append(
+            summarizer.summarize_single(text, max_length=max_length, min_length=40)
+        )
+        latencies_ms.append((time.perf_counter() - start) * 1000.0)
+
+    del summarizer
+    gc.collect()
+
+    return {
+        "load_s": load_s,
+        "latency_ms": {
+            "mean": statistics.mean(latencies_ms),
+            "median": statistics.median(latencies_ms),
+            "max": max(latencies_ms),
+        },
+        "summaries": summaries,
+    }
+
+
+def main():
+    args = parse_args()
+
+    print("=" * 60)
+    print("Benchmark du résumeur (adaptateurs LoRA vs variantes)")
+    print("=" * 60)
+
+    texts = load_texts(args.corpus, args.num_articles)
+    print(f"✅ {len(texts)} articles chargés")
+
+    variants = [
+        ("adaptateurs LoRA", {"model_path": args.adapter}),
+        ("fusion au chargement", {"model_path": args.adapter, "merge_adapter": True}),
+    ]
+    if args.merged_path:
+        variants.append(("checkpoint fusionné", {"model_path": args.merged_path}))
+
+    results = {}
+    for label, model_kwargs in variants:
+        results[label] = run_variant(label, model_kwargs, texts, args.max_length)
+
+    # Parité : chaque variante doit produire exactement les résumés de référence
+    reference_label = variants[0][0]
+    reference = results[reference_label]
+    parity_ok = True
+    print(f"\n{'Variante':<24} {'chargement':>11} {'ms/résumé':>10} {'speedup':>8} "
+          f"{'identiques':>11}")
+    for label, r in results.items():
+        identical = sum(
+            a == b for a, b in zip(r["summaries"], reference["summaries"])
+        )
+        r["identical_summaries"] = identical
+        r["speedup"] = reference["latency_ms"]["mean"] / r["latency_ms"]["mean"]
+        parity_ok = parity_ok and identical == len(texts)
+        print(
+            f"{label:<24} {r['load_s']:>10.1f}s {r['latency_ms']['mean']:>10.1f} "
+            f"{r['speedup']:>7.2f}x {identical:>6}/{len(texts)}"
+        )
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "reference": reference_label,
+                "num_articles": len(texts),
+                "parity": parity_ok,
+                "results": results,
+            },
+            f,
+            indent=2,
+            ensure_ascii=False,
+        )
+    print(f"\n💾 Résultats sauvegardés dans: {args.output}")
+
+    if not parity_ok:
+        print("❌ Parité non respectée : des résumés diffèrent de la référence")
+        sys.exit(1)
+    print("✅ Parité respectée : résumés identiques pour toutes les variantes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+# scripts/check_encoder_parity.py
+
+"""
+Parité des backends d'encodage : compare les classements de recherche
+(embedding + FAISS, puis Cross-Encoder) de chaque backend optimisé à ceux du
+backend PyTorch float32, sur un jeu de requêtes de référence.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+# Permet d'importer le package src (composants de recherche de l'API)
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT_DIR)
+
+from src.api import main as api
+from src.api.encoders import (
+    ENCODER_BACKENDS,
+    load_embedding_model,
+    load_reranker,
+    warm_up_encoders,
+)
+from src.api.reranking import candidate_text
+
+# --- CONFIGURATION ---
+# Requêtes annotées du benchmark de cascade (seul le texte est utilisé)
+LABELLED_QUERIES_FILE = os.path.join(ROOT_DIR, "data/eval/labelled_queries.json")
+OUTPUT_FILE = os.path.join(ROOT_DIR, "results/encoder_parity.json")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--queries", default=LABELLED_QUERIES_FILE)
+    parser.add_argument(
+        "--backends",
+        nargs="+",
+        choices=[b for b in ENCODER_BACKENDS if b != "torch"],
+        default=["int8", "int8_traced"],
+    )
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument(
+        "--num-queries",
+        type=int,
+        default=50,
+        help="Requêtes tirées des titres du corpus si le fichier annoté est absent",
+    )
+    parser.add_argument(
+        "--min-overlap",
+        type=float,
+        default=0.9,
+        help="Recouvrement moyen minimal des top-k (FAISS et re-ranking)",
+    )
+    parser.add_argument(
+        "--min-cosine",
+        type=float,
+        default=0.99,
+        help="Similarité cosinus minimale entre embeddings des deux backends",
+    )
+    parser.add_argument("--output", default=OUTPUT_FILE)
+    return parser.parse_args()
+
+
+def load_reference_queries(path: str, limit: int) -> list:
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            return [item["query"] for item in json.load(f)][:limit]
+    with open(api.CORPUS_FILE, "r", encoding="utf-8") as f:
+        titles = [json.loads(line).get("title", "") for line in f]
+    return [t for t in titles if t][:limit]
+
+
+def run_backend(model, reranker, queries: list, top_k: int) -> dict:
+    """Classements FAISS et Cross-Encoder d'un backend pour toutes les requêtes"""
+    snapshot = api._current_index()
+    warm_up_encoders(model, reranker)
+
+    start = time.perf_counter()
+    embeddings = np.ascontiguousarray(model.encode(queries), dtype=np.float32)
+    encode_ms = (time.perf_counter() - start) * 1000.0
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+
+    distances, indices = snapshot.index.search(embeddings, top_k)
+
+    rerank_ms = 0.0
+    faiss_rankings = []
+    rerank_rankings = []
+    for query, distances_row, row in zip(queries, distances, indices):
+        candidates = api._collect_candidates(distances_row, row, snapshot)
+        faiss_rankings.append([c["id"] for c in candidates])
+
+        start = time.perf_counter()
+        scores = reranker.predict([[query, candidate_text(c)] for c in candidates])
+        rerank_ms += (time.perf_counter() - start) * 1000.0
+        order = np.argsort(-np.asarray(scores))
+        rerank_rankings.append(
+            {
+                "ids": [candidates[i]["id"] for i in order],
+                "scores": {c["id"]: float(s) for c, s in zip(candidates, scores)},
+            }
+        )
+
+    return {
+        "embeddings": embeddings,
+        "faiss": faiss_rankings,
+        "rerank": rerank_rankings,
+        "encode_ms_per_query": encode_ms / len(queries),
+        "rerank_ms_per_query": rerank_ms / len(queries),
+    }
+
+
+def overlap_at_k(a: list, b: list) -> float:
+    return len(set(a) & set(b)) / max(1, len(b))
+
+
+def compare(reference: dict, candidate: dict, top_k: int) -> dict:
+    cosines = np.sum(reference["embeddings"] * candidate["embeddings"], axis=1)
+    faiss_overlap = [
+        overlap_at_k(c, r) for c, r in zip(candidate["faiss"], reference["faiss"])
+    ]
+    rerank_overlap = [
+        overlap_at_k(c["ids"][: top_k // 2], r["ids"][: top_k // 2])
+        for c, r in zip(candidate["rerank"], reference["rerank"])
+    ]
+    top1_agreement = [
+        c["ids"][0] == r["ids"][0]
+        for c, r in zip(candidate["rerank"], reference["rerank"])
+    ]
+    # Écart de score sur les paires scorées par les deux backends
+    score_diffs = [
+        abs(c["scores"][doc_id] - r["scores"][doc_id])
+        for c, r in zip(candidate["rerank"], reference["rerank"])
+        for doc_id in r["scores"]
+        if doc_id in c["scores"]
+    ]
+    return {
+        "min_cosine": float(cosines.min()),
+        "mean_cosine": float(cosines.mean()),
+        "faiss_overlap": float(np.mean(faiss_overlap)),
+        "rerank_overlap": float(np.mean(rerank_overlap)),
+        "rerank_top1_agreement": float(np.mean(top1_agreement)),
+        "max_rerank_score_diff": max(score_diffs) if score_diffs else 0.0,
+        "encode_ms_per_query": candidate["encode_ms_per_query"],
+        "rerank_ms_per_query": candidate["rerank_ms_per_query"],
+    }
+
+
+def main():
+    args = parse_args()
+
+    print("=" * 60)
+    print("Parité des backends d'encodage")
+    print("=" * 60)
+
+    # Les chemins de l'API sont relatifs à la racine du projet
+    os.chdir(ROOT_DIR)
+    api.load_index_and_corpus()
+
+    queries = load_reference_queries(args.queries, args.num_queries)
+    print(f"✅ {len(queries)} requêtes de référence")
+
+    print("\n▶️  torch (référence)")
+    reference = run_backend(
+        load_embedding_model(api.MODEL_NAME, "torch"),
+        load_reranker(api.RERANKER_MODEL_NAME, "torch"),
+        queries,
+        args.top_k,
+    )
+
+    report = {
+        "torch": {
+            "encode_ms_per_query": reference["encode_ms_per_query"],
+            "rerank_ms_per_query": reference["rerank_ms_per_query"],
+        }
+    }
+    passed = True
+    for backend in args.backends:
+        print(f"\n▶️  {backend}")
+        candidate = run_backend(
+            load_embedding_model(api.MODEL_NAME, backend),
+            load_reranker(api.RERANKER_MODEL_NAME, backend),
+            queries,
+            args.top_k,
+        )
+        r = compare(reference, candidate, args.top_k)
+        r["passed"] = (
+            r["min_cosine"] >= args.min_cosine
+            and r["faiss_overlap"] >= args.min_overlap
+            and r["rerank_overlap"] >= args.min_overlap
+        )
+        passed = passed and r["passed"]
+        report[backend] = r
+
+    print(
+        f"\n{'Backend':<12} {'cos min':>8} {'FAISS@k':>8} {'rerank':>8} "
+        f"{'top-1':>6} {'enc ms':>7} {'rr ms':>7}"
+    )
+    for backend, r in report.items():
+        if backend == "torch":
+            print(
+                f"{backend:<12} {'-':>8} {'-':>8} {'-':>8} {'-':>6} "
+                f"{r['encode_ms_per_query']:>7.2f} {r['rerank_ms_per_query']:>7.2f}"
+            )
+            continue
+        print(
+            f"{backend:<12} {r['min_cosine']:>8.4f} {r['faiss_overlap']:>8.3f} "
+            f"{r['rerank_overlap']:>8.3f} {r['rerank_top1_agreement']:>6.2f} "
+            f"{r['encode_ms_per_query']:>7.2f} {r['rerank_ms_per_query']:>7.2f}"
+            f"  {'✅' if r['passed'] else '❌'}"
+        )
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "top_k": args.top_k,
+                "num_queries": len(queries),
+                "tolerances": {
+                    "min_overlap": args.min_overlap,
+                    "min_cosine": args.min_cosine,
+                },
+                "results": report,
+            },
+            f,
+            indent=2,
+        )
+    print(f"\n💾 Résultats sauvegardés dans: {args.output}")
+
+    if not passed:
+        print("❌ Classements hors tolérance pour au moins un backend")
+        sys.exit(1)
+    print("✅ Classements dans la tolérance pour tous les backends")
+
+
+if __name__ == "__main__":
+    main()
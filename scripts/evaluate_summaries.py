@@ -3,11 +3,21 @@ Script d'évaluation des résumés générés avec ROUGE et BERTScore
 """
 
 import torch
-from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+from transformers import AutoTokenizer
 import evaluate
 import pandas as pd
 from tqdm import tqdm
+import argparse
 import json
+import os
+import sys
+import time
+
+# Permet d'importer le package src (chargement / quantification du modèle)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from src.api.compression import ExtractiveCompressor
+from src.api.summarizer import load_seq2seq_model, model_size_mb, quantize_linear_int8
 
 # ==========================================
 # 1. CONFIGURATION
@@ -26,43 +36,90 @@ MAX_INPUT_LENGTH = 1024
 MAX_OUTPUT_LENGTH = 150
 NUM_BEAMS = 4
 
+# Modèle d'embedding utilisé par la pré-compression extractive (le même que l'API)
+EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+
 # ==========================================
 # 2. CHARGEMENT DES MÉTRIQUES
 # ==========================================
 
-print("📊 Chargement des métriques d'évaluation...")
+# Chargées à la demande (évite de charger BERTScore à l'import du module)
+rouge = None
+bertscore = None
+
+
+def load_metrics():
+    global rouge, bertscore
+    if rouge is not None:
+        return
+
+    print("📊 Chargement des métriques d'évaluation...")
 
-# ROUGE: mesure le chevauchement de n-grammes
-rouge = evaluate.load("rouge")
+    # ROUGE: mesure le chevauchement de n-grammes
+    rouge = evaluate.load("rouge")
+
+    # BERTScore: mesure la similarité sémantique
+    bertscore = evaluate.load("bertscore")
 
-# BERTScore: mesure la similarité sémantique
-bertscore = evaluate.load("bertscore")
 
 # ==========================================
 # 3. CHARGEMENT DU MODÈLE
 # ==========================================
 
-from peft import PeftModel, PeftConfig
+model = None
+tokenizer = None
+device = "cuda" if torch.cuda.is_available() else "cpu"
 
-print(f"🤖 Chargement du modèle: {MODEL_PATH}")
 
-device = "cuda" if torch.cuda.is_available() else "cpu"
-print(f"💻 Utilisation de: {device}")
+def load_model(quantize=False):
+    """
+    Charge le modèle évalué (adaptateurs LoRA ou checkpoint fusionné).
 
-# Chargement spécifique pour LoRA
-try:
-    config = PeftConfig.from_pretrained(MODEL_PATH)
-    base_model = AutoModelForSeq2SeqLM.from_pretrained(config.base_model_name_or_path)
-    model = PeftModel.from_pretrained(base_model, MODEL_PATH)
-    tokenizer = AutoTokenizer.from_pretrained(MODEL_PATH)
-    print("✅ Modèle LoRA chargé avec succès")
-except Exception as e:
-    print(f"⚠️ Erreur chargement LoRA, essai chargement standard: {e}")
+    Args:
+        quantize (bool): Fusionne LoRA puis quantifie les couches Linear en int8
+            (inférence CPU)
+    """
+    global model, tokenizer, device
+
+    print(f"🤖 Chargement du modèle: {MODEL_PATH}{' (int8)' if quantize else ''}")
+
+    device = "cpu" if quantize else ("cuda" if torch.cuda.is_available() else "cpu")
+    print(f"💻 Utilisation de: {device}")
+
+    model, _ = load_seq2seq_model(MODEL_PATH, merge_adapter=quantize)
+    model.eval()
+    if quantize:
+        model = quantize_linear_int8(model)
     tokenizer = AutoTokenizer.from_pretrained(MODEL_PATH)
-    model = AutoModelForSeq2SeqLM.from_pretrained(MODEL_PATH)
+    print("✅ Modèle chargé avec succès")
+
+    model.to(device)
+    model.eval()
+
+
+# Pré-compression extractive (None = désactivée)
+compressor = None
+
+
+def load_compressor(target_tokens=None):
+    """
+    Active (target_tokens) ou désactive (None) la pré-compression extractive
+    des articles avant génération
+    """
+    global compressor
+    if not target_tokens:
+        compressor = None
+        return
+
+    from sentence_transformers import SentenceTransformer
 
-model.to(device)
-model.eval()
+    print(f"✂️  Pré-compression extractive: {target_tokens} tokens max")
+    encoder = SentenceTransformer(EMBEDDING_MODEL_NAME)
+    compressor = ExtractiveCompressor(
+        encoder.encode,
+        lambda text: len(tokenizer(text, add_special_tokens=False)["input_ids"]),
+        target_tokens=target_tokens,
+    )
 
 # ==========================================
 # 4. FONCTION DE GÉNÉRATION DE RÉSUMÉ
@@ -79,12 +136,16 @@ def generate_summary(article_text):
     Returns:
         str: Résumé généré
     """
-    # Tokenisation
+    # Pré-compression extractive (phrases les plus centrales)
+    if compressor is not None:
+        article_text = compressor.compress(article_text)
+
+    # Tokenisation (sans padding : une seule séquence, le coût de l'encodeur
+    # suit la longueur réelle du texte)
     inputs = tokenizer(
         article_text,
         max_length=MAX_INPUT_LENGTH,
         truncation=True,
-        padding="max_length",
         return_tensors="pt",
     ).to(device)
 
@@ -118,8 +179,10 @@ def evaluate_summaries(test_data):
     Returns:
         dict: Scores ROUGE et BERTScore
     """
+    load_metrics()
     generated_summaries = []
     reference_summaries = []
+    latencies_ms = []
 
     print("\n🔄 Génération des résumés...")
 
@@ -128,7 +191,9 @@ def evaluate_summaries(test_data):
         reference = item["reference_summary"]
 
         # Générer le résumé
+        start = time.perf_counter()
         generated = generate_summary(article)
+        latencies_ms.append((time.perf_counter() - start) * 1000)
 
         generated_summaries.append(generated)
         reference_summaries.append(reference)
@@ -160,6 +225,8 @@ def evaluate_summaries(test_data):
     return {
         "rouge": rouge_scores,
         "bertscore": avg_bertscore,
+        "latency_ms": sum(latencies_ms) / len(latencies_ms),
+        "model_size_mb": model_size_mb(model),
         "generated_summaries": generated_summaries,
         "reference_summaries": reference_summaries,
     }
@@ -193,6 +260,56 @@ def display_results(results):
     print("\n" + "=" * 50)
 
 
+def display_comparison(results_by_variant):
+    """
+    Affiche côte à côte les variantes du modèle (latence, taille, scores)
+    """
+    print("\n" + "=" * 72)
+    print("📊 COMPARAISON DES VARIANTES")
+    print("=" * 72)
+    print(
+        f"{'Variante':<18} {'ms/résumé':>10} {'Mo':>8} {'ROUGE-1':>8} "
+        f"{'ROUGE-2':>8} {'ROUGE-L':>8} {'BERT F1':>8}"
+    )
+    for label, r in results_by_variant.items():
+        print(
+            f"{label:<18} {r['latency_ms']:>10.1f} {r['model_size_mb']:>8.1f} "
+            f"{r['rouge']['rouge1']:>8.4f} {r['rouge']['rouge2']:>8.4f} "
+            f"{r['rouge']['rougeL']:>8.4f} {r['bertscore']['f1']:>8.4f}"
+        )
+    print("=" * 72)
+
+
+def summary_metrics(results):
+    """Partie des résultats sauvegardée en JSON"""
+    return {
+        "rouge": {
+            "rouge1": results["rouge"]["rouge1"],
+            "rouge2": results["rouge"]["rouge2"],
+            "rougeL": results["rouge"]["rougeL"],
+        },
+        "bertscore": results["bertscore"],
+        "latency_ms": results["latency_ms"],
+        "model_size_mb": results["model_size_mb"],
+    }
+
+
+def compression_delta(base, compressed):
+    """Latence économisée par la pré-compression et variation des scores"""
+    saved = base["latency_ms"] - compressed["latency_ms"]
+    return {
+        "latency_saved_ms": saved,
+        "latency_saved_pct": (
+            100 * saved / base["latency_ms"] if base["latency_ms"] else 0.0
+        ),
+        **{
+            metric: compressed["rouge"][metric] - base["rouge"][metric]
+            for metric in ("rouge1", "rouge2", "rougeL")
+        },
+        "bertscore_f1": compressed["bertscore"]["f1"] - base["bertscore"]["f1"],
+    }
+
+
 # ==========================================
 # 7. FONCTION PRINCIPALE
 # ==========================================
@@ -202,6 +319,28 @@ def main():
     """
     Fonction principale pour exécuter l'évaluation
     """
+    parser = argparse.ArgumentParser(description="Évaluation ROUGE / BERTScore")
+    parser.add_argument(
+        "--quantized", action="store_true", help="Évalue le modèle quantifié int8"
+    )
+    parser.add_argument(
+        "--compare-quantized",
+        action="store_true",
+        help="Évalue pleine précision et int8 puis les compare côte à côte",
+    )
+    parser.add_argument(
+        "--compress-tokens",
+        type=int,
+        default=None,
+        help="Pré-compression extractive des articles (budget en tokens)",
+    )
+    parser.add_argument(
+        "--compare-compression",
+        action="store_true",
+        help="Compare sans / avec pré-compression (--compress-tokens, défaut 512)",
+    )
+    args = parser.parse_args()
+
     print("🚀 Début de l'évaluation des résumés\n")
 
     # Charger les données de test
@@ -234,27 +373,68 @@ def main():
 
     print(f"✅ {len(test_data)} exemples chargés\n")
 
-    # Évaluer
-    results = evaluate_summaries(test_data)
+    precision = "int8" if args.quantized else "float32"
+    if args.compare_quantized:
+        variants = [("float32", False, None), ("int8", True, None)]
+    elif args.compare_compression:
+        budget = args.compress_tokens or 512
+        variants = [
+            (precision, args.quantized, None),
+            (f"{precision} + extractif {budget}", args.quantized, budget),
+        ]
+    else:
+        label = precision
+        if args.compress_tokens:
+            label += f" + extractif {args.compress_tokens}"
+        variants = [(label, args.quantized, args.compress_tokens)]
 
-    # Afficher les résultats
-    display_results(results)
+    # Évaluer
+    results_by_variant = {}
+    loaded_quantize = None
+    for label, quantize, compress_tokens in variants:
+        if quantize != loaded_quantize:
+            load_model(quantize=quantize)
+            loaded_quantize = quantize
+        load_compressor(compress_tokens)
+        results_by_variant[label] = evaluate_summaries(test_data)
+        if compressor is not None:
+            results_by_variant[label]["compression"] = compressor.stats()
+
+        # Afficher les résultats
+        display_results(results_by_variant[label])
+
+    if len(results_by_variant) > 1:
+        display_comparison(results_by_variant)
 
     # Sauvegarder les résultats
-    output_file = "../results/evaluation_results.json"
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(
-            {
-                "rouge": {
-                    "rouge1": results["rouge"]["rouge1"],
-                    "rouge2": results["rouge"]["rouge2"],
-                    "rougeL": results["rouge"]["rougeL"],
-                },
-                "bertscore": results["bertscore"],
+    if args.compare_compression:
+        output_file = "../results/evaluation_compression.json"
+        (base_label, base), (label, compressed) = results_by_variant.items()
+        payload = {
+            base_label: summary_metrics(base),
+            label: {
+                **summary_metrics(compressed),
+                "compression": compressed["compression"],
             },
-            f,
-            indent=2,
+            "delta": compression_delta(base, compressed),
+        }
+        delta = payload["delta"]
+        print(
+            f"\n✂️  Latence économisée: {delta['latency_saved_ms']:.1f} ms "
+            f"({delta['latency_saved_pct']:.1f}%), Δ ROUGE-L: {delta['rougeL']:+.4f}"
         )
+    elif len(results_by_variant) > 1:
+        output_file = "../results/evaluation_quantization.json"
+        payload = {
+            label: summary_metrics(results)
+            for label, results in results_by_variant.items()
+        }
+    else:
+        output_file = "../results/evaluation_results.json"
+        payload = summary_metrics(next(iter(results_by_variant.values())))
+
+    with open(output_file, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2)
 
     print(f"\n💾 Résultats sauvegardés dans: {output_file}")
 
@@ -272,6 +452,9 @@ def evaluate_single_summary(article, reference_summary):
         article (str): Texte de l'article
         reference_summary (str): Résumé de référence
     """
+    load_metrics()
+    if model is None:
+        load_model()
     generated = generate_summary(article)
 
     rouge_scores = rouge.compute(
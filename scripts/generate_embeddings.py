@@ -1,18 +1,32 @@
 # scripts/generate_embeddings.py
 
+import argparse
 import json
 import os
+import sys
+import tempfile
+import time
 import numpy as np
 import faiss
-from sentence_transformers import SentenceTransformer
 from tqdm import tqdm
 
+# Permet d'importer le package src (backends d'encodage partagés avec l'API)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from src.api.encoders import ENCODER_BACKENDS, load_embedding_model
+from src.api.index_store import ExactRerankIndex, apply_search_params
+
 # --- CONFIGURATION ---
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 CORPUS_FILE = os.path.join(BASE_DIR, "../data/processed/processed_corpus.jsonl")
 OUTPUT_DIR = os.path.join(BASE_DIR, "../data/embeddings")
 INDEX_FILE = os.path.join(OUTPUT_DIR, "document_index.faiss")
 MAPPING_FILE = os.path.join(OUTPUT_DIR, "index_to_id_mapping.json")
+# Table d'IDs compacte (tableau .npy de chaînes à largeur fixe, ouvert en mmap par l'API)
+IDS_FILE = os.path.join(OUTPUT_DIR, "index_ids.npy")
+# Vecteurs float32 exacts (fichier .npy mappé en mémoire par l'API pour le re-scoring)
+VECTORS_FILE = os.path.join(OUTPUT_DIR, "document_vectors.f32.npy")
+# Paramètres de l'index (type, nlist, M, efSearch, nprobe...) relus par l'API
+INDEX_PARAMS_FILE = os.path.join(OUTPUT_DIR, "document_index.params.json")
 
 # Choix du modèle. 'all-MiniLM-L6-v2' est un excellent compromis entre vitesse et performance.
 MODEL_NAME = "all-MiniLM-L6-v2"
@@ -33,10 +47,433 @@ def create_text_for_embedding(doc: dict) -> str:
     return f"{title}\n{abstract}".strip()
 
 
+# Types d'index supportés par la fabrique
+INDEX_TYPES = ("flat", "ivf_flat", "hnsw", "ivf_pq")
+
+# Encodage des vecteurs stockés dans l'index (du plus fidèle au plus compact)
+STORAGE_TYPES = ("float32", "float16", "sq8", "pq")
+SCALAR_QUANTIZERS = {
+    "float16": faiss.ScalarQuantizer.QT_fp16,
+    "sq8": faiss.ScalarQuantizer.QT_8bit,
+}
+# Nombres de sous-quantificateurs PQ essayés en mode budget mémoire
+PQ_M_CANDIDATES = (96, 64, 48, 32, 24, 16, 12, 8)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Génère les embeddings du corpus et construit l'index FAISS."
+    )
+    parser.add_argument(
+        "--index-type",
+        choices=INDEX_TYPES,
+        default="flat",
+        help="Type d'index FAISS (flat = recherche exacte, les autres sont approximatifs)",
+    )
+    parser.add_argument(
+        "--storage",
+        choices=STORAGE_TYPES,
+        default=None,
+        help="Encodage des vecteurs : float32 (défaut), float16, sq8 ou pq "
+        "(imposé à pq pour --index-type ivf_pq)",
+    )
+    parser.add_argument(
+        "--nlist", type=int, default=1024, help="IVF : nombre de listes (centroïdes)"
+    )
+    parser.add_argument(
+        "--nprobe", type=int, default=16, help="IVF : listes visitées par requête"
+    )
+    parser.add_argument(
+        "--hnsw-m", type=int, default=32, help="HNSW : nombre de voisins par nœud (M)"
+    )
+    parser.add_argument(
+        "--ef-construction", type=int, default=200, help="HNSW : efConstruction"
+    )
+    parser.add_argument(
+        "--ef-search", type=int, default=64, help="HNSW : efSearch à la requête"
+    )
+    parser.add_argument(
+        "--pq-m", type=int, default=48, help="PQ : nombre de sous-quantificateurs"
+    )
+    parser.add_argument(
+        "--pq-nbits", type=int, default=8, help="PQ : bits par sous-quantificateur"
+    )
+    parser.add_argument(
+        "--train-size",
+        type=int,
+        default=100_000,
+        help="Taille de l'échantillon d'entraînement (IVF / SQ / PQ)",
+    )
+    parser.add_argument(
+        "--exact-rerank",
+        action="store_true",
+        help="Sauvegarde les vecteurs float32 dans un fichier mappé en mémoire "
+        "pour re-scorer exactement la shortlist de l'index compressé",
+    )
+    parser.add_argument(
+        "--rerank-factor",
+        type=int,
+        default=4,
+        help="Taille de la shortlist re-scorée = k x rerank-factor",
+    )
+    parser.add_argument(
+        "--memory-budget-mb",
+        type=float,
+        default=None,
+        help="Budget mémoire de l'index (par worker) : choisit l'encodage au "
+        "meilleur recall qui tient dans ce budget",
+    )
+    parser.add_argument(
+        "--budget-eval-size",
+        type=int,
+        default=100_000,
+        help="Nombre de vecteurs utilisés pour comparer les configurations en mode budget",
+    )
+    parser.add_argument(
+        "--recall-k", type=int, default=10, help="k utilisé pour mesurer le recall@k"
+    )
+    parser.add_argument(
+        "--recall-queries",
+        type=int,
+        default=1000,
+        help="Nombre de vecteurs du corpus utilisés comme requêtes pour le recall",
+    )
+    parser.add_argument(
+        "--ids-only",
+        action="store_true",
+        help="Convertit seulement le mapping JSON existant en table d'IDs compacte "
+        "(sans recalculer les embeddings)",
+    )
+    parser.add_argument(
+        "--encoder-backend",
+        choices=ENCODER_BACKENDS,
+        default=os.getenv("ENCODER_BACKEND", "torch"),
+        help="Backend d'inférence du modèle d'embedding (int8* : CPU)",
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    return parser.parse_args()
+
+
+def write_atomic(path: str, write_fn):
+    """
+    Écrit le fichier via `write_fn(tmp_path)` dans un fichier temporaire du
+    même répertoire, puis le renomme. L'API en cours d'exécution garde l'ancien
+    fichier qu'elle a mappé en mémoire (index mmap, table d'IDs, vecteurs) :
+    pas de SIGBUS ni de lecture d'un fichier à moitié écrit avant /reload.
+    """
+    fd, tmp_path = tempfile.mkstemp(
+        prefix=os.path.basename(path) + ".",
+        suffix=".tmp",
+        dir=os.path.dirname(os.path.abspath(path)),
+    )
+    os.close(fd)
+    try:
+        write_fn(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def save_npy_atomic(path: str, array: np.ndarray):
+    """np.save via un fichier temporaire (voir write_atomic)"""
+
+    def write(tmp_path):
+        # Objet fichier : np.save n'ajoute pas d'extension .npy au nom temporaire
+        with open(tmp_path, "wb") as f:
+            np.save(f, array)
+
+    write_atomic(path, write)
+
+
+def save_json_atomic(path: str, data, **kwargs):
+    def write(tmp_path):
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, **kwargs)
+
+    write_atomic(path, write)
+
+
+def save_id_table(doc_ids: list, path: str):
+    """
+    Sauvegarde les IDs de documents dans l'ordre de l'index sous forme d'un
+    tableau numpy de chaînes UTF-8 à largeur fixe : l'API l'ouvre en mmap
+    (zéro copie) au lieu de parser un dictionnaire JSON.
+    """
+    encoded = [doc_id.encode("utf-8") for doc_id in doc_ids]
+    width = max((len(e) for e in encoded), default=1)
+    save_npy_atomic(path, np.array(encoded, dtype=f"S{width}"))
+
+
+def resolve_config(args, n: int, dim: int, storage: str, pq_m: int) -> dict:
+    """
+    Calcule les paramètres effectifs d'un index pour un corpus de n vecteurs
+    (nlist et pq_nbits sont réduits si le corpus est trop petit).
+    """
+    coarse = "ivf" if args.index_type in ("ivf_flat", "ivf_pq") else args.index_type
+    train_size = min(args.train_size, n)
+
+    if coarse == "ivf":
+        index_type = "ivf_pq" if storage == "pq" else "ivf_flat"
+    else:
+        index_type = coarse
+
+    config = {
+        "index_type": index_type,
+        "storage": storage,
+        "dim": dim,
+        "metric": "inner_product",
+    }
+
+    if coarse == "hnsw":
+        config.update(
+            {
+                "M": args.hnsw_m,
+                "efConstruction": args.ef_construction,
+                "efSearch": args.ef_search,
+            }
+        )
+    elif coarse == "ivf":
+        # IVF : FAISS recommande au moins ~39 points d'entraînement par liste
+        nlist = max(1, min(args.nlist, train_size // 39))
+        config.update({"nlist": nlist, "nprobe": min(args.nprobe, nlist)})
+
+    if storage == "pq":
+        if dim % pq_m != 0:
+            raise ValueError(f"--pq-m ({pq_m}) doit diviser la dimension ({dim})")
+        # Le k-means de chaque sous-quantificateur a besoin d'au moins 2^nbits points
+        pq_nbits = args.pq_nbits
+        while pq_nbits > 1 and 2**pq_nbits > train_size:
+            pq_nbits -= 1
+        config.update({"pq_m": pq_m, "pq_nbits": pq_nbits})
+
+    if coarse == "ivf" or storage != "float32":
+        config["train_size"] = train_size
+
+    return config
+
+
+def estimate_memory_bytes(config: dict, n: int) -> int:
+    """Estimation de la taille en mémoire de l'index pour n vecteurs."""
+    dim = config["dim"]
+    storage = config["storage"]
+
+    # Taille du code de chaque vecteur
+    if storage == "float32":
+        per_vector = 4 * dim
+    elif storage == "float16":
+        per_vector = 2 * dim
+    elif storage == "sq8":
+        per_vector = dim
+    else:
+        per_vector = (config["pq_m"] * config["pq_nbits"] + 7) // 8
+
+    fixed = 0
+    if storage == "pq":
+        fixed += (2 ** config["pq_nbits"]) * dim * 4  # Codebooks
+    if "nlist" in config:
+        per_vector += 8  # Identifiant stocké dans la liste inversée
+        fixed += config["nlist"] * dim * 4  # Centroïdes
+    if "M" in config:
+        # Niveau 0 : 2*M voisins (int32) + niveaux supérieurs (~5%)
+        per_vector += int(2 * config["M"] * 4 * 1.05) + 8
+
+    return per_vector * n + fixed
+
+
+def build_index(embeddings: np.ndarray, config: dict, seed: int):
+    """
+    Fabrique d'index : construit et entraîne (si besoin) l'index décrit par `config`.
+    L'index retourné est vide (appeler `index.add` ensuite).
+    """
+    dim = config["dim"]
+    storage = config["storage"]
+    metric = faiss.METRIC_INNER_PRODUCT
+
+    if config["index_type"] == "flat":
+        # IndexFlatIP : index simple basé sur le produit scalaire (Inner Product).
+        # Equivalent à la similarité cosinus sur des vecteurs normalisés.
+        if storage == "float32":
+            index = faiss.IndexFlatIP(dim)
+        elif storage == "pq":
+            index = faiss.IndexPQ(dim, config["pq_m"], config["pq_nbits"], metric)
+        else:
+            index = faiss.IndexScalarQuantizer(dim, SCALAR_QUANTIZERS[storage], metric)
+
+    elif config["index_type"] == "hnsw":
+        # Graphe HNSW : coût de recherche ~logarithmique
+        if storage == "float32":
+            index = faiss.IndexHNSWFlat(dim, config["M"], metric)
+        elif storage == "pq":
+            index = faiss.IndexHNSWPQ(
+                dim, config["pq_m"], config["M"], config["pq_nbits"], metric
+            )
+        else:
+            index = faiss.IndexHNSWSQ(
+                dim, SCALAR_QUANTIZERS[storage], config["M"], metric
+            )
+        index.hnsw.efConstruction = config["efConstruction"]
+
+    else:
+        quantizer = faiss.IndexFlatIP(dim)
+        nlist = config["nlist"]
+        if storage == "float32":
+            index = faiss.IndexIVFFlat(quantizer, dim, nlist, metric)
+        elif storage == "pq":
+            index = faiss.IndexIVFPQ(
+                quantizer, dim, nlist, config["pq_m"], config["pq_nbits"], metric
+            )
+        else:
+            index = faiss.IndexIVFScalarQuantizer(
+                quantizer, dim, nlist, SCALAR_QUANTIZERS[storage], metric
+            )
+
+    if not index.is_trained:
+        # Entraînement sur un échantillon aléatoire du corpus
+        n = embeddings.shape[0]
+        train_size = min(config.get("train_size", n), n)
+        rng = np.random.default_rng(seed)
+        sample = embeddings[rng.choice(n, size=train_size, replace=False)]
+        print(f"  Entraînement de l'index sur {train_size} vecteurs...")
+        start = time.perf_counter()
+        index.train(sample)
+        print(f"  Entraînement terminé en {time.perf_counter() - start:.1f}s")
+
+    return index
+
+
+def search_fn_for(index, vectors: np.ndarray = None, rerank_factor: int = 1):
+    """
+    Fonction de recherche (queries, k) -> (scores, ids), avec re-scoring exact
+    optionnel de la shortlist (même ExactRerankIndex que l'API).
+    """
+    if vectors is None:
+        return index.search
+    return ExactRerankIndex(index, vectors, rerank_factor).search
+
+
+def measure_recall(
+    search_fn, embeddings: np.ndarray, k: int, num_queries: int, seed: int
+) -> dict:
+    """
+    Compare l'index aux résultats exacts d'un IndexFlatIP (recall@k)
+    en utilisant un échantillon de vecteurs du corpus comme requêtes.
+    """
+    n, dim = embeddings.shape
+    k = min(k, n)
+    rng = np.random.default_rng(seed)
+    queries = embeddings[rng.choice(n, size=min(num_queries, n), replace=False)]
+
+    exact_index = faiss.IndexFlatIP(dim)
+    exact_index.add(embeddings)
+
+    start = time.perf_counter()
+    _, exact_ids = exact_index.search(queries, k)
+    exact_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    _, approx_ids = search_fn(queries, k)
+    approx_time = time.perf_counter() - start
+
+    hits = sum(
+        len(set(exact_row) & set(approx_row[approx_row != -1]))
+        for exact_row, approx_row in zip(exact_ids, approx_ids)
+    )
+    return {
+        "k": k,
+        "num_queries": len(queries),
+        "recall": hits / (len(queries) * k),
+        "exact_search_ms_per_query": exact_time * 1000 / len(queries),
+        "index_search_ms_per_query": approx_time * 1000 / len(queries),
+    }
+
+
+def candidate_configs(args, n: int, dim: int) -> list:
+    """Configurations essayées en mode budget mémoire (même type d'index)."""
+    configs = [
+        resolve_config(args, n, dim, storage, args.pq_m)
+        for storage in ("float32", "float16", "sq8")
+    ]
+    for pq_m in PQ_M_CANDIDATES:
+        if dim % pq_m == 0:
+            configs.append(resolve_config(args, n, dim, "pq", pq_m))
+    return configs
+
+
+def select_config_for_budget(args, embeddings: np.ndarray) -> tuple:
+    """
+    Mode budget mémoire : parmi les encodages qui tiennent dans le budget,
+    garde celui qui obtient le meilleur recall@k sur un échantillon du corpus.
+    """
+    n, dim = embeddings.shape
+    budget_bytes = args.memory_budget_mb * 1024 * 1024
+
+    rng = np.random.default_rng(args.seed)
+    eval_size = min(args.budget_eval_size, n)
+    eval_vectors = embeddings[np.sort(rng.choice(n, size=eval_size, replace=False))]
+
+    report = []
+    best = None
+    for config in candidate_configs(args, n, dim):
+        memory = estimate_memory_bytes(config, n)
+        label = config["storage"] + (f"/m={config['pq_m']}" if "pq_m" in config else "")
+        entry = {"config": label, "estimated_memory_mb": memory / (1024 * 1024)}
+
+        if memory > budget_bytes:
+            entry["fits"] = False
+            report.append(entry)
+            print(f"  [-] {label:<10} {entry['estimated_memory_mb']:.1f} MB (hors budget)")
+            continue
+
+        # Évaluer la configuration sur l'échantillon
+        eval_config = resolve_config(
+            args, eval_size, dim, config["storage"], config.get("pq_m", args.pq_m)
+        )
+        index = build_index(eval_vectors, eval_config, args.seed)
+        index.add(eval_vectors)
+        apply_search_params(index, eval_config)
+        search_fn = search_fn_for(
+            index, eval_vectors if args.exact_rerank else None, args.rerank_factor
+        )
+        recall = measure_recall(
+            search_fn, eval_vectors, args.recall_k, args.recall_queries, args.seed
+        )["recall"]
+
+        entry.update({"fits": True, "recall": recall})
+        report.append(entry)
+        print(
+            f"  [+] {label:<10} {entry['estimated_memory_mb']:.1f} MB, "
+            f"recall@{args.recall_k} = {recall:.4f}"
+        )
+
+        # Meilleur recall, puis plus petite empreinte mémoire en cas d'égalité
+        if best is None or (recall, -memory) > (best[1], -best[2]):
+            best = (config, recall, memory)
+
+    if best is None:
+        raise ValueError(
+            f"Aucune configuration ne tient dans {args.memory_budget_mb} MB "
+            f"pour {n} vecteurs de dimension {dim}"
+        )
+
+    return best[0], report
+
+
 def main():
     """
     Script principal pour générer les embeddings et l'index FAISS.
     """
+    args = parse_args()
+
+    if args.ids_only:
+        print(f"Conversion de {MAPPING_FILE} en table d'IDs compacte...")
+        with open(MAPPING_FILE, "r", encoding="utf-8") as f:
+            index_to_id = {int(k): v for k, v in json.load(f).items()}
+        save_id_table([index_to_id[i] for i in range(len(index_to_id))], IDS_FILE)
+        print(f"✅ Table d'IDs sauvegardée dans : {IDS_FILE}")
+        return
+
     print("=" * 60)
     print("Démarrage de la Phase 4 : Génération d'Embeddings et Indexation")
     print("=" * 60)
@@ -59,8 +496,11 @@ def main():
 
     # --- 2. Charger le modèle d'embedding ---
     # SentenceTransformer va télécharger et mettre en cache le modèle automatiquement.
-    print(f"Chargement du modèle SentenceTransformer : '{MODEL_NAME}'...")
-    model = SentenceTransformer(MODEL_NAME)
+    print(
+        f"Chargement du modèle SentenceTransformer : '{MODEL_NAME}' "
+        f"(backend: {args.encoder_backend})..."
+    )
+    model = load_embedding_model(MODEL_NAME, args.encoder_backend)
     print("Modèle chargé avec succès.")
 
     # --- 3. Créer le texte pour l'embedding ---
@@ -74,30 +514,81 @@ def main():
     print(f"Embeddings générés. Forme de la matrice : {embeddings.shape}")
 
     # Normalisation L2 - Étape importante pour la recherche de similarité cosinus
+    embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
     faiss.normalize_L2(embeddings)
 
     # --- 5. Créer et peupler l'index FAISS ---
-    embedding_dim = embeddings.shape[1]
+    n, dim = embeddings.shape
+    if args.memory_budget_mb:
+        print(
+            f"Sélection de l'encodage pour un budget de {args.memory_budget_mb} MB..."
+        )
+        index_params, budget_report = select_config_for_budget(args, embeddings)
+        index_params["memory_budget_mb"] = args.memory_budget_mb
+        index_params["budget_candidates"] = budget_report
+    else:
+        storage = args.storage or "float32"
+        if args.index_type == "ivf_pq":
+            storage = "pq"
+        index_params = resolve_config(args, n, dim, storage, args.pq_m)
 
-    # IndexFlatIP : index simple basé sur le produit scalaire (Inner Product).
-    # Equivalent à la similarité cosinus sur des vecteurs normalisés.
-    index = faiss.IndexFlatIP(embedding_dim)
+    print(
+        f"Création de l'index FAISS (type : {index_params['index_type']}, "
+        f"stockage : {index_params['storage']})..."
+    )
+    index = build_index(embeddings, index_params, args.seed)
 
-    print("Création et peuplement de l'index FAISS...")
+    print("Peuplement de l'index FAISS...")
     index.add(embeddings)
+    apply_search_params(index, index_params)
+    index_params["ntotal"] = index.ntotal
+    index_params["estimated_memory_mb"] = estimate_memory_bytes(index_params, n) / (
+        1024 * 1024
+    )
 
     print(f"Index créé. Nombre total de vecteurs dans l'index : {index.ntotal}")
 
+    # Re-scoring exact : vecteurs float32 dans un fichier à part (hors budget,
+    # lu via mmap et partagé entre workers par le cache de pages de l'OS)
+    exact_vectors = None
+    if args.exact_rerank:
+        print(f"Sauvegarde des vecteurs exacts dans : {VECTORS_FILE}")
+        save_npy_atomic(VECTORS_FILE, embeddings)
+        exact_vectors = embeddings
+        index_params["exact_rerank"] = {
+            "vectors_file": os.path.basename(VECTORS_FILE),
+            "rerank_factor": args.rerank_factor,
+        }
+
+    # Recall@k par rapport à une recherche exacte (IndexFlatIP)
+    if index_params["index_type"] != "flat" or index_params["storage"] != "float32":
+        search_fn = search_fn_for(index, exact_vectors, args.rerank_factor)
+        recall = measure_recall(
+            search_fn, embeddings, args.recall_k, args.recall_queries, args.seed
+        )
+        index_params["recall"] = recall
+        print(
+            f"Recall@{recall['k']} vs recherche exacte : {recall['recall']:.4f} "
+            f"({recall['num_queries']} requêtes, "
+            f"{recall['index_search_ms_per_query']:.3f} ms/requête contre "
+            f"{recall['exact_search_ms_per_query']:.3f} ms en exact)"
+        )
+
     # --- 6. Sauvegarder l'index et le mapping ---
     print(f"Sauvegarde de l'index dans : {INDEX_FILE}")
-    faiss.write_index(index, INDEX_FILE)
+    write_atomic(INDEX_FILE, lambda tmp_path: faiss.write_index(index, tmp_path))
 
     # Créer un mapping de l'indice de l'index (0, 1, 2...) à notre ID de document
     index_to_id = {i: doc["id"] for i, doc in enumerate(documents)}
 
     print(f"Sauvegarde du mapping dans : {MAPPING_FILE}")
-    with open(MAPPING_FILE, "w", encoding="utf-8") as f:
-        json.dump(index_to_id, f)
+    save_json_atomic(MAPPING_FILE, index_to_id)
+
+    print(f"Sauvegarde de la table d'IDs dans : {IDS_FILE}")
+    save_id_table([doc["id"] for doc in documents], IDS_FILE)
+
+    print(f"Sauvegarde des paramètres de l'index dans : {INDEX_PARAMS_FILE}")
+    save_json_atomic(INDEX_PARAMS_FILE, index_params, indent=2)
 
     print("\n" + "=" * 60)
     print("✅ Phase 4 terminée !")
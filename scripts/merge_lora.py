@@ -0,0 +1,44 @@
+# scripts/merge_lora.py
+
+"""
+Fusionne les adaptateurs LoRA dans les poids du modèle de base et écrit un
+checkpoint autonome : l'API le charge directement (LORA_MODEL_PATH), sans
+assembler modèle de base + adaptateurs au démarrage.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Permet d'importer le package src
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT_DIR)
+
+from src.api.summarizer import is_adapter_checkpoint, save_merged_checkpoint
+
+# --- CONFIGURATION ---
+ADAPTER_PATH = os.path.join(ROOT_DIR, "models/bart-lora-finetuned")
+OUTPUT_PATH = os.path.join(ROOT_DIR, "models/bart-lora-merged")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--adapter", default=ADAPTER_PATH)
+    parser.add_argument("--output", default=OUTPUT_PATH)
+    args = parser.parse_args()
+
+    if not is_adapter_checkpoint(args.adapter):
+        print(f"❌ Pas d'adaptateurs LoRA (adapter_config.json) dans: {args.adapter}")
+        sys.exit(1)
+
+    print(f"🔧 Fusion de {args.adapter} ...")
+    start = time.perf_counter()
+    save_merged_checkpoint(args.adapter, args.output)
+    print(f"✅ Checkpoint fusionné écrit en {time.perf_counter() - start:.1f}s")
+    print(f"💾 {args.output}")
+    print(f"   Lancer l'API avec LORA_MODEL_PATH={args.output}")
+
+
+if __name__ == "__main__":
+    main()
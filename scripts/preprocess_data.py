@@ -1,15 +1,22 @@
 # scripts/preprocess_data.py
 
 import os
+import sys
 import json
 import re
 import fitz  # PyMuPDF
 
+# Permet d'importer le package src (stockage des documents partagé avec l'API)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from src.api.document_store import build_document_store
+
 # --- CONFIGURATION DES CHEMINS ---
 ARXIV_RAW_DIR = "data/raw/arxiv"
 BLOGS_NORMALIZED_DIR = "data/normalized/blogs"
 PROCESSED_OUTPUT_DIR = "data/processed"
 PROCESSED_OUTPUT_FILE = os.path.join(PROCESSED_OUTPUT_DIR, "processed_corpus.jsonl")
+# Base SQLite servie par l'API (champs légers en bloc, texte intégral à la demande)
+DOCUMENT_STORE_FILE = os.path.join(PROCESSED_OUTPUT_DIR, "documents.sqlite")
 
 def clean_text(text: str) -> str:
     """
@@ -147,10 +154,14 @@ def main():
         for doc in all_docs:
             f.write(json.dumps(doc, ensure_ascii=False) + '\n')
 
+    # Construire le stockage des documents pour l'API
+    stored = build_document_store(PROCESSED_OUTPUT_FILE, DOCUMENT_STORE_FILE)
+
     print("\n" + "="*60)
     print("✅ Phase 3 terminée !")
     print(f"Total de documents traités : {len(all_docs)}")
     print(f"Corpus unifié sauvegardé dans : {PROCESSED_OUTPUT_FILE}")
+    print(f"Stockage des documents ({stored} documents) : {DOCUMENT_STORE_FILE}")
     print("="*60)
 
 
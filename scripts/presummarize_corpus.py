@@ -0,0 +1,266 @@
+# scripts/presummarize_corpus.py
+
+"""
+Pré-résumé de tout le corpus (hors ligne) : les résumés individuels sont écrits
+dans le cache persistant de l'API, épinglés, et /summarize les sert sans générer.
+
+Incrémental : seuls les documents nouveaux ou modifiés (texte, modèle ou
+paramètres différents => clé différente) sont résumés. Reprenable : chaque
+bloc terminé est enregistré aussitôt, une relance reprend là où le job
+s'est arrêté.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+# Permet d'importer le package src (résumeur et cache partagés avec l'API)
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT_DIR)
+
+from src.api.summarizer import (
+    INDIVIDUAL_MAX_LENGTH,
+    INDIVIDUAL_MIN_LENGTH,
+    DEFAULT_GENERATION_PARAMS,
+    article_text,
+    cache_key,
+    compute_model_version,
+    generation_kwargs,
+)
+from src.api.summary_store import SummaryStore
+
+# --- CONFIGURATION ---
+CORPUS_FILE = os.path.join(ROOT_DIR, "data/processed/processed_corpus.jsonl")
+SUMMARY_STORE_FILE = os.path.join(ROOT_DIR, "data/processed/summaries.sqlite")
+LORA_MODEL_PATH = os.getenv(
+    "LORA_MODEL_PATH", os.path.join(ROOT_DIR, "models/bart-lora-finetuned")
+)
+# Pré-compression extractive : mêmes modèle, backend et budget que l'API, pour
+# que les clés du cache soient calculées sur le même texte compressé
+EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+ENCODER_BACKEND = os.getenv("ENCODER_BACKEND", "torch")
+SUMMARIZER_COMPRESS_TOKENS = int(os.getenv("SUMMARIZER_COMPRESS_TOKENS", "0"))
+
+# Résumeur propre à chaque processus du pool
+_worker_summarizer = None
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--corpus", default=CORPUS_FILE)
+    parser.add_argument("--store", default=SUMMARY_STORE_FILE)
+    parser.add_argument("--model-path", default=LORA_MODEL_PATH)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=max(1, (os.cpu_count() or 2) // 4),
+        help="Processus de génération (chacun charge son propre modèle)",
+    )
+    parser.add_argument(
+        "--threads-per-worker",
+        type=int,
+        default=None,
+        help="Threads PyTorch par processus (défaut: cœurs / workers)",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=16,
+        help="Documents par tâche (un bloc est enregistré dès qu'il est terminé)",
+    )
+    parser.add_argument("--max-batch-tokens", type=int, default=16384)
+    parser.add_argument("--merge-adapter", action="store_true")
+    parser.add_argument("--quantize", action="store_true")
+    parser.add_argument(
+        "--store-max-mb",
+        type=float,
+        default=float(os.getenv("SUMMARY_STORE_MAX_MB", "256")),
+        help="Budget des entrées non épinglées (même valeur que l'API)",
+    )
+    parser.add_argument(
+        "--compress-tokens",
+        type=int,
+        default=SUMMARIZER_COMPRESS_TOKENS,
+        help="Budget de la pré-compression extractive (même valeur que l'API)",
+    )
+    parser.add_argument("--limit", type=int, default=None)
+    return parser.parse_args()
+
+
+def load_compress_fn(model_path: str, target_tokens: int):
+    """
+    `compress` de l'ExtractiveCompressor de l'API (embeddings MiniLM, tokens du
+    résumeur), None si la pré-compression est désactivée
+    """
+    if target_tokens <= 0:
+        return None
+    from transformers import AutoTokenizer
+
+    from src.api.compression import ExtractiveCompressor
+    from src.api.encoders import load_embedding_model
+
+    tokenizer = AutoTokenizer.from_pretrained(model_path)
+    encoder = load_embedding_model(EMBEDDING_MODEL_NAME, ENCODER_BACKEND)
+    compressor = ExtractiveCompressor(
+        encoder.encode,
+        lambda text: len(tokenizer(text, add_special_tokens=False)["input_ids"]),
+        target_tokens=target_tokens,
+    )
+    print(f"✅ Pré-compression extractive activée ({target_tokens} tokens max)")
+    return compressor.compress
+
+
+def _init_worker(model_path, max_batch_tokens, merge_adapter, quantize, threads):
+    global _worker_summarizer
+    import torch
+
+    from src.api.summarizer import LoRASummarizer
+
+    # Évite que N processus se disputent tous les cœurs
+    torch.set_num_threads(threads)
+    _worker_summarizer = LoRASummarizer(
+        model_path,
+        max_batch_tokens=max_batch_tokens,
+        merge_adapter=merge_adapter,
+        quantize=quantize,
+    )
+
+
+def _summarize_chunk(texts: list) -> tuple:
+    start = time.perf_counter()
+    summaries = _worker_summarizer.summarize_batch(
+        texts, max_length=INDIVIDUAL_MAX_LENGTH, min_length=INDIVIDUAL_MIN_LENGTH
+    )
+    return summaries, (time.perf_counter() - start) * 1000.0
+
+
+def load_documents(corpus_file: str, limit=None) -> list:
+    """Documents du corpus (en cas de doublon d'ID, la dernière version l'emporte)"""
+    documents = {}
+    with open(corpus_file, "r", encoding="utf-8") as f:
+        for line in f:
+            doc = json.loads(line)
+            documents[doc["id"]] = doc
+    docs = list(documents.values())
+    return docs[:limit] if limit else docs
+
+
+def main():
+    args = parse_args()
+
+    print("=" * 60)
+    print("Pré-résumé du corpus")
+    print("=" * 60)
+
+    if not os.path.exists(args.corpus):
+        print(f"❌ Fichier non trouvé: {args.corpus}")
+        return
+
+    documents = load_documents(args.corpus, args.limit)
+    print(f"✅ {len(documents)} documents dans le corpus")
+
+    store = SummaryStore(args.store, max_bytes=int(args.store_max_mb * 1024 * 1024))
+    model_version = compute_model_version(args.model_path, args.quantize)
+    params = {"max_length": INDIVIDUAL_MAX_LENGTH, "min_length": INDIVIDUAL_MIN_LENGTH}
+    key_params = generation_kwargs(**{**DEFAULT_GENERATION_PARAMS, **params})
+
+    # --- 1. Ce qui reste à faire (incrémental / reprise) ---
+    compress_fn = load_compress_fn(args.model_path, args.compress_tokens)
+    jobs = []
+    for doc in documents:
+        text = article_text(doc, compress_fn)
+        jobs.append((cache_key(text, model_version, **params), doc["id"], text))
+
+    keys = [key for key, _, _ in jobs]
+    present = store.contains(keys)
+    pinned = store.contains(keys, pinned_only=True)
+    # Déjà résumés à la demande par l'API : il suffit de les épingler
+    store.pin(present - pinned)
+    todo = [job for job in jobs if job[0] not in present]
+    print(
+        f"   modèle {model_version}: {len(present)} déjà en cache, "
+        f"{len(todo)} à résumer"
+    )
+    if not todo:
+        print("✅ Corpus déjà entièrement pré-résumé")
+        return
+
+    # --- 2. Génération par blocs dans un pool de processus ---
+    workers = max(1, min(args.workers, len(todo)))
+    threads = args.threads_per_worker or max(1, (os.cpu_count() or 1) // workers)
+    chunks = [
+        todo[start : start + args.chunk_size]
+        for start in range(0, len(todo), args.chunk_size)
+    ]
+    print(f"🚀 {workers} processus x {threads} threads, {len(chunks)} blocs")
+
+    done = 0
+    started_at = time.perf_counter()
+    executor = ProcessPoolExecutor(
+        max_workers=workers,
+        # spawn : pas de fork d'un processus ayant déjà initialisé PyTorch
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(
+            args.model_path,
+            args.max_batch_tokens,
+            args.merge_adapter,
+            args.quantize,
+            threads,
+        ),
+    )
+    try:
+        pending = {}
+        next_chunk = 0
+        while next_chunk < len(chunks) or pending:
+            # Au plus 2 blocs en vol par processus (mémoire bornée)
+            while next_chunk < len(chunks) and len(pending) < 2 * workers:
+                chunk = chunks[next_chunk]
+                future = executor.submit(_summarize_chunk, [t for _, _, t in chunk])
+                pending[future] = chunk
+                next_chunk += 1
+
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                chunk = pending.pop(future)
+                summaries, elapsed_ms = future.result()
+                per_doc_ms = elapsed_ms / len(chunk)
+                store.put_many(
+                    [
+                        (key, doc_id, summary, per_doc_ms)
+                        for (key, doc_id, _), summary in zip(chunk, summaries)
+                    ],
+                    model_version,
+                    key_params,
+                    pinned=True,
+                )
+                done += len(chunk)
+                rate = done / (time.perf_counter() - started_at)
+                print(
+                    f"   {done}/{len(todo)} documents "
+                    f"({rate:.2f} docs/s, reste ~{(len(todo) - done) / rate:.0f}s)"
+                )
+    except KeyboardInterrupt:
+        print(
+            "\n⏸️  Interrompu : les blocs terminés sont enregistrés, "
+            "relancer pour reprendre"
+        )
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+    executor.shutdown()
+
+    elapsed = time.perf_counter() - started_at
+    print(
+        f"\n✅ {done} documents résumés en {elapsed:.1f}s "
+        f"({done / elapsed:.2f} docs/s)"
+    )
+    print(f"💾 {args.store}: {store.stats()['entries']} résumés")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""
+Micro-batching des requêtes de recherche (regroupement des encodages)
+"""
+
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+
+class _PendingQuery:
+    """Requête en attente dans la file du batcher"""
+
+    __slots__ = ("text", "k", "index", "embedding", "future", "enqueued_at")
+
+    def __init__(
+        self, text: str, k: int, index, embedding: Optional[np.ndarray] = None
+    ):
+        self.text = text
+        self.k = k
+        # Index de l'instantané lu par la requête (pas celui du moment du batch)
+        self.index = index
+        self.embedding = embedding
+        self.future: Future = Future()
+        self.enqueued_at = time.perf_counter()
+
+
+class QueryBatcher:
+    """
+    Regroupe les requêtes concurrentes arrivant dans une courte fenêtre de temps
+    pour les encoder en une seule passe et lancer un seul `index.search` par
+    index (chaque requête indique l'index à interroger : après un /reload, les
+    requêtes encore en file gardent l'index qu'elles ont lu).
+
+    Chaque appelant reçoit ensuite sa propre ligne de résultats.
+    """
+
+    def __init__(
+        self,
+        encode_fn: Callable[[List[str]], np.ndarray],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        stats_window: int = 1000,
+    ):
+        """
+        Args:
+            encode_fn: Encode une liste de textes en embeddings normalisés (N, d)
+            max_batch_size: Nombre maximal de requêtes par batch
+            max_wait_ms: Attente maximale (ms) après la première requête d'un batch
+            stats_window: Nombre de mesures récentes conservées pour les percentiles
+        """
+        self.encode_fn = encode_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait_s = max(0.0, float(max_wait_ms)) / 1000.0
+
+        self._queue: "queue.Queue[Optional[_PendingQuery]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+        # Statistiques
+        self._lock = threading.Lock()
+        self._total_queries = 0
+        self._total_batches = 0
+        self._batch_size_histogram = {}
+        self._recent_batch_sizes = deque(maxlen=stats_window)
+        self._recent_waits_ms = deque(maxlen=stats_window)
+        self._max_wait_ms_seen = 0.0
+
+    # --- CYCLE DE VIE ---
+
+    def start(self):
+        """Démarre le thread de traitement des batches"""
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(
+            target=self._run, name="query-batcher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Arrête le thread (les requêtes déjà en file sont traitées)"""
+        if not self._running:
+            return
+        self._running = False
+        self._queue.put(None)
+        if self._thread:
+            self._thread.join(timeout)
+        self._thread = None
+
+    # --- API PUBLIQUE ---
+
+    def submit(
+        self, text: str, k: int, index, embedding: Optional[np.ndarray] = None
+    ) -> Future:
+        """
+        Ajoute une requête à la file (recherche dans `index`).
+
+        Le Future renvoie (embedding (1, d), distances (1, k), indices (1, k)).
+        Si `embedding` est fourni, l'encodage de cette requête est sauté.
+        """
+        if not self._running:
+            raise RuntimeError("Le QueryBatcher n'est pas démarré")
+        pending = _PendingQuery(text, k, index, embedding)
+        self._queue.put(pending)
+        return pending.future
+
+    def search(
+        self,
+        text: str,
+        k: int,
+        index,
+        embedding: Optional[np.ndarray] = None,
+        timeout: Optional[float] = None,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Version bloquante de `submit`"""
+        return self.submit(text, k, index, embedding).result(timeout)
+
+    def stats(self) -> dict:
+        """Statistiques de taille de batch et d'attente en file"""
+        with self._lock:
+            sizes = list(self._recent_batch_sizes)
+            waits = sorted(self._recent_waits_ms)
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait_s * 1000.0,
+                "queue_depth": self._queue.qsize(),
+                "total_queries": self._total_queries,
+                "total_batches": self._total_batches,
+                "avg_batch_size": (
+                    self._total_queries / self._total_batches
+                    if self._total_batches
+                    else 0.0
+                ),
+                "recent_avg_batch_size": (sum(sizes) / len(sizes)) if sizes else 0.0,
+                "batch_size_histogram": dict(sorted(self._batch_size_histogram.items())),
+                "queue_wait_ms": {
+                    "avg": (sum(waits) / len(waits)) if waits else 0.0,
+                    "p50": percentile(waits, 0.50),
+                    "p95": percentile(waits, 0.95),
+                    "max": self._max_wait_ms_seen,
+                },
+            }
+
+    # --- BOUCLE INTERNE ---
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                break
+
+            batch = [first]
+            deadline = first.enqueued_at + self.max_wait_s
+            stop_requested = False
+
+            # Collecter les requêtes arrivées pendant la fenêtre d'attente
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                try:
+                    if remaining > 0:
+                        item = self._queue.get(timeout=remaining)
+                    else:
+                        item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop_requested = True
+                    break
+                batch.append(item)
+
+            self._process(batch)
+
+            if stop_requested:
+                break
+
+        # Vider ce qui reste en file après l'arrêt
+        leftovers = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                leftovers.append(item)
+        for start in range(0, len(leftovers), self.max_batch_size):
+            self._process(leftovers[start : start + self.max_batch_size])
+
+    def _process(self, batch: List[_PendingQuery]):
+        started_at = time.perf_counter()
+        waits_ms = [(started_at - p.enqueued_at) * 1000.0 for p in batch]
+
+        try:
+            # 1. Encoder en une seule passe les requêtes sans embedding
+            to_encode = [i for i, p in enumerate(batch) if p.embedding is None]
+            if to_encode:
+                encoded = self.encode_fn([batch[i].text for i in to_encode])
+                for row, i in enumerate(to_encode):
+                    batch[i].embedding = encoded[row : row + 1]
+
+            embeddings = np.ascontiguousarray(
+                np.vstack([p.embedding for p in batch]), dtype=np.float32
+            )
+
+            # 2. Une recherche FAISS par (index, k) : avec IVF ou HNSW, chercher
+            # plus de voisins que demandé peut changer les premiers résultats
+            groups = {}
+            for row, p in enumerate(batch):
+                groups.setdefault((id(p.index), p.k), []).append(row)
+            for rows in groups.values():
+                first = batch[rows[0]]
+                distances, indices = first.index.search(embeddings[rows], first.k)
+
+                # 3. Redistribuer à chaque appelant ses propres résultats
+                for i, row in enumerate(rows):
+                    batch[row].future.set_result(
+                        (
+                            embeddings[row : row + 1],
+                            distances[i : i + 1],
+                            indices[i : i + 1],
+                        )
+                    )
+        except Exception as e:
+            for p in batch:
+                if not p.future.done():
+                    p.future.set_exception(e)
+
+        with self._lock:
+            size = len(batch)
+            self._total_queries += size
+            self._total_batches += 1
+            self._batch_size_histogram[size] = (
+                self._batch_size_histogram.get(size, 0) + 1
+            )
+            self._recent_batch_sizes.append(size)
+            self._recent_waits_ms.extend(waits_ms)
+            self._max_wait_ms_seen = max(self._max_wait_ms_seen, max(waits_ms))
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Percentile simple (plus proche rang) sur une liste déjà triée"""
+    if not sorted_values:
+        return 0.0
+    rank = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[rank]
@@ -0,0 +1,267 @@
+"""
+Caches en mémoire pour la recherche (LRU + TTL)
+"""
+
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Hashable, List, Optional, Tuple
+
+import faiss
+import numpy as np
+
+
+def normalize_query(text: str) -> str:
+    """
+    Normalise le texte d'une requête pour servir de clé de cache.
+    Les modèles d'embedding et de re-ranking utilisés sont "uncased",
+    la casse et les espaces multiples n'ont donc pas d'effet sur le résultat.
+    """
+    return " ".join(text.split()).lower()
+
+
+class TTLCache:
+    """
+    Cache LRU borné en taille avec expiration (TTL), sûr entre threads.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl_seconds: Optional[float] = 600.0):
+        """
+        Args:
+            maxsize: Nombre maximal d'entrées (0 désactive le cache)
+            ttl_seconds: Durée de vie d'une entrée (None ou <= 0 : pas d'expiration)
+        """
+        self.maxsize = max(0, int(maxsize))
+        self.ttl_seconds = ttl_seconds if ttl_seconds and ttl_seconds > 0 else None
+
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any):
+        if self.maxsize == 0:
+            return
+        expires_at = (
+            time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+        )
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Vide le cache (ex: après rechargement de l'index ou du corpus)"""
+        with self._lock:
+            self._data.clear()
+            self.invalidations += 1
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+
+class _SemanticEntry:
+    __slots__ = ("query", "top_k", "version", "results", "expires_at")
+
+    def __init__(self, query, top_k, version, results, expires_at):
+        self.query = query
+        self.top_k = top_k
+        self.version = version
+        self.results = results
+        self.expires_at = expires_at
+
+
+class SemanticCache:
+    """
+    Cache sémantique des résultats re-rankés.
+
+    Garde un petit index FAISS (produit scalaire = cosinus sur des vecteurs
+    normalisés) des embeddings des requêtes récemment servies. Si une nouvelle
+    requête est assez proche d'une requête en cache, ses résultats sont
+    réutilisés sans repasser par le Cross-Encoder.
+    """
+
+    # Nombre de voisins examinés à chaque recherche (les plus proches peuvent
+    # être expirés ou avoir un top_k insuffisant)
+    _PROBE = 8
+
+    def __init__(
+        self,
+        maxsize: int = 512,
+        threshold: float = 0.92,
+        ttl_seconds: Optional[float] = 600.0,
+        stats_window: int = 1000,
+    ):
+        """
+        Args:
+            maxsize: Nombre maximal de requêtes en cache (0 désactive le cache)
+            threshold: Similarité cosinus minimale pour réutiliser des résultats
+            ttl_seconds: Durée de vie d'une entrée (None ou <= 0 : pas d'expiration)
+            stats_window: Nombre de similarités récentes gardées pour les stats
+        """
+        self.maxsize = max(0, int(maxsize))
+        self.threshold = float(threshold)
+        self.ttl_seconds = ttl_seconds if ttl_seconds and ttl_seconds > 0 else None
+
+        self._index = None  # Créé au premier ajout (dimension inconnue avant)
+        self._entries: "OrderedDict[int, _SemanticEntry]" = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._hit_similarities = deque(maxlen=stats_window)
+
+    def lookup(
+        self, embedding: np.ndarray, top_k: int, version: Hashable
+    ) -> Optional[Tuple[List[Any], float, str]]:
+        """
+        Cherche une requête en cache assez proche de `embedding` (1, d).
+
+        Returns:
+            (résultats tronqués à top_k, similarité, requête d'origine) ou None
+        """
+        if self.maxsize == 0:
+            return None
+
+        query_vector = np.ascontiguousarray(embedding, dtype=np.float32).reshape(
+            1, -1
+        )
+        with self._lock:
+            if self._index is None or self._index.ntotal == 0:
+                self.misses += 1
+                return None
+
+            k = min(self._PROBE, self._index.ntotal)
+            similarities, ids = self._index.search(query_vector, k)
+            now = time.monotonic()
+
+            for similarity, entry_id in zip(similarities[0], ids[0]):
+                if entry_id == -1 or similarity < self.threshold:
+                    break  # Résultats triés par similarité décroissante
+                entry = self._entries.get(int(entry_id))
+                if entry is None or entry.version != version or entry.top_k < top_k:
+                    continue
+                if entry.expires_at is not None and entry.expires_at <= now:
+                    continue
+
+                self._entries.move_to_end(int(entry_id))
+                self.hits += 1
+                self._hit_similarities.append(float(similarity))
+                return entry.results[:top_k], float(similarity), entry.query
+
+            self.misses += 1
+            return None
+
+    def put(
+        self,
+        embedding: np.ndarray,
+        top_k: int,
+        version: Hashable,
+        results: List[Any],
+        query: str = "",
+    ):
+        """Ajoute les résultats re-rankés d'une requête au cache"""
+        if self.maxsize == 0:
+            return
+
+        vector = np.ascontiguousarray(embedding, dtype=np.float32).reshape(1, -1)
+        expires_at = (
+            time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+        )
+        with self._lock:
+            if self._index is None:
+                self._index = faiss.IndexIDMap2(faiss.IndexFlatIP(vector.shape[1]))
+
+            entry_id = self._next_id
+            self._next_id += 1
+            self._index.add_with_ids(vector, np.array([entry_id], dtype=np.int64))
+            self._entries[entry_id] = _SemanticEntry(
+                query, top_k, version, results, expires_at
+            )
+
+            # Éviction LRU
+            evicted = []
+            while len(self._entries) > self.maxsize:
+                old_id, _ = self._entries.popitem(last=False)
+                evicted.append(old_id)
+            if evicted:
+                self._index.remove_ids(np.array(evicted, dtype=np.int64))
+                self.evictions += len(evicted)
+
+    def clear(self):
+        """Vide le cache (ex: après rechargement de l'index ou du corpus)"""
+        with self._lock:
+            if self._index is not None:
+                self._index.reset()
+            self._entries.clear()
+            self.invalidations += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            similarities = sorted(self._hit_similarities)
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "threshold": self.threshold,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_similarity": {
+                    "avg": (sum(similarities) / len(similarities))
+                    if similarities
+                    else None,
+                    "min": similarities[0] if similarities else None,
+                    "p50": similarities[len(similarities) // 2]
+                    if similarities
+                    else None,
+                },
+            }
@@ -0,0 +1,113 @@
+"""
+Annulation des générations en cours : jeton d'annulation, critère d'arrêt de
+`generate` et registre des requêtes actives par session
+"""
+
+import threading
+from typing import Dict, List, Optional
+
+import torch
+from transformers import StoppingCriteria, StoppingCriteriaList
+
+# Raisons d'annulation
+DISCONNECT = "disconnect"
+SUPERSEDED = "superseded"
+JOB_CANCELLED = "job_cancelled"
+
+
+class GenerationCancelled(Exception):
+    """La génération a été abandonnée (client parti, requête remplacée...)"""
+
+    def __init__(self, reason: Optional[str] = None):
+        super().__init__(f"Génération annulée ({reason or 'inconnue'})")
+        self.reason = reason
+
+
+class CancellationToken:
+    """Jeton partagé entre une requête et les générations lancées pour elle"""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self.reason: Optional[str] = None
+
+    def cancel(self, reason: str):
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise GenerationCancelled(self.reason)
+
+
+class CancellationStoppingCriteria(StoppingCriteria):
+    """
+    Arrête `generate` dès que toutes les séquences du batch sont annulées
+    (une séquence sans jeton n'est jamais annulée : le batch continue)
+    """
+
+    def __init__(self, tokens: List[Optional[CancellationToken]]):
+        self.tokens = tokens
+
+    def __call__(self, input_ids: torch.LongTensor, scores, **kwargs):
+        stop = all(token is not None and token.cancelled for token in self.tokens)
+        return torch.full(
+            (input_ids.shape[0],), stop, dtype=torch.bool, device=input_ids.device
+        )
+
+
+def cancellation_criteria(
+    tokens: List[Optional[CancellationToken]],
+) -> StoppingCriteriaList:
+    return StoppingCriteriaList([CancellationStoppingCriteria(tokens)])
+
+
+class SessionRegistry:
+    """
+    Requête de résumé active de chaque session : une nouvelle requête de la
+    même session annule la précédente. Compte les annulations par raison.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._active: Dict[str, CancellationToken] = {}
+        self.started = 0
+        self.cancelled: Dict[str, int] = {DISCONNECT: 0, SUPERSEDED: 0}
+
+    def begin(self, session_id: Optional[str]) -> CancellationToken:
+        """Jeton d'une nouvelle requête (annule la précédente de la session)"""
+        token = CancellationToken()
+        with self._lock:
+            self.started += 1
+            if session_id:
+                previous = self._active.get(session_id)
+                self._active[session_id] = token
+                if previous is not None and not previous.cancelled:
+                    previous.cancel(SUPERSEDED)
+                    self.cancelled[SUPERSEDED] += 1
+        return token
+
+    def cancel(self, token: CancellationToken, reason: str):
+        with self._lock:
+            if not token.cancelled:
+                token.cancel(reason)
+                self.cancelled[reason] = self.cancelled.get(reason, 0) + 1
+
+    def end(self, session_id: Optional[str], token: CancellationToken):
+        with self._lock:
+            if session_id and self._active.get(session_id) is token:
+                del self._active[session_id]
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = sum(self.cancelled.values())
+            return {
+                "active_sessions": len(self._active),
+                "requests": self.started,
+                "cancelled": dict(self.cancelled),
+                "cancel_rate": (total / self.started) if self.started else 0.0,
+            }
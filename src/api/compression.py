@@ -0,0 +1,104 @@
+"""
+Pré-compression extractive des entrées du résumeur : on ne garde que les
+phrases les plus centrales (embeddings MiniLM) dans un budget de tokens
+"""
+
+import re
+import threading
+from typing import Callable, List
+
+import numpy as np
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9\"'(\[])")
+
+
+def split_sentences(text: str) -> List[str]:
+    """Découpage simple en phrases (ponctuation finale suivie d'une majuscule)"""
+    return [s.strip() for s in _SENTENCE_RE.split(text.strip()) if s.strip()]
+
+
+def centrality_scores(embeddings: np.ndarray) -> np.ndarray:
+    """
+    Centralité de degré (à la LexRank, sans seuil) : similarité cosinus moyenne
+    de chaque phrase avec toutes les autres
+    """
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    normalized = embeddings / np.maximum(norms, 1e-12)
+    similarity = normalized @ normalized.T
+    return similarity.mean(axis=1)
+
+
+class ExtractiveCompressor:
+    """
+    Réduit un texte trop long pour le budget de tokens : les phrases sont
+    classées par centralité puis conservées (dans leur ordre d'origine) tant
+    qu'elles tiennent dans le budget. Un texte déjà sous le budget est inchangé.
+    """
+
+    def __init__(
+        self,
+        encode_fn: Callable[[List[str]], np.ndarray],
+        count_tokens_fn: Callable[[str], int],
+        target_tokens: int = 512,
+    ):
+        """
+        Args:
+            encode_fn: Embeddings des phrases (SentenceTransformer.encode déjà chargé)
+            count_tokens_fn: Nombre de tokens d'un texte pour le modèle de résumé
+            target_tokens: Budget de tokens du texte compressé
+        """
+        self.encode_fn = encode_fn
+        self.count_tokens_fn = count_tokens_fn
+        self.target_tokens = target_tokens
+
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.compressed = 0
+        self.tokens_in = 0
+        self.tokens_out = 0
+
+    def compress(self, text: str) -> str:
+        total_tokens = self.count_tokens_fn(text)
+        result = text
+        if total_tokens > self.target_tokens:
+            sentences = split_sentences(text)
+            if len(sentences) > 1:
+                result = self._select(sentences)
+
+        with self._lock:
+            self.calls += 1
+            self.tokens_in += total_tokens
+            if result is not text:
+                self.compressed += 1
+                self.tokens_out += self.count_tokens_fn(result)
+            else:
+                self.tokens_out += total_tokens
+        return result
+
+    def _select(self, sentences: List[str]) -> str:
+        scores = centrality_scores(np.asarray(self.encode_fn(sentences)))
+        lengths = [self.count_tokens_fn(s) for s in sentences]
+
+        kept = []
+        budget = self.target_tokens
+        for i in np.argsort(-scores):
+            if lengths[i] <= budget:
+                kept.append(i)
+                budget -= lengths[i]
+        if not kept:
+            # Aucune phrase ne tient entière : la plus centrale (tronquée ensuite)
+            kept = [int(np.argmax(scores))]
+        return " ".join(sentences[i] for i in sorted(kept))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "target_tokens": self.target_tokens,
+                "calls": self.calls,
+                "compressed": self.compressed,
+                "tokens_in": self.tokens_in,
+                "tokens_out": self.tokens_out,
+                "token_reduction": (1 - self.tokens_out / self.tokens_in)
+                if self.tokens_in
+                else 0.0,
+            }
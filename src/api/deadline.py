@@ -0,0 +1,88 @@
+"""
+Suivi du temps par étape et budget de latence (deadline) pour /search
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+
+class StageTracker:
+    """Mesure le temps passé dans chaque étape d'une requête et le budget restant"""
+
+    def __init__(self, deadline_ms: Optional[float] = None):
+        self.deadline_ms = deadline_ms
+        self.started_at = time.perf_counter()
+        self.stages: List[str] = []
+        self.timings_ms: Dict[str, float] = {}
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started_at) * 1000.0
+
+    def remaining_ms(self) -> Optional[float]:
+        """Budget restant (None si la requête n'a pas de deadline)"""
+        if self.deadline_ms is None:
+            return None
+        return self.deadline_ms - self.elapsed_ms()
+
+    @contextmanager
+    def stage(self, name: str):
+        """Chronomètre une étape et l'ajoute à la liste des étapes exécutées"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, (time.perf_counter() - start) * 1000.0)
+
+    def record(self, name: str, elapsed_ms: float = 0.0):
+        self.stages.append(name)
+        self.timings_ms[name] = self.timings_ms.get(name, 0.0) + elapsed_ms
+
+
+class RerankLatencyModel:
+    """
+    Estimation en ligne du coût du Cross-Encoder (moyenne mobile exponentielle
+    du temps par paire), pour décider combien de paires tiennent dans un budget.
+    """
+
+    def __init__(
+        self, ms_per_pair: float = 5.0, overhead_ms: float = 5.0, alpha: float = 0.2
+    ):
+        """
+        Args:
+            ms_per_pair: Estimation initiale (avant toute mesure) du coût d'une paire
+            overhead_ms: Coût fixe d'un appel à `predict` (tokenisation, lancement)
+            alpha: Poids des nouvelles mesures dans la moyenne mobile
+        """
+        self.ms_per_pair = ms_per_pair
+        self.overhead_ms = overhead_ms
+        self.alpha = alpha
+        self._lock = threading.Lock()
+        self.observations = 0
+
+    def observe(self, num_pairs: int, elapsed_ms: float):
+        if num_pairs <= 0:
+            return
+        per_pair = max(0.0, elapsed_ms - self.overhead_ms) / num_pairs
+        with self._lock:
+            self.ms_per_pair = (
+                1 - self.alpha
+            ) * self.ms_per_pair + self.alpha * per_pair
+            self.observations += 1
+
+    def estimate_ms(self, num_pairs: int) -> float:
+        return self.overhead_ms + num_pairs * self.ms_per_pair
+
+    def affordable_pairs(self, budget_ms: float) -> int:
+        """Nombre de paires que l'on peut scorer dans `budget_ms`"""
+        if budget_ms <= self.overhead_ms or self.ms_per_pair <= 0:
+            return 0
+        return int((budget_ms - self.overhead_ms) / self.ms_per_pair)
+
+    def stats(self) -> dict:
+        return {
+            "ms_per_pair": self.ms_per_pair,
+            "overhead_ms": self.overhead_ms,
+            "observations": self.observations,
+        }
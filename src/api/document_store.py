@@ -0,0 +1,227 @@
+"""
+Stockage des documents sur disque (SQLite) au lieu d'un dictionnaire en mémoire
+"""
+
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+# Champs "chauds" renvoyés par /search (chargés en bloc pour chaque page de résultats)
+HOT_FIELDS = ("id", "source", "url", "title", "abstract", "published_date", "authors")
+
+# Limite prudente du nombre de paramètres d'une requête SQLite
+_MAX_SQL_VARIABLES = 500
+
+_SCHEMA = """
+CREATE TABLE documents (
+    id TEXT PRIMARY KEY,
+    source TEXT,
+    url TEXT,
+    title TEXT,
+    abstract TEXT,
+    published_date TEXT,
+    authors TEXT,
+    full_text TEXT
+)
+"""
+
+
+def build_document_store(corpus_file: str, db_file: str) -> int:
+    """
+    Construit la base SQLite à partir du corpus JSONL (lecture en flux, sans
+    charger le corpus en mémoire). Le fichier est écrit à côté (nom unique par
+    construction) puis renommé, pour qu'une API en cours de lecture ne voie
+    jamais une base incomplète.
+
+    Returns:
+        Nombre de documents écrits
+    """
+    fd, tmp_file = tempfile.mkstemp(
+        prefix=os.path.basename(db_file) + ".",
+        suffix=".tmp",
+        dir=os.path.dirname(os.path.abspath(db_file)),
+    )
+    os.close(fd)
+
+    conn = sqlite3.connect(tmp_file)
+    count = 0
+    try:
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.execute(_SCHEMA)
+
+        with open(corpus_file, "r", encoding="utf-8") as f:
+            rows = []
+            for line in f:
+                doc = json.loads(line)
+                rows.append(
+                    (
+                        doc["id"],
+                        doc.get("source"),
+                        doc.get("url"),
+                        doc.get("title"),
+                        doc.get("abstract"),
+                        doc.get("published_date"),
+                        json.dumps(doc.get("authors", []), ensure_ascii=False),
+                        doc.get("full_text"),
+                    )
+                )
+                if len(rows) >= 1000:
+                    count += _insert_rows(conn, rows)
+                    rows = []
+            count += _insert_rows(conn, rows)
+
+        conn.commit()
+    except BaseException:
+        conn.close()
+        os.remove(tmp_file)
+        raise
+    conn.close()
+
+    os.replace(tmp_file, db_file)
+    return count
+
+
+def _is_stale(corpus_file: str, db_file: str) -> bool:
+    """Base absente, ou plus ancienne que le corpus"""
+    if not os.path.exists(db_file):
+        return True
+    return os.path.exists(corpus_file) and (
+        os.path.getmtime(corpus_file) > os.path.getmtime(db_file)
+    )
+
+
+def ensure_document_store(
+    corpus_file: str, db_file: str, timeout_s: float = 600.0
+) -> bool:
+    """
+    (Re)construit la base si elle est absente ou plus ancienne que le corpus.
+    Un fichier verrou (création exclusive) évite que plusieurs processus de
+    l'API (workers uvicorn) la construisent en même temps : les autres
+    attendent la fin de la construction. Un verrou plus vieux que `timeout_s`
+    (processus interrompu) est ignoré.
+
+    Returns:
+        True si la base a été construite par ce processus
+    """
+    lock_file = db_file + ".lock"
+    while _is_stale(corpus_file, db_file):
+        try:
+            fd = os.open(lock_file, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(lock_file) > timeout_s:
+                    os.remove(lock_file)
+            except FileNotFoundError:
+                pass
+            time.sleep(0.5)
+            continue
+        os.close(fd)
+        try:
+            # Un autre processus a pu finir la construction entre-temps
+            if _is_stale(corpus_file, db_file):
+                build_document_store(corpus_file, db_file)
+                return True
+        finally:
+            os.remove(lock_file)
+    return False
+
+
+def _insert_rows(conn: sqlite3.Connection, rows: List[tuple]) -> int:
+    # En cas de doublon d'ID, la dernière version du document l'emporte
+    # (comme dans l'ancien dictionnaire documents_by_id)
+    conn.executemany(
+        "INSERT OR REPLACE INTO documents VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows
+    )
+    return len(rows)
+
+
+class DocumentStore:
+    """
+    Accès en lecture seule aux documents stockés dans SQLite.
+
+    Les champs légers sont lus en bloc par ID pour chaque page de résultats ;
+    `full_text` n'est lu qu'à la demande. La mémoire de l'API ne dépend donc
+    plus de la taille du texte intégral du corpus.
+    """
+
+    def __init__(self, db_file: str, mmap_size: int = 256 * 1024 * 1024):
+        self.db_file = db_file
+        self.mmap_size = mmap_size
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        self._count: Optional[int] = None
+
+    def _conn(self) -> sqlite3.Connection:
+        # Une connexion par thread (les endpoints tournent dans un threadpool)
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(
+                f"file:{self.db_file}?mode=ro", uri=True, check_same_thread=False
+            )
+            conn.row_factory = sqlite3.Row
+            conn.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    @staticmethod
+    def _row_to_doc(row: sqlite3.Row) -> dict:
+        doc = dict(row)
+        if "authors" in doc:
+            doc["authors"] = json.loads(doc["authors"]) if doc["authors"] else []
+        return doc
+
+    def get_many(self, doc_ids: Iterable[str]) -> Dict[str, dict]:
+        """Champs légers (HOT_FIELDS) d'un ensemble de documents, indexés par ID"""
+        doc_ids = list(dict.fromkeys(doc_ids))
+        documents = {}
+        columns = ", ".join(HOT_FIELDS)
+        for start in range(0, len(doc_ids), _MAX_SQL_VARIABLES):
+            chunk = doc_ids[start : start + _MAX_SQL_VARIABLES]
+            placeholders = ", ".join("?" for _ in chunk)
+            rows = self._conn().execute(
+                f"SELECT {columns} FROM documents WHERE id IN ({placeholders})", chunk
+            )
+            for row in rows:
+                documents[row["id"]] = self._row_to_doc(row)
+        return documents
+
+    def get(self, doc_id: str, include_full_text: bool = False) -> Optional[dict]:
+        """Un document (avec `full_text` si demandé)"""
+        columns = ", ".join(HOT_FIELDS + (("full_text",) if include_full_text else ()))
+        row = (
+            self._conn()
+            .execute(f"SELECT {columns} FROM documents WHERE id = ?", (doc_id,))
+            .fetchone()
+        )
+        return self._row_to_doc(row) if row else None
+
+    def get_full_text(self, doc_id: str) -> Optional[str]:
+        """Texte intégral d'un document, lu uniquement à la demande"""
+        row = (
+            self._conn()
+            .execute("SELECT full_text FROM documents WHERE id = ?", (doc_id,))
+            .fetchone()
+        )
+        return row["full_text"] if row else None
+
+    def __len__(self) -> int:
+        if self._count is None:
+            self._count = self._conn().execute(
+                "SELECT COUNT(*) FROM documents"
+            ).fetchone()[0]
+        return self._count
+
+    def close(self):
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections = []
+        self._local = threading.local()
@@ -0,0 +1,170 @@
+"""
+Backends d'inférence CPU des encodeurs (SentenceTransformer et Cross-Encoder) :
+PyTorch eager, quantification dynamique int8, int8 + graphe tracé (TorchScript)
+"""
+
+import time
+from typing import List, Optional
+
+import torch
+from sentence_transformers import CrossEncoder, SentenceTransformer
+from transformers.modeling_outputs import (
+    BaseModelOutput,
+    SequenceClassifierOutput,
+)
+
+from .quantization import quantize_linear_int8
+
+# torch        : float32 eager (comportement historique)
+# int8         : couches Linear quantifiées en int8 (poids), activations dynamiques
+# int8_traced  : int8 + forward tracé avec torch.jit.trace (moins d'overhead Python)
+ENCODER_BACKENDS = ("torch", "int8", "int8_traced")
+
+# Textes utilisés pour le préchauffage et la validation du graphe tracé
+WARMUP_QUERIES = [
+    "transformer models for long document summarization",
+    "graph neural networks",
+    "efficient approximate nearest neighbor search on billion-scale vectors "
+    "with product quantization",
+]
+
+
+class _TupleOutput(torch.nn.Module):
+    """Forward du modèle HF réduit à un tenseur (traçable par torch.jit.trace)"""
+
+    def __init__(self, model: torch.nn.Module):
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_ids, attention_mask, token_type_ids):
+        return self.model(
+            input_ids=input_ids,
+            attention_mask=attention_mask,
+            token_type_ids=token_type_ids,
+            return_dict=False,
+        )[0]
+
+
+class TracedEncoder(torch.nn.Module):
+    """
+    Remplace le modèle HF d'un encodeur par son graphe tracé, en gardant
+    l'interface attendue par sentence-transformers (sorties HF, `config`).
+    """
+
+    def __init__(self, model: torch.nn.Module, output_cls, output_field: str):
+        super().__init__()
+        self.config = model.config
+        self.output_cls = output_cls
+        self.output_field = output_field
+
+        example = _example_inputs(batch_size=2, seq_len=16)
+        with torch.no_grad():
+            self.traced = torch.jit.trace(_TupleOutput(model), example, strict=False)
+
+    def forward(self, input_ids, attention_mask=None, token_type_ids=None, **kwargs):
+        if attention_mask is None:
+            attention_mask = torch.ones_like(input_ids)
+        if token_type_ids is None:
+            token_type_ids = torch.zeros_like(input_ids)
+        output = self.traced(input_ids, attention_mask, token_type_ids)
+        return self.output_cls(**{self.output_field: output})
+
+
+def _example_inputs(batch_size: int, seq_len: int):
+    input_ids = torch.randint(1000, 2000, (batch_size, seq_len), dtype=torch.long)
+    attention_mask = torch.ones_like(input_ids)
+    # Séquences de longueurs différentes : le masque de padding fait partie du graphe
+    attention_mask[-1, seq_len // 2 :] = 0
+    token_type_ids = torch.zeros_like(input_ids)
+    return input_ids, attention_mask, token_type_ids
+
+
+def _optimize(
+    model: torch.nn.Module, backend: str, output_cls, output_field: str
+) -> torch.nn.Module:
+    """Applique le backend au modèle HF interne d'un encodeur"""
+    if backend not in ENCODER_BACKENDS:
+        raise ValueError(
+            f"Backend inconnu: {backend} (disponibles: {', '.join(ENCODER_BACKENDS)})"
+        )
+    if backend == "torch":
+        return model
+
+    optimized = quantize_linear_int8(model)
+    if backend == "int8_traced":
+        try:
+            traced = TracedEncoder(optimized, output_cls, output_field)
+            _check_traced(optimized, traced, output_field)
+            optimized = traced
+        except Exception as e:
+            # Un graphe tracé qui ne généralise pas aux autres formes est écarté
+            print(f"⚠️  Traçage impossible, backend int8 eager utilisé: {e}")
+    optimized.eval()
+    return optimized
+
+
+def _check_traced(model, traced, output_field: str, atol: float = 1e-4):
+    """Le graphe tracé doit reproduire le modèle sur une autre forme d'entrée"""
+    input_ids, attention_mask, token_type_ids = _example_inputs(3, 37)
+    with torch.no_grad():
+        expected = model(
+            input_ids=input_ids,
+            attention_mask=attention_mask,
+            token_type_ids=token_type_ids,
+            return_dict=False,
+        )[0]
+        actual = getattr(
+            traced(input_ids, attention_mask, token_type_ids), output_field
+        )
+    if actual.shape != expected.shape or not torch.allclose(
+        actual, expected, atol=atol
+    ):
+        raise RuntimeError("le graphe tracé ne généralise pas aux formes dynamiques")
+
+
+def load_embedding_model(model_name: str, backend: str = "torch") -> SentenceTransformer:
+    """SentenceTransformer avec le backend d'inférence demandé (CPU pour int8)"""
+    if backend == "torch":
+        return SentenceTransformer(model_name)
+
+    model = SentenceTransformer(model_name, device="cpu")
+    transformer = model[0]
+    transformer.auto_model = _optimize(
+        transformer.auto_model, backend, BaseModelOutput, "last_hidden_state"
+    )
+    return model
+
+
+def load_reranker(model_name: str, backend: str = "torch") -> CrossEncoder:
+    """CrossEncoder avec le backend d'inférence demandé (CPU pour int8)"""
+    if backend == "torch":
+        return CrossEncoder(model_name)
+
+    reranker = CrossEncoder(model_name, device="cpu")
+    reranker.model = _optimize(
+        reranker.model, backend, SequenceClassifierOutput, "logits"
+    )
+    return reranker
+
+
+def warm_up_encoders(
+    model: SentenceTransformer,
+    reranker: Optional[CrossEncoder] = None,
+    queries: Optional[List[str]] = None,
+    rounds: int = 2,
+) -> dict:
+    """
+    Premières inférences hors trafic (allocations, profilage du graphe tracé).
+    Retourne la durée (ms) du dernier tour pour chaque encodeur.
+    """
+    queries = queries or WARMUP_QUERIES
+    timings = {}
+    for _ in range(rounds):
+        start = time.perf_counter()
+        model.encode(queries)
+        timings["embedding_ms"] = (time.perf_counter() - start) * 1000.0
+        if reranker is not None:
+            start = time.perf_counter()
+            reranker.predict([[q, q] for q in queries])
+            timings["reranker_ms"] = (time.perf_counter() - start) * 1000.0
+    return timings
@@ -0,0 +1,436 @@
+"""
+Ordonnanceur de génération : regroupe les résumés de toutes les requêtes
+en batches partagés, exécutés par un seul thread propriétaire du modèle
+"""
+
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import List, Optional, Tuple
+
+from .batching import percentile
+from .cancellation import CancellationToken, GenerationCancelled, cancellation_criteria
+
+
+class _GenerationJob:
+    """Texte à résumer en attente dans la file de l'ordonnanceur"""
+
+    __slots__ = (
+        "text",
+        "params",
+        "token_ids",
+        "future",
+        "enqueued_at",
+        "streamer",
+        "cancel_token",
+    )
+
+    def __init__(
+        self,
+        text: str,
+        params: Tuple,
+        streamer=None,
+        cancel_token: Optional[CancellationToken] = None,
+    ):
+        self.text = text
+        # (max_length, min_length, num_beams, length_penalty)
+        self.params = params
+        # Job en streaming : généré seul, tokens poussés dans le streamer
+        self.streamer = streamer
+        # Requête abandonnée : job retiré de la file ou génération interrompue
+        self.cancel_token = cancel_token
+        self.token_ids: Optional[List[int]] = None
+        self.future: Future = Future()
+        self.enqueued_at = time.perf_counter()
+
+
+class GenerationScheduler:
+    """
+    Seul thread autorisé à appeler `generate` sur le résumeur partagé.
+
+    Les jobs de toutes les requêtes arrivent dans une file. À chaque tour, le
+    thread forme un batch avec le job le plus ancien et les jobs de mêmes
+    paramètres de génération qui tiennent dans le budget de tokens, lance un
+    `generate`, puis recommence en intégrant les jobs arrivés entre-temps.
+    """
+
+    def __init__(
+        self,
+        summarizer,
+        max_batch_tokens: Optional[int] = None,
+        max_wait_ms: float = 10.0,
+        stats_window: int = 1000,
+    ):
+        """
+        Args:
+            summarizer: LoRASummarizer dont le modèle est utilisé par le thread
+            max_batch_tokens: Budget d'un batch (séquences x beams x (entrée +
+                sortie)), par défaut celui du résumeur
+            max_wait_ms: Attente maximale (ms) pour compléter un batch quand
+                aucun job n'est déjà en attente
+            stats_window: Nombre de mesures récentes conservées pour les percentiles
+        """
+        self.summarizer = summarizer
+        self.max_batch_tokens = int(max_batch_tokens or summarizer.max_batch_tokens)
+        self.max_wait_s = max(0.0, float(max_wait_ms)) / 1000.0
+
+        self._queue: "queue.Queue[Optional[_GenerationJob]]" = queue.Queue()
+        # Jobs déjà sortis de la file mais pas encore générés
+        self._pending: List[_GenerationJob] = []
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        # Vérification de `_running` et mise en file atomiques : aucun job ne
+        # peut arriver derrière le signal d'arrêt
+        self._submit_lock = threading.Lock()
+
+        # Statistiques
+        self._lock = threading.Lock()
+        self._total_jobs = 0
+        self._total_batches = 0
+        self._busy_s = 0.0
+        self._started_at = time.perf_counter()
+        self._recent_batch_sizes = deque(maxlen=stats_window)
+        self._recent_occupancy = deque(maxlen=stats_window)
+        self._recent_waits_ms = deque(maxlen=stats_window)
+        self._recent_generate_ms = deque(maxlen=stats_window)
+        self._max_wait_ms_seen = 0.0
+        # Travail annulé : jobs retirés avant génération, batches interrompus
+        self._skipped_jobs = 0
+        self._interrupted_jobs = 0
+        self._interrupted_batches = 0
+        self._interrupted_ms = 0.0
+
+    # --- CYCLE DE VIE ---
+
+    def start(self):
+        """Démarre le thread de génération"""
+        if self._running:
+            return
+        self._running = True
+        self._started_at = time.perf_counter()
+        self._thread = threading.Thread(
+            target=self._run, name="generation-scheduler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 30.0):
+        """
+        Arrête le thread (les jobs déjà en file sont traités). Si le thread se
+        termine en laissant des jobs, leurs Futures échouent au lieu de faire
+        attendre indéfiniment les appelants.
+        """
+        with self._submit_lock:
+            if not self._running:
+                return
+            self._running = False
+            self._queue.put(None)
+        thread = self._thread
+        if thread:
+            thread.join(timeout)
+        self._thread = None
+        if thread is None or not thread.is_alive():
+            self._fail_remaining(RuntimeError("Le GenerationScheduler est arrêté"))
+
+    # --- API PUBLIQUE ---
+
+    def submit(
+        self,
+        text: str,
+        max_length: int = 150,
+        min_length: int = 50,
+        num_beams: int = 4,
+        length_penalty: float = 2.0,
+        cancel_token: Optional[CancellationToken] = None,
+    ) -> Future:
+        """
+        Ajoute un texte à résumer ; le Future renvoie le résumé, ou lève
+        GenerationCancelled si `cancel_token` est annulé avant la fin
+        """
+        job = _GenerationJob(
+            text,
+            (max_length, min_length, num_beams, float(length_penalty)),
+            cancel_token=cancel_token,
+        )
+        self._enqueue(job)
+        return job.future
+
+    def submit_stream(
+        self,
+        text: str,
+        max_length: int = 150,
+        min_length: int = 50,
+        length_penalty: float = 2.0,
+        cancel_token: Optional[CancellationToken] = None,
+    ):
+        """
+        Génération token par token (recherche gloutonne : les streamers de
+        `generate` ne gèrent pas le beam search).
+
+        Returns:
+            (itérateur des morceaux de texte, Future du résumé complet)
+        """
+        streamer = self.summarizer.build_streamer()
+        job = _GenerationJob(
+            text,
+            (max_length, min_length, 1, float(length_penalty)),
+            streamer,
+            cancel_token,
+        )
+        self._enqueue(job)
+        return streamer, job.future
+
+    def summarize_batch(
+        self,
+        texts: List[str],
+        max_length: int = 150,
+        min_length: int = 50,
+        num_beams: int = 4,
+        length_penalty: float = 2.0,
+        timeout: Optional[float] = None,
+        cancel_token: Optional[CancellationToken] = None,
+    ) -> List[str]:
+        """
+        Même signature que `LoRASummarizer.summarize_batch` : utilisable comme
+        `batch_fn` de `summarize_multiple`. Bloque jusqu'à ce que tous les
+        résumés soient prêts.
+        """
+        futures = [
+            self.submit(
+                text, max_length, min_length, num_beams, length_penalty, cancel_token
+            )
+            for text in texts
+        ]
+        return [f.result(timeout) for f in futures]
+
+    def queue_depth(self) -> int:
+        """Jobs en attente de génération (file + jobs déjà tokenisés)"""
+        return self._queue.qsize() + len(self._pending)
+
+    def stats(self) -> dict:
+        """Profondeur de file, occupation des batches et attente par job"""
+        with self._lock:
+            sizes = list(self._recent_batch_sizes)
+            occupancy = list(self._recent_occupancy)
+            waits = sorted(self._recent_waits_ms)
+            generate_ms = sorted(self._recent_generate_ms)
+            uptime = time.perf_counter() - self._started_at
+            return {
+                "max_batch_tokens": self.max_batch_tokens,
+                "max_wait_ms": self.max_wait_s * 1000.0,
+                "queue_depth": self.queue_depth(),
+                "total_jobs": self._total_jobs,
+                "total_batches": self._total_batches,
+                "avg_batch_size": (sum(sizes) / len(sizes)) if sizes else 0.0,
+                "avg_batch_occupancy": (
+                    (sum(occupancy) / len(occupancy)) if occupancy else 0.0
+                ),
+                "utilization": (self._busy_s / uptime) if uptime > 0 else 0.0,
+                "job_wait_ms": {
+                    "avg": (sum(waits) / len(waits)) if waits else 0.0,
+                    "p50": percentile(waits, 0.50),
+                    "p95": percentile(waits, 0.95),
+                    "max": self._max_wait_ms_seen,
+                },
+                "generate_ms": {
+                    "p50": percentile(generate_ms, 0.50),
+                    "p95": percentile(generate_ms, 0.95),
+                },
+                "cancelled": {
+                    "skipped_jobs": self._skipped_jobs,
+                    "interrupted_jobs": self._interrupted_jobs,
+                    "interrupted_batches": self._interrupted_batches,
+                    "interrupted_generate_ms": self._interrupted_ms,
+                },
+            }
+
+    # --- BOUCLE INTERNE ---
+
+    def _fail_remaining(self, error: Exception):
+        """Fait échouer les jobs encore en file ou en attente (thread arrêté)"""
+        leftovers = self._pending
+        self._pending = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                leftovers.append(item)
+        for job in leftovers:
+            if job.streamer is not None:
+                job.streamer.end()
+            if not job.future.done():
+                job.future.set_exception(error)
+
+    def _enqueue(self, job: _GenerationJob):
+        with self._submit_lock:
+            if not self._running:
+                raise RuntimeError("Le GenerationScheduler n'est pas démarré")
+            self._queue.put(job)
+
+    def _drain(self, block: bool) -> bool:
+        """
+        Transfère les jobs de la file vers `_pending` (en les tokenisant).
+        Retourne False si l'arrêt a été demandé.
+        """
+        new_jobs = []
+        stop_requested = False
+
+        if block:
+            first = self._queue.get()
+            if first is None:
+                return False
+            new_jobs.append(first)
+            # Courte fenêtre pour laisser d'autres requêtes rejoindre le batch
+            deadline = first.enqueued_at + self.max_wait_s
+            while True:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop_requested = True
+                    break
+                new_jobs.append(item)
+
+        while not stop_requested:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                stop_requested = True
+                break
+            new_jobs.append(item)
+
+        if new_jobs:
+            try:
+                token_lists = self.summarizer._tokenize_prompts(
+                    [job.text for job in new_jobs]
+                )
+                for job, token_ids in zip(new_jobs, token_lists):
+                    job.token_ids = token_ids
+                    self._pending.append(job)
+            except Exception as e:
+                for job in new_jobs:
+                    if job.streamer is not None:
+                        job.streamer.end()
+                    job.future.set_exception(e)
+
+        return not stop_requested
+
+    def _batch_cost(self, size: int, longest: int, params: Tuple) -> int:
+        max_length, _, num_beams, _ = params
+        return size * num_beams * (longest + max_length)
+
+    def _next_batch(self) -> List[_GenerationJob]:
+        """
+        Le job le plus ancien + les jobs de mêmes paramètres qui tiennent dans
+        le budget (ordre d'arrivée, les plus longs peuvent attendre le tour suivant)
+        """
+        oldest = self._pending[0]
+        batch = [oldest]
+        longest = len(oldest.token_ids)
+        # Un streamer ne suit qu'une séquence : les jobs en streaming sont seuls
+        candidates = [] if oldest.streamer is not None else self._pending[1:]
+        for job in candidates:
+            if job.params != oldest.params or job.streamer is not None:
+                continue
+            candidate_longest = max(longest, len(job.token_ids))
+            cost = self._batch_cost(len(batch) + 1, candidate_longest, oldest.params)
+            if cost > self.max_batch_tokens:
+                continue
+            batch.append(job)
+            longest = candidate_longest
+
+        selected = {id(job) for job in batch}
+        self._pending = [job for job in self._pending if id(job) not in selected]
+        return batch
+
+    def _discard_cancelled(self):
+        """Retire de `_pending` les jobs des requêtes abandonnées"""
+        kept = []
+        skipped = 0
+        for job in self._pending:
+            if job.cancel_token is not None and job.cancel_token.cancelled:
+                if job.streamer is not None:
+                    job.streamer.end()
+                job.future.set_exception(GenerationCancelled(job.cancel_token.reason))
+                skipped += 1
+            else:
+                kept.append(job)
+        if skipped:
+            self._pending = kept
+            with self._lock:
+                self._skipped_jobs += skipped
+
+    def _run(self):
+        running = True
+        while running or self._pending:
+            if running:
+                running = self._drain(block=not self._pending)
+            self._discard_cancelled()
+            if not self._pending:
+                continue
+            self._process(self._next_batch())
+
+    def _process(self, batch: List[_GenerationJob]):
+        started_at = time.perf_counter()
+        waits_ms = [(started_at - job.enqueued_at) * 1000.0 for job in batch]
+        params = batch[0].params
+        longest = max(len(job.token_ids) for job in batch)
+
+        try:
+            gen_kwargs = self.summarizer._generation_kwargs(*params)
+            if batch[0].streamer is not None:
+                gen_kwargs["streamer"] = batch[0].streamer
+            tokens = [job.cancel_token for job in batch]
+            if any(token is not None for token in tokens):
+                # Le batch s'arrête quand toutes ses requêtes sont abandonnées
+                gen_kwargs["stopping_criteria"] = cancellation_criteria(tokens)
+            outputs = self.summarizer._generate_batch(
+                [job.token_ids for job in batch], **gen_kwargs
+            )
+            for job, summary in zip(batch, outputs):
+                if job.cancel_token is not None and job.cancel_token.cancelled:
+                    # Sortie possiblement tronquée : jamais renvoyée ni mise en cache
+                    job.future.set_exception(
+                        GenerationCancelled(job.cancel_token.reason)
+                    )
+                else:
+                    job.future.set_result(summary)
+        except Exception as e:
+            for job in batch:
+                if job.streamer is not None:
+                    # Débloque le consommateur du streamer
+                    job.streamer.end()
+                if not job.future.done():
+                    job.future.set_exception(e)
+
+        elapsed = time.perf_counter() - started_at
+        cancelled = sum(
+            1
+            for job in batch
+            if job.cancel_token is not None and job.cancel_token.cancelled
+        )
+        with self._lock:
+            if cancelled:
+                self._interrupted_jobs += cancelled
+                if cancelled == len(batch):
+                    self._interrupted_batches += 1
+                    self._interrupted_ms += elapsed * 1000.0
+            self._total_jobs += len(batch)
+            self._total_batches += 1
+            self._busy_s += elapsed
+            self._recent_batch_sizes.append(len(batch))
+            self._recent_occupancy.append(
+                self._batch_cost(len(batch), longest, params) / self.max_batch_tokens
+            )
+            self._recent_waits_ms.extend(waits_ms)
+            self._recent_generate_ms.append(elapsed * 1000.0)
+            self._max_wait_ms_seen = max(self._max_wait_ms_seen, max(waits_ms))
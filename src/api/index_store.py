@@ -0,0 +1,152 @@
+"""
+Chargement de l'index FAISS et de ses paramètres de recherche
+"""
+
+import json
+import os
+from typing import NamedTuple, Optional, Tuple
+
+import faiss
+import numpy as np
+
+
+def load_index_params(params_file: str) -> dict:
+    """
+    Lit les paramètres sauvegardés à côté de l'index par generate_embeddings.py.
+    Un index sans fichier de paramètres est considéré comme un IndexFlatIP.
+    """
+    if not os.path.exists(params_file):
+        return {"index_type": "flat"}
+    with open(params_file, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def apply_search_params(index, params: dict):
+    """Applique les paramètres de recherche (nprobe / efSearch) à l'index."""
+    parameter_space = faiss.ParameterSpace()
+    if "nprobe" in params:
+        parameter_space.set_index_parameter(index, "nprobe", params["nprobe"])
+    if "efSearch" in params:
+        parameter_space.set_index_parameter(index, "efSearch", params["efSearch"])
+
+
+class ExactRerankIndex:
+    """
+    Enveloppe un index compressé (float16 / SQ8 / PQ) : récupère une shortlist
+    de k x rerank_factor candidats puis les re-score avec les vecteurs float32
+    exacts, lus dans un fichier .npy mappé en mémoire (partagé entre workers).
+    Expose la même interface `search` / `ntotal` qu'un index FAISS.
+    """
+
+    def __init__(self, index, vectors: np.ndarray, rerank_factor: int = 4):
+        self.index = index
+        self.vectors = vectors
+        self.rerank_factor = max(1, int(rerank_factor))
+
+    @property
+    def ntotal(self) -> int:
+        return self.index.ntotal
+
+    def search(self, queries: np.ndarray, k: int):
+        shortlist_k = min(k * self.rerank_factor, self.index.ntotal)
+        _, shortlist = self.index.search(queries, shortlist_k)
+
+        scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        ids = np.full((len(queries), k), -1, dtype=np.int64)
+        for row, candidates in enumerate(shortlist):
+            # Ids triés : lecture plus séquentielle des pages du fichier mappé
+            candidates = np.sort(candidates[candidates >= 0])
+            exact = np.asarray(self.vectors[candidates], dtype=np.float32) @ queries[row]
+            order = np.argsort(-exact)[:k]
+            scores[row, : len(order)] = exact[order]
+            ids[row, : len(order)] = candidates[order]
+        return scores, ids
+
+
+class IdTable:
+    """
+    Table position -> ID de document adossée à un tableau .npy de chaînes à
+    largeur fixe ouvert en mmap : rien n'est copié sur le tas au chargement.
+    Offre la même interface `get` que le dictionnaire issu du mapping JSON.
+    """
+
+    def __init__(self, path: str):
+        self._ids = np.load(path, mmap_mode="r")
+
+    def get(self, position, default: Optional[str] = None) -> Optional[str]:
+        position = int(position)
+        if position < 0 or position >= len(self._ids):
+            return default
+        return self._ids[position].decode("utf-8")
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+
+class IndexSnapshot(NamedTuple):
+    """
+    Index, table d'IDs et stockage des documents chargés ensemble. Une requête
+    lit un seul instantané et s'en sert de bout en bout : un /reload pendant
+    son traitement ne mélange jamais l'ancien index et le nouveau mapping.
+    """
+
+    index: object
+    params: dict
+    index_to_id: object
+    document_store: object
+    version: str
+
+
+def load_id_mapping(mapping_file: str, ids_file: str, use_mmap: bool = False):
+    """
+    Charge le mapping position -> ID : table compacte en mmap si demandée et
+    disponible, sinon le dictionnaire JSON historique.
+    """
+    if use_mmap and os.path.exists(ids_file):
+        return IdTable(ids_file)
+    with open(mapping_file, "r", encoding="utf-8") as f:
+        return {int(k): v for k, v in json.load(f).items()}
+
+
+def _read_index(index_file: str, use_mmap: bool):
+    if not use_mmap:
+        return faiss.read_index(index_file)
+
+    # Les codes (listes inversées, IndexFlatCodes selon la version de FAISS)
+    # restent sur disque et sont paginés à la demande par l'OS
+    io_flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+    io_flags |= getattr(faiss, "IO_FLAG_MMAP_IFC", 0)
+    try:
+        return faiss.read_index(index_file, io_flags)
+    except RuntimeError as e:
+        print(f"⚠️ Lecture mmap impossible ({e}), chargement complet de l'index")
+        return faiss.read_index(index_file)
+
+
+def load_faiss_index(
+    index_file: str, params_file: str, use_mmap: bool = False
+) -> Tuple[object, dict]:
+    """
+    Charge l'index FAISS et lui applique ses paramètres de recherche.
+    Si l'index a été construit avec re-scoring exact, il est enveloppé
+    dans un `ExactRerankIndex` adossé au fichier de vecteurs mappé.
+
+    Args:
+        use_mmap: Ouvre l'index avec les flags d'E/S mmap de FAISS
+
+    Returns:
+        (index, paramètres)
+    """
+    params = load_index_params(params_file)
+    index = _read_index(index_file, use_mmap)
+    apply_search_params(index, params)
+
+    exact_rerank = params.get("exact_rerank")
+    if exact_rerank:
+        vectors_file = os.path.join(
+            os.path.dirname(params_file), exact_rerank["vectors_file"]
+        )
+        vectors = np.load(vectors_file, mmap_mode="r")
+        index = ExactRerankIndex(index, vectors, exact_rerank.get("rerank_factor", 4))
+
+    return index, params
@@ -0,0 +1,536 @@
+"""
+File de jobs de résumé asynchrones : broker SQLite local (mode WAL) et
+processus workers possédant chacun leur propre LoRASummarizer
+"""
+
+import json
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from functools import partial
+from typing import Optional
+
+from .cancellation import JOB_CANCELLED, CancellationToken, GenerationCancelled
+
+# États d'un job
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINAL_STATES = (DONE, FAILED, CANCELLED)
+
+# Battement de cœur des workers (s), y compris pendant un job ; un worker muet
+# depuis WORKER_STALE_AFTER_S est considéré comme mort
+HEARTBEAT_INTERVAL_S = 5.0
+WORKER_STALE_AFTER_S = 30.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT,
+    payload TEXT,
+    result TEXT,
+    error TEXT,
+    worker TEXT,
+    created_at REAL,
+    started_at REAL,
+    finished_at REAL,
+    expires_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_queue ON jobs (status, created_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_expiry ON jobs (expires_at);
+CREATE TABLE IF NOT EXISTS workers (
+    id TEXT PRIMARY KEY,
+    pid INTEGER,
+    started_at REAL,
+    heartbeat_at REAL,
+    busy_s REAL,
+    jobs_done INTEGER,
+    jobs_failed INTEGER,
+    jobs_cancelled INTEGER,
+    current_job TEXT,
+    error TEXT
+);
+"""
+
+
+class JobStore:
+    """
+    Jobs et workers dans une base SQLite partagée entre l'API (qui soumet et
+    lit) et les processus workers (qui réclament et terminent les jobs).
+    Les résultats terminés sont conservés `ttl_s` secondes.
+    """
+
+    def __init__(self, db_file: str, ttl_s: float = 3600.0):
+        self.db_file = db_file
+        self.ttl_s = ttl_s
+        self._lock = threading.Lock()
+        # isolation_level=None : transactions explicites (BEGIN IMMEDIATE)
+        self._conn = sqlite3.connect(
+            db_file, check_same_thread=False, timeout=30, isolation_level=None
+        )
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        # Base créée avant l'ajout de workers.error (erreur de chargement)
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(workers)")]
+        if "error" not in columns:
+            self._conn.execute("ALTER TABLE workers ADD COLUMN error TEXT")
+
+    # --- CÔTÉ API ---
+
+    def submit(self, payload: dict) -> str:
+        """Ajoute un job en file et renvoie son identifiant"""
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, payload, created_at) "
+                "VALUES (?, ?, ?, ?)",
+                (job_id, QUEUED, json.dumps(payload, ensure_ascii=False), time.time()),
+            )
+        return job_id
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, status, result, error, worker, created_at, started_at, "
+                "finished_at, expires_at FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def cancel(self, job_id: str) -> Optional[str]:
+        """
+        Annule un job en file ou en cours (le résultat d'un job en cours sera
+        ignoré par son worker). Renvoie le nouvel état, None si job inconnu.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ?, expires_at = ? "
+                "WHERE id = ? AND status IN (?, ?)",
+                (CANCELLED, now, now + self.ttl_s, job_id, QUEUED, RUNNING),
+            )
+        return self.status(job_id)
+
+    def status(self, job_id: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return row["status"] if row else None
+
+    def fail_queued(self, error: str) -> int:
+        """Marque en échec tous les jobs en file (plus aucun worker pour eux)"""
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ?, "
+                "expires_at = ? WHERE status = ?",
+                (FAILED, error, now, now + self.ttl_s, QUEUED),
+            )
+        return cursor.rowcount
+
+    def purge_expired(self) -> int:
+        """Supprime les jobs terminés dont le TTL est dépassé"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM jobs WHERE expires_at IS NOT NULL AND expires_at < ?",
+                (time.time(),),
+            )
+        return cursor.rowcount
+
+    def requeue_stale(self, stale_after_s: float = WORKER_STALE_AFTER_S) -> int:
+        """
+        Remet en file les jobs en cours de workers morts (sans battement de
+        cœur depuis `stale_after_s`, ou disparus) et supprime ces workers. Les
+        workers vivants, ceux des autres processus de l'API compris, et leurs
+        jobs ne sont pas touchés.
+        """
+        cutoff = time.time() - stale_after_s
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                cursor = self._conn.execute(
+                    "UPDATE jobs SET status = ?, worker = NULL, started_at = NULL "
+                    "WHERE status = ? AND (worker IS NULL OR worker NOT IN "
+                    "(SELECT id FROM workers WHERE heartbeat_at >= ?))",
+                    (QUEUED, RUNNING, cutoff),
+                )
+                self._conn.execute(
+                    "DELETE FROM workers WHERE heartbeat_at < ?", (cutoff,)
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return cursor.rowcount
+
+    def stats(self) -> dict:
+        """Jobs par état et utilisation de chaque worker"""
+        now = time.time()
+        with self._lock:
+            counts = dict(
+                self._conn.execute(
+                    "SELECT status, COUNT(*) FROM jobs GROUP BY status"
+                ).fetchall()
+            )
+            oldest = self._conn.execute(
+                "SELECT MIN(created_at) FROM jobs WHERE status = ?", (QUEUED,)
+            ).fetchone()[0]
+            workers = [
+                dict(row)
+                for row in self._conn.execute("SELECT * FROM workers ORDER BY id")
+            ]
+        for worker in workers:
+            uptime = now - worker["started_at"]
+            worker["utilization"] = (worker["busy_s"] / uptime) if uptime > 0 else 0.0
+            worker["heartbeat_age_s"] = now - worker["heartbeat_at"]
+        return {
+            "ttl_s": self.ttl_s,
+            "jobs": {
+                state: counts.get(state, 0)
+                for state in (QUEUED, RUNNING) + FINAL_STATES
+            },
+            "oldest_queued_s": (now - oldest) if oldest else 0.0,
+            "workers": workers,
+        }
+
+    # --- CÔTÉ WORKER ---
+
+    def register_worker(self, worker_id: str, error: Optional[str] = None):
+        """Enregistre un worker prêt, ou dont le chargement a échoué (`error`)"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO workers VALUES "
+                "(?, ?, ?, ?, 0, 0, 0, 0, NULL, ?)",
+                (worker_id, os.getpid(), now, now, error),
+            )
+
+    def heartbeat(self, worker_id: str):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE workers SET heartbeat_at = ? WHERE id = ?",
+                (time.time(), worker_id),
+            )
+
+    def claim(self, worker_id: str) -> Optional[tuple]:
+        """Réserve le job en file le plus ancien : (id, payload) ou None"""
+        now = time.time()
+        with self._lock:
+            # BEGIN IMMEDIATE : un seul worker obtient le verrou d'écriture
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT id, payload FROM jobs WHERE status = ? "
+                    "ORDER BY created_at LIMIT 1",
+                    (QUEUED,),
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE jobs SET status = ?, worker = ?, started_at = ? "
+                        "WHERE id = ?",
+                        (RUNNING, worker_id, now, row["id"]),
+                    )
+                    self._conn.execute(
+                        "UPDATE workers SET current_job = ?, heartbeat_at = ? "
+                        "WHERE id = ?",
+                        (row["id"], now, worker_id),
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        return row["id"], json.loads(row["payload"])
+
+    def finish(
+        self,
+        job_id: str,
+        worker_id: str,
+        busy_s: float,
+        result: Optional[dict] = None,
+        error: Optional[str] = None,
+        cancelled: bool = False,
+    ):
+        """
+        Enregistre le résultat (ou l'erreur) d'un job, sauf s'il a été annulé
+        entre-temps, et met à jour le temps d'occupation du worker
+        """
+        failed = bool(error) and not cancelled
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, result = ?, error = ?, "
+                    "finished_at = ?, expires_at = ? WHERE id = ? AND status = ?",
+                    (
+                        FAILED if error else DONE,
+                        json.dumps(result, ensure_ascii=False) if result else None,
+                        error,
+                        now,
+                        now + self.ttl_s,
+                        job_id,
+                        RUNNING,
+                    ),
+                )
+                self._conn.execute(
+                    "UPDATE workers SET busy_s = busy_s + ?, heartbeat_at = ?, "
+                    "current_job = NULL, jobs_done = jobs_done + ?, "
+                    "jobs_failed = jobs_failed + ?, "
+                    "jobs_cancelled = jobs_cancelled + ? WHERE id = ?",
+                    (
+                        busy_s,
+                        now,
+                        int(not error and not cancelled),
+                        int(failed),
+                        int(cancelled),
+                        worker_id,
+                    ),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def run_summary_job(
+    summarizer, payload: dict, cancel_token: Optional[CancellationToken] = None
+) -> dict:
+    """Exécute un job : même traitement que /summarize"""
+    from .long_document import summarize_documents
+
+    return summarize_documents(
+        summarizer,
+        payload["articles"],
+        profile=payload["profile"],
+        full_text=payload.get("full_text", False),
+        batch_fn=partial(summarizer.summarize_batch, cancel_token=cancel_token),
+        time_budget_s=payload.get("time_budget_s"),
+    )
+
+
+def _watch_job(
+    store: JobStore,
+    worker_id: str,
+    job_id: str,
+    token: CancellationToken,
+    finished: threading.Event,
+    interval_s: float = 0.5,
+):
+    """
+    Pendant un job : annule son jeton dès qu'un DELETE l'a marqué annulé (ou
+    expiré), et entretient le battement de cœur du worker (un job long ne doit
+    pas être remis en file par un autre processus)
+    """
+    last_heartbeat = time.time()
+    while not finished.wait(interval_s):
+        if time.time() - last_heartbeat > HEARTBEAT_INTERVAL_S:
+            store.heartbeat(worker_id)
+            last_heartbeat = time.time()
+        if store.status(job_id) in (CANCELLED, None):
+            token.cancel(JOB_CANCELLED)
+            return
+
+
+def _worker_main(
+    worker_id: str,
+    db_file: str,
+    ttl_s: float,
+    summarizer_kwargs: dict,
+    compressor_kwargs: Optional[dict],
+    summary_store_file: Optional[str],
+    summary_store_max_bytes: int,
+    threads: int,
+    poll_interval_s: float,
+    stop_event,
+):
+    """Boucle d'un processus worker : réclamer un job, le résumer, recommencer"""
+    import torch
+
+    from .encoders import load_embedding_model
+    from .summarizer import LoRASummarizer
+    from .summary_store import SummaryStore
+
+    # Évite que N processus se disputent tous les cœurs (et ceux de /search)
+    torch.set_num_threads(threads)
+    store = JobStore(db_file, ttl_s)
+    summary_store = (
+        SummaryStore(summary_store_file, summary_store_max_bytes)
+        if summary_store_file
+        else None
+    )
+    try:
+        summarizer = LoRASummarizer(**summarizer_kwargs, summary_store=summary_store)
+        # Même pré-compression que l'API : mêmes textes présentés au modèle,
+        # donc mêmes clés dans le cache partagé
+        if compressor_kwargs:
+            encoder = load_embedding_model(
+                compressor_kwargs["model_name"], compressor_kwargs["backend"]
+            )
+            summarizer.attach_compressor(
+                encoder.encode, compressor_kwargs["target_tokens"]
+            )
+    except Exception as e:
+        # Le processus s'arrête : l'erreur reste visible dans /health, et les
+        # jobs en file échouent si plus aucun worker n'est vivant (voir
+        # SummaryWorkerPool.fail_queued_if_dead)
+        print(f"❌ Worker {worker_id}: chargement du modèle impossible: {e}")
+        store.register_worker(worker_id, error=f"{type(e).__name__}: {e}")
+        store.close()
+        if summary_store is not None:
+            summary_store.close()
+        raise
+    store.register_worker(worker_id)
+    print(f"✅ Worker {worker_id} prêt (pid {os.getpid()}, {threads} threads)")
+
+    last_heartbeat = time.time()
+    while not stop_event.is_set():
+        claimed = store.claim(worker_id)
+        if claimed is None:
+            if time.time() - last_heartbeat > HEARTBEAT_INTERVAL_S:
+                store.heartbeat(worker_id)
+                store.purge_expired()
+                # Jobs d'un worker mort (processus de l'API tué, OOM...)
+                requeued = store.requeue_stale()
+                if requeued:
+                    print(f"🔁 Worker {worker_id}: {requeued} jobs remis en file")
+                last_heartbeat = time.time()
+            stop_event.wait(poll_interval_s)
+            continue
+
+        job_id, payload = claimed
+        start = time.perf_counter()
+        # La génération s'interrompt si le job est annulé pendant son exécution
+        token = CancellationToken()
+        finished = threading.Event()
+        threading.Thread(
+            target=_watch_job,
+            args=(store, worker_id, job_id, token, finished),
+            daemon=True,
+        ).start()
+        result, error, cancelled = None, None, False
+        try:
+            result = run_summary_job(summarizer, payload, cancel_token=token)
+        except GenerationCancelled as e:
+            error, cancelled = str(e), True
+        except Exception as e:
+            error = str(e)
+        finally:
+            finished.set()
+        store.finish(
+            job_id,
+            worker_id,
+            time.perf_counter() - start,
+            result=result,
+            error=error,
+            cancelled=cancelled,
+        )
+        last_heartbeat = time.time()
+
+    store.close()
+    if summary_store is not None:
+        summary_store.close()
+
+
+class SummaryWorkerPool:
+    """
+    Processus workers de résumé (contexte spawn : chaque processus charge son
+    propre modèle, hors du GIL et du threadpool de l'API)
+    """
+
+    def __init__(
+        self,
+        db_file: str,
+        num_workers: int,
+        summarizer_kwargs: dict,
+        compressor_kwargs: Optional[dict] = None,
+        ttl_s: float = 3600.0,
+        summary_store_file: Optional[str] = None,
+        summary_store_max_bytes: int = 256 * 1024 * 1024,
+        threads_per_worker: Optional[int] = None,
+        poll_interval_s: float = 0.1,
+    ):
+        self.db_file = db_file
+        self.num_workers = num_workers
+        self.summarizer_kwargs = summarizer_kwargs
+        # model_name, backend, target_tokens (None : pas de pré-compression)
+        self.compressor_kwargs = compressor_kwargs
+        self.ttl_s = ttl_s
+        self.summary_store_file = summary_store_file
+        self.summary_store_max_bytes = summary_store_max_bytes
+        self.threads_per_worker = threads_per_worker or max(
+            1, (os.cpu_count() or 2) // (2 * max(1, num_workers))
+        )
+        self.poll_interval_s = poll_interval_s
+
+        self._context = multiprocessing.get_context("spawn")
+        self._stop_event = self._context.Event()
+        self._processes = []
+
+    def start(self):
+        requeued = JobStore(self.db_file, self.ttl_s)
+        count = requeued.requeue_stale()
+        requeued.close()
+        if count:
+            print(f"🔁 {count} jobs interrompus remis en file")
+
+        # Identifiants uniques : plusieurs processus de l'API partagent la base
+        prefix = f"worker-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        for i in range(self.num_workers):
+            process = self._context.Process(
+                target=_worker_main,
+                name=f"summary-worker-{i}",
+                args=(
+                    f"{prefix}-{i}",
+                    self.db_file,
+                    self.ttl_s,
+                    self.summarizer_kwargs,
+                    self.compressor_kwargs,
+                    self.summary_store_file,
+                    self.summary_store_max_bytes,
+                    self.threads_per_worker,
+                    self.poll_interval_s,
+                    self._stop_event,
+                ),
+                daemon=True,
+            )
+            process.start()
+            self._processes.append(process)
+
+    def stop(self, timeout: float = 30.0):
+        """Arrêt après le job en cours de chaque worker"""
+        self._stop_event.set()
+        for process in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        self._processes = []
+
+    def alive(self) -> int:
+        return sum(1 for process in self._processes if process.is_alive())
+
+    def fail_queued_if_dead(self, store: JobStore) -> int:
+        """
+        Sans aucun worker vivant (chargement du modèle en échec, crash), les
+        jobs en file ne seraient jamais traités : ils sont marqués en échec
+        """
+        if not self._processes or self.alive() > 0:
+            return 0
+        return store.fail_queued("Aucun worker de résumé actif (voir /health)")
@@ -0,0 +1,313 @@
+"""
+Résumé hiérarchique (map-reduce en arbre) des textes intégraux : découpage en
+morceaux bornés en tokens, résumé des morceaux, puis réduction par groupes
+"""
+
+import math
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from .compression import split_sentences
+from .summarizer import (
+    DEFAULT_PROFILE,
+    MAX_INPUT_TOKENS,
+    article_text,
+    fallback_profile_params,
+    profile_params,
+)
+
+
+# Dernière latence mesurée par entrée (ms), par nombre de beams : sert à
+# estimer le coût d'un document avant même son premier niveau
+_per_input_ms: Dict[int, float] = {}
+_per_input_lock = threading.Lock()
+
+
+def _record_per_input_ms(num_beams: int, per_input_ms: float):
+    with _per_input_lock:
+        _per_input_ms[num_beams] = per_input_ms
+
+
+def _last_per_input_ms(num_beams: int) -> Optional[float]:
+    with _per_input_lock:
+        return _per_input_ms.get(num_beams)
+
+
+def plan_levels(num_items: int, fan_in: int) -> List[int]:
+    """Nombre de résumés produits à chaque niveau de réduction (jusqu'à 1)"""
+    levels = []
+    while num_items > 1:
+        num_items = math.ceil(num_items / fan_in)
+        levels.append(num_items)
+    return levels
+
+
+def reduce_cost(
+    num_chunks: int, fan_in: int, summary_tokens: int, prompt_tokens: int
+) -> int:
+    """
+    Tokens lus par l'encodeur pendant les réductions : chaque niveau relit tous
+    les résumés du niveau précédent, plus le prompt de chaque appel
+    """
+    cost = 0
+    inputs = num_chunks
+    for outputs in plan_levels(num_chunks, fan_in):
+        cost += inputs * summary_tokens + outputs * prompt_tokens
+        inputs = outputs
+    return cost
+
+
+def choose_fan_in(
+    num_chunks: int,
+    summary_tokens: int,
+    prompt_tokens: int,
+    max_input_tokens: int = MAX_INPUT_TOKENS,
+) -> int:
+    """
+    Fan-in minimisant les tokens encodés, parmi ceux dont les entrées tiennent
+    dans le contexte du modèle (à coût égal, le plus petit : groupes plus
+    équilibrés, plus de parallélisme)
+    """
+    max_fan_in = (max_input_tokens - prompt_tokens) // max(1, summary_tokens)
+    max_fan_in = max(2, max_fan_in)
+    if num_chunks <= 1:
+        return max_fan_in
+    candidates = range(2, max(2, min(max_fan_in, num_chunks)) + 1)
+    return min(
+        candidates,
+        key=lambda f: (reduce_cost(num_chunks, f, summary_tokens, prompt_tokens), f),
+    )
+
+
+def balanced_groups(items: list, fan_in: int) -> List[list]:
+    """Découpe en ceil(n / fan_in) groupes de tailles égales à une unité près"""
+    num_groups = math.ceil(len(items) / fan_in)
+    size, extra = divmod(len(items), num_groups)
+    groups = []
+    start = 0
+    for g in range(num_groups):
+        end = start + size + (1 if g < extra else 0)
+        groups.append(items[start:end])
+        start = end
+    return groups
+
+
+class HierarchicalSummarizer:
+    """
+    Résumé de documents longs par niveaux. Tous les documents avancent d'un
+    niveau à la fois : les morceaux d'un même niveau, tous documents confondus,
+    partent ensemble vers `batch_fn` (l'ordonnanceur de génération les répartit
+    en batches), et chaque niveau est chronométré.
+    """
+
+    def __init__(
+        self,
+        summarizer,
+        batch_fn: Optional[Callable[..., List[str]]] = None,
+        profile: str = DEFAULT_PROFILE,
+        time_budget_s: Optional[float] = None,
+        generation_profile: Optional[str] = None,
+    ):
+        """
+        Args:
+            summarizer: LoRASummarizer (tokenizer, cache persistant)
+            batch_fn: Génération groupée (défaut: summarizer.summarize_batch)
+            profile: Profil de génération des résumés intermédiaires
+            time_budget_s: Budget de temps : si le document entier (estimé
+                avant le niveau 0) ou le niveau suivant risque de le dépasser,
+                les niveaux restants passent en recherche gloutonne
+            generation_profile: Profil des résumés absents du cache (profil
+                abaissé sous charge, le cache est d'abord consulté avec `profile`)
+        """
+        self.summarizer = summarizer
+        self.batch_fn = batch_fn or summarizer.summarize_batch
+        self.params = profile_params(profile, "individual")
+        self.generation_params = (
+            fallback_profile_params(profile, generation_profile, "individual")
+            or self.params
+        )
+        self.summary_length = self.generation_params["max_length"]
+        self.time_budget_s = time_budget_s
+
+        # Coût fixe d'un appel : instruction + "Title: ...\nContent: "
+        self.prompt_tokens = summarizer.count_tokens(
+            summarizer.build_prompt(article_text({"title": "", "abstract": ""}))
+        )
+        # Marge pour le titre ajouté à chaque morceau
+        self.chunk_tokens = MAX_INPUT_TOKENS - self.prompt_tokens - 64
+
+    def chunk(self, text: str) -> List[str]:
+        """Morceaux de phrases entières d'au plus `chunk_tokens` tokens"""
+        chunks = []
+        current = []
+        current_tokens = 0
+        for sentence in split_sentences(text):
+            tokens = self.summarizer.count_tokens(sentence)
+            if current and current_tokens + tokens > self.chunk_tokens:
+                chunks.append(" ".join(current))
+                current = []
+                current_tokens = 0
+            # Une phrase plus longue que le morceau est tronquée à la tokenisation
+            current.append(sentence)
+            current_tokens += tokens
+        if current:
+            chunks.append(" ".join(current))
+        return chunks
+
+    def summarize_many(self, documents: List[dict]) -> List[dict]:
+        """
+        Args:
+            documents: dicts avec `title`, `full_text` (et `id` optionnel)
+
+        Returns:
+            Pour chaque document : résumé final, nombre de morceaux, fan-in,
+            et temps / volume de chaque niveau (communs à tous les documents)
+        """
+        started_at = time.perf_counter()
+        reports = []
+        current = []
+        for doc in documents:
+            chunks = self.chunk(doc.get("full_text") or "")
+            chunks = chunks or [doc.get("abstract") or ""]
+            fan_in = choose_fan_in(
+                len(chunks), self.summary_length, self.prompt_tokens
+            )
+            reports.append(
+                {"id": doc.get("id"), "chunks": len(chunks), "fan_in": fan_in}
+            )
+            current.append(chunks)
+
+        levels = []
+        num_beams = None  # paramètres du profil tant que le budget le permet
+        can_degrade = self.generation_params["num_beams"] > 1
+
+        # Budget de temps, avant le niveau 0 : toutes les entrées de l'arbre à la
+        # dernière latence mesurée (le niveau 0 est souvent le plus coûteux)
+        per_input_ms = _last_per_input_ms(self.generation_params["num_beams"])
+        if self.time_budget_s is not None and can_degrade and per_input_ms:
+            total_inputs = sum(
+                report["chunks"] + sum(plan_levels(report["chunks"], report["fan_in"]))
+                for report in reports
+            )
+            if total_inputs * per_input_ms / 1000.0 > self.time_budget_s:
+                num_beams = 1
+
+        level = 0
+        # Niveau 0 : tous les morceaux ; puis réductions tant qu'un document
+        # a plus d'un résumé
+        while level == 0 or any(len(items) > 1 for items in current):
+            if level == 0:
+                groups_by_doc = [[[c] for c in chunks] for chunks in current]
+            else:
+                groups_by_doc = [
+                    balanced_groups(items, report["fan_in"])
+                    if len(items) > 1
+                    else [items]
+                    for items, report in zip(current, reports)
+                ]
+
+            texts = []
+            owners = []
+            for d, (doc, groups) in enumerate(zip(documents, groups_by_doc)):
+                if level > 0 and len(current[d]) == 1:
+                    continue
+                for group in groups:
+                    part = {"title": doc.get("title", ""), "abstract": " ".join(group)}
+                    texts.append(article_text(part))
+                    owners.append(d)
+
+            params = dict(self.generation_params)
+            if num_beams is not None:
+                params["num_beams"] = num_beams
+
+            level_start = time.perf_counter()
+            input_tokens = sum(self.summarizer.count_tokens(t) for t in texts)
+            # Cache consulté avec le profil demandé, manquants générés avec params
+            outputs = self.summarizer._generate_cached(
+                self.batch_fn,
+                texts,
+                fallback_params=params if params != self.params else None,
+                **self.params,
+            )
+            level_ms = (time.perf_counter() - level_start) * 1000.0
+            per_input_ms = level_ms / max(1, len(texts))
+            _record_per_input_ms(params["num_beams"], per_input_ms)
+
+            next_items = [
+                items if level > 0 and len(items) == 1 else [] for items in current
+            ]
+            for d, summary in zip(owners, outputs):
+                next_items[d].append(summary)
+            current = next_items
+
+            levels.append(
+                {
+                    "level": level,
+                    "inputs": len(texts),
+                    "input_tokens": input_tokens,
+                    "num_beams": params["num_beams"],
+                    "ms": level_ms,
+                }
+            )
+            level += 1
+
+            # Budget de temps : estimation du niveau suivant au débit de celui-ci
+            if self.time_budget_s is not None and can_degrade and num_beams is None:
+                remaining_inputs = sum(
+                    math.ceil(len(items) / report["fan_in"])
+                    for items, report in zip(current, reports)
+                    if len(items) > 1
+                )
+                elapsed_s = time.perf_counter() - started_at
+                estimate_s = remaining_inputs * per_input_ms / 1000.0
+                if elapsed_s + estimate_s > self.time_budget_s:
+                    num_beams = 1
+
+        total_ms = (time.perf_counter() - started_at) * 1000.0
+        for report, items in zip(reports, current):
+            report["summary"] = items[0]
+            report["levels"] = levels
+            report["total_ms"] = total_ms
+            report["degraded"] = num_beams is not None
+        return reports
+
+
+def summarize_documents(
+    summarizer,
+    articles: List[dict],
+    profile: str = DEFAULT_PROFILE,
+    full_text: bool = False,
+    batch_fn: Optional[Callable[..., List[str]]] = None,
+    time_budget_s: Optional[float] = None,
+    generation_profile: Optional[str] = None,
+) -> dict:
+    """
+    Résumés individuels + global de `summarize_multiple`. Avec `full_text`, les
+    résumés individuels sont ceux du texte intégral (`full_text` de chaque
+    article), et le détail des niveaux est renvoyé dans `long_document`.
+    `generation_profile` : profil des résumés absents du cache (voir
+    `summarize_multiple`).
+    """
+    summaries = None
+    reports = None
+    if full_text:
+        hierarchical = HierarchicalSummarizer(
+            summarizer,
+            batch_fn=batch_fn,
+            profile=profile,
+            time_budget_s=time_budget_s,
+            generation_profile=generation_profile,
+        )
+        reports = hierarchical.summarize_many(articles)
+        summaries = [report.pop("summary") for report in reports]
+
+    result = summarizer.summarize_multiple(
+        articles,
+        batch_fn=batch_fn,
+        summaries=summaries,
+        profile=profile,
+        generation_profile=generation_profile,
+    )
+    result["long_document"] = reports
+    return result
@@ -1,28 +1,73 @@
 # src/api/main.py
 
+import asyncio
 import json
 import faiss
-from sentence_transformers import SentenceTransformer, CrossEncoder
 import numpy as np
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from typing import List, Optional
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.concurrency import iterate_in_threadpool, run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
+import time
 import os
+import secrets
+import hashlib
+from collections import deque
+from functools import partial
 
 # Import du summarizer depuis le même dossier (import relatif)
-from .summarizer import LoRASummarizer
+from .summarizer import (
+    GENERATION_PROFILES,
+    PROFILE_ORDER,
+    LoRASummarizer,
+    downgrade_profile,
+)
+from .batching import QueryBatcher, percentile
+from .cache import SemanticCache, TTLCache, normalize_query
+from .index_store import IndexSnapshot, load_faiss_index, load_id_mapping
+from .document_store import DocumentStore, ensure_document_store
+from .reranking import CascadeSettings, CascadeStats, candidate_text, select_survivors
+from .deadline import RerankLatencyModel, StageTracker
+from .generation_scheduler import GenerationScheduler
+from .long_document import summarize_documents
+from .summary_store import SummaryStore
+from .job_queue import FINAL_STATES, JobStore, SummaryWorkerPool
+from .cancellation import (
+    DISCONNECT,
+    SUPERSEDED,
+    CancellationToken,
+    GenerationCancelled,
+    SessionRegistry,
+)
+from .encoders import load_embedding_model, load_reranker, warm_up_encoders
 
 # --- MODÈLES DE DONNÉES (pour la validation et la documentation) ---
 
 
 class SearchQuery(BaseModel):
     query: str
-    top_k: int = 5
+    # Bornes : le coût FAISS et Cross-Encoder croît avec top_k et la profondeur
+    top_k: int = Field(5, ge=1, le=100)
+    # Surcharges de la cascade de re-ranking (None = configuration du serveur)
+    cascade: Optional[bool] = None  # False = re-ranker tous les candidats (top_k x 3)
+    # Nombre fixe de candidats pour le Cross-Encoder
+    rerank_depth: Optional[int] = Field(None, ge=1, le=300)
+    # Marge de score des étages adaptatifs (écart de cosinus, au plus 2)
+    cascade_margin: Optional[float] = Field(None, ge=0.0, le=2.0)
+    cheap_scorer: Optional[bool] = None  # Étage lexical intermédiaire
+    # Budget de latence (ms) : au-delà, le re-ranking est réduit ou sauté
+    deadline_ms: Optional[float] = Field(None, gt=0)
 
 
 class SearchResult(BaseModel):
     id: str
+    # Score du Cross-Encoder, ou score FAISS (cosinus) si `reranked` est faux :
+    # en mode rerank_prefix, les résultats non re-rankés suivent dans l'ordre de
+    # la cascade (scores non comparables à ceux du Cross-Encoder)
     score: float
+    reranked: bool = True
+    retrieval_score: Optional[float] = None
     title: Optional[str] = None
     source: Optional[str] = None
     url: Optional[str] = None
@@ -31,13 +76,37 @@ class SearchResult(BaseModel):
 
 class SearchResponse(BaseModel):
     results: List[SearchResult]
+    # Étapes exécutées (ex: retrieval, candidates, rerank / rerank_prefix / faiss_only)
+    stages: List[str] = []
+    # True si le re-ranking a été réduit ou sauté pour respecter deadline_ms
+    degraded: bool = False
+    timings_ms: Dict[str, float] = {}
+
+
+class BatchSearchRequest(BaseModel):
+    # Chaque requête garde son propre top_k (pas de deadline) ; lot borné
+    queries: List[SearchQuery] = Field(..., max_length=256)
+
+
+class BatchSearchResponse(BaseModel):
+    responses: List[SearchResponse]  # Dans le même ordre que les requêtes
 
 
 class SummarizeRequest(BaseModel):
-    articles: List[dict]  # Liste d'articles à résumer
+    articles: List[dict] = []  # Liste d'articles à résumer
+    # Forme compacte : IDs de documents, le texte est lu dans le DocumentStore
+    ids: List[str] = []
+    # Résumé hiérarchique du texte intégral (lu dans le DocumentStore) au lieu
+    # de l'abstract ; non disponible en streaming
+    full_text: bool = False
+    # Profil de génération : fast, balanced ou quality (None = profil par défaut)
+    profile: Optional[str] = None
+    # Autorise le serveur à choisir un profil plus rapide si la file est chargée
+    allow_downgrade: bool = True
 
 
 class IndividualSummary(BaseModel):
+    id: Optional[str] = None
     title: Optional[str]
     summary: str
     source: Optional[str]
@@ -49,20 +118,153 @@ class SummarizeResponse(BaseModel):
     individual_summaries: List[IndividualSummary]
     global_summary: str
     total_articles: int
+    # Mode full_text : morceaux, fan-in et temps de chaque niveau, par article
+    long_document: Optional[List[dict]] = None
+    # Profil effectivement utilisé, et s'il a été abaissé (file chargée)
+    profile: str
+    profile_downgraded: bool = False
+
+
+class SummaryJobResponse(BaseModel):
+    job_id: str
+    # queued, running, done, failed ou cancelled
+    status: str
+    worker: Optional[str] = None
+    created_at: Optional[float] = None
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    # Date de suppression du résultat (TTL)
+    expires_at: Optional[float] = None
+    result: Optional[SummarizeResponse] = None
+    error: Optional[str] = None
+
+
+class SearchAndSummarizeRequest(SearchQuery):
+    # Nombre de meilleurs résultats à résumer (None = tous les top_k)
+    summarize_top: Optional[int] = None
+    full_text: bool = False
+    profile: Optional[str] = None
+    allow_downgrade: bool = True
+
+
+class SearchAndSummarizeResponse(SearchResponse):
+    # None si le modèle de résumé n'est pas chargé
+    summaries: Optional[SummarizeResponse] = None
+
+
+class SummarizeStreamRequest(SummarizeRequest):
+    # Résumé global émis token par token (recherche gloutonne au lieu du beam search)
+    stream_tokens: bool = False
+
+
+class SearchAndSummarizeStreamRequest(SearchAndSummarizeRequest):
+    stream_tokens: bool = False
 
 
 # --- CONFIGURATION ET CHARGEMENT DES MODÈLES ---
 
 # Chemins vers nos ressources
 INDEX_FILE = "data/embeddings/document_index.faiss"
+# Paramètres de l'index ANN (type, nprobe, efSearch...) écrits par generate_embeddings.py
+INDEX_PARAMS_FILE = "data/embeddings/document_index.params.json"
 MAPPING_FILE = "data/embeddings/index_to_id_mapping.json"
+# Table d'IDs compacte (générée avec le mapping, ouverte en mmap)
+IDS_FILE = "data/embeddings/index_ids.npy"
 CORPUS_FILE = "data/processed/processed_corpus.jsonl"
+# Base SQLite des documents (construite par preprocess_data.py)
+DOCUMENT_STORE_FILE = "data/processed/documents.sqlite"
+# Cache persistant des résumés (partagé avec scripts/presummarize_corpus.py)
+SUMMARY_STORE_FILE = os.getenv("SUMMARY_STORE_FILE", "data/processed/summaries.sqlite")
 MODEL_NAME = "all-MiniLM-L6-v2"
 # Modèle de Re-Ranking (Cross-Encoder) - Petit et rapide
 RERANKER_MODEL_NAME = "cross-encoder/ms-marco-MiniLM-L-6-v2"
 
 # Chemin vers le modèle de résumé LoRA
 LORA_MODEL_PATH = os.getenv("LORA_MODEL_PATH", "models/bart-lora-finetuned")
+# Budget de tokens d'un batch de génération (séquences x beams x (entrée + sortie))
+SUMMARIZER_MAX_BATCH_TOKENS = int(os.getenv("SUMMARIZER_MAX_BATCH_TOKENS", "16384"))
+# Fusion des adaptateurs LoRA dans les poids au chargement (sans effet si
+# LORA_MODEL_PATH pointe vers un checkpoint déjà fusionné par merge_lora.py)
+SUMMARIZER_MERGE_ADAPTER = os.getenv("SUMMARIZER_MERGE_ADAPTER", "0") == "1"
+# Quantification dynamique int8 du résumeur (CPU, implique la fusion LoRA)
+SUMMARIZER_QUANTIZE = os.getenv("SUMMARIZER_QUANTIZE", "0") == "1"
+# Modèle brouillon du décodage assisté (ex. sshleifer/distilbart-cnn-12-6) pour
+# les générations gloutonnes d'une seule séquence (profil fast, streaming) ;
+# vide = désactivé
+SUMMARIZER_DRAFT_MODEL = os.getenv("SUMMARIZER_DRAFT_MODEL", "")
+# Budget disque du cache de résumés (Mo, hors entrées épinglées)
+SUMMARY_STORE_MAX_MB = float(os.getenv("SUMMARY_STORE_MAX_MB", "256"))
+# Pré-compression extractive des entrées du résumeur (tokens, 0 = désactivée)
+SUMMARIZER_COMPRESS_TOKENS = int(os.getenv("SUMMARIZER_COMPRESS_TOKENS", "0"))
+# Budget de temps (s) du résumé hiérarchique des textes intégraux (0 = aucun) :
+# au-delà, les niveaux restants passent en recherche gloutonne
+LONG_DOCUMENT_TIME_BUDGET_S = float(os.getenv("LONG_DOCUMENT_TIME_BUDGET_S", "60"))
+# Profil de génération des résumés quand la requête n'en précise pas
+SUMMARIZER_DEFAULT_PROFILE = os.getenv("SUMMARIZER_DEFAULT_PROFILE", "balanced")
+# Profondeur de file de génération à partir de laquelle le profil est abaissé
+# d'un cran (deux crans au double, etc. ; 0 = jamais)
+SUMMARIZER_DOWNGRADE_QUEUE_DEPTH = int(
+    os.getenv("SUMMARIZER_DOWNGRADE_QUEUE_DEPTH", "32")
+)
+# Fenêtre d'attente de l'ordonnanceur de génération (batches inter-requêtes)
+SUMMARIZER_MAX_WAIT_MS = float(os.getenv("SUMMARIZER_MAX_WAIT_MS", "10"))
+
+# File de jobs de résumé (/summarize/jobs) : processus workers possédant chacun
+# leur LoRASummarizer, broker SQLite local (0 worker = désactivée)
+SUMMARY_JOB_WORKERS = int(os.getenv("SUMMARY_JOB_WORKERS", "0"))
+SUMMARY_JOB_STORE_FILE = os.getenv(
+    "SUMMARY_JOB_STORE_FILE", "data/processed/jobs.sqlite"
+)
+# Durée de conservation des résultats (s)
+SUMMARY_JOB_TTL_S = float(os.getenv("SUMMARY_JOB_TTL_S", "3600"))
+# Threads PyTorch par worker (0 = cœurs / (2 x workers))
+SUMMARY_JOB_THREADS = int(os.getenv("SUMMARY_JOB_THREADS", "0"))
+# Attente maximale d'un GET en long-polling (s)
+SUMMARY_JOB_MAX_WAIT_S = 60.0
+
+# En-tête identifiant la session cliente : une nouvelle requête de résumé de la
+# même session annule la précédente
+SESSION_HEADER = "X-Session-ID"
+# Intervalle de vérification de la connexion client pendant un résumé (s)
+DISCONNECT_POLL_S = 0.25
+
+# Jeton d'administration de /reload (en-tête X-Admin-Token) ; vide = /reload
+# accepté uniquement depuis la machine locale
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+ADMIN_TOKEN_HEADER = "X-Admin-Token"
+
+# Backend d'inférence des encodeurs : torch, int8 ou int8_traced (CPU)
+ENCODER_BACKEND = os.getenv("ENCODER_BACKEND", "torch")
+
+# Micro-batching des requêtes /search (regroupement des encodages concurrents)
+SEARCH_BATCH_MAX_SIZE = int(os.getenv("SEARCH_BATCH_MAX_SIZE", "32"))
+SEARCH_BATCH_MAX_WAIT_MS = float(os.getenv("SEARCH_BATCH_MAX_WAIT_MS", "5"))
+
+# Caches LRU + TTL (taille en nombre d'entrées, TTL en secondes)
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "10000"))
+EMBEDDING_CACHE_TTL_S = float(os.getenv("EMBEDDING_CACHE_TTL_S", "3600"))
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "2000"))
+RESPONSE_CACHE_TTL_S = float(os.getenv("RESPONSE_CACHE_TTL_S", "600"))
+
+# Cascade de re-ranking (profondeur adaptative à l'écart de score). Désactivée
+# par défaut : à activer une fois validée sur un jeu de requêtes annotées
+# (scripts/benchmark_cascade.py, data/eval/labelled_queries.json)
+CASCADE_ENABLED = os.getenv("CASCADE_ENABLED", "0") == "1"
+CASCADE_MAX_DEPTH_FACTOR = int(os.getenv("CASCADE_MAX_DEPTH_FACTOR", "5"))
+CASCADE_FAISS_MARGIN = float(os.getenv("CASCADE_FAISS_MARGIN", "0.05"))
+CASCADE_CHEAP_SCORER = os.getenv("CASCADE_CHEAP_SCORER", "1") == "1"
+CASCADE_CHEAP_MARGIN = float(os.getenv("CASCADE_CHEAP_MARGIN", "0.05"))
+
+# Estimation initiale du coût du Cross-Encoder (affinée en ligne) pour deadline_ms
+RERANK_MS_PER_PAIR = float(os.getenv("RERANK_MS_PER_PAIR", "5"))
+
+# Chargement de l'index et de la table d'IDs en mmap (démarrage rapide, RSS réduit)
+INDEX_MMAP = os.getenv("INDEX_MMAP", "0") == "1"
+
+# Cache sémantique (requêtes quasi-identiques) devant le Re-Ranker
+SEMANTIC_CACHE_SIZE = int(os.getenv("SEMANTIC_CACHE_SIZE", "512"))
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+SEMANTIC_CACHE_TTL_S = float(os.getenv("SEMANTIC_CACHE_TTL_S", "600"))
 
 # Création de l'application FastAPI
 app = FastAPI(
@@ -74,6 +276,107 @@ app = FastAPI(
 # Dictionnaire global pour stocker les composants chargés
 search_engine_components = {}
 
+# Caches de recherche : embedding par requête normalisée, et réponse complète
+# par (requête, top_k, version de l'index)
+embedding_cache = TTLCache(EMBEDDING_CACHE_SIZE, EMBEDDING_CACHE_TTL_S)
+response_cache = TTLCache(RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL_S)
+cascade_settings = CascadeSettings(
+    enabled=CASCADE_ENABLED,
+    max_depth_factor=CASCADE_MAX_DEPTH_FACTOR,
+    faiss_margin=CASCADE_FAISS_MARGIN,
+    cheap_scorer=CASCADE_CHEAP_SCORER,
+    cheap_margin=CASCADE_CHEAP_MARGIN,
+)
+cascade_stats = CascadeStats()
+rerank_latency = RerankLatencyModel(ms_per_pair=RERANK_MS_PER_PAIR)
+
+# Modes de re-ranking considérés comme dégradés (deadline trop courte)
+DEGRADED_MODES = ("rerank_prefix", "faiss_only")
+
+# Délai avant le premier résumé des réponses en streaming (ms, mesures récentes)
+stream_first_summary_ms = deque(maxlen=1000)
+# (profil demandé, profil utilisé) des requêtes de résumé récentes
+recent_profiles = deque(maxlen=1000)
+# Requête de résumé active par session et annulations (déconnexion, remplacement)
+session_registry = SessionRegistry()
+
+# Cache sémantique : réutilise les résultats re-rankés d'une paraphrase récente
+semantic_cache = SemanticCache(
+    SEMANTIC_CACHE_SIZE, SEMANTIC_CACHE_THRESHOLD, SEMANTIC_CACHE_TTL_S
+)
+
+
+def _compute_index_version() -> str:
+    """
+    Empreinte des fichiers index / mapping / corpus (taille + date de modification).
+    Change dès que l'un d'eux est régénéré.
+    """
+    signature = []
+    for path in (
+        INDEX_FILE,
+        INDEX_PARAMS_FILE,
+        MAPPING_FILE,
+        IDS_FILE,
+        CORPUS_FILE,
+        DOCUMENT_STORE_FILE,
+    ):
+        if not os.path.exists(path):
+            continue
+        stat = os.stat(path)
+        signature.append(f"{path}:{stat.st_size}:{stat.st_mtime_ns}")
+    return hashlib.sha1("|".join(signature).encode("utf-8")).hexdigest()[:12]
+
+
+def load_index_and_corpus():
+    """
+    Charge l'index FAISS, le mapping et le corpus, puis invalide les caches.
+    Appelée au démarrage et à chaque rechargement (/reload).
+    """
+    # Charger l'index FAISS
+    print("\n📥 Chargement de l'index FAISS...")
+    index, index_params = load_faiss_index(
+        INDEX_FILE, INDEX_PARAMS_FILE, use_mmap=INDEX_MMAP
+    )
+    search_params = {
+        k: v for k, v in index_params.items() if k in ("nprobe", "efSearch")
+    }
+    print(
+        f"✅ Index FAISS chargé (type: {index_params['index_type']}, "
+        f"stockage: {index_params.get('storage', 'float32')}, {search_params})"
+    )
+
+    # Charger le mapping index -> ID
+    print("\n📥 Chargement du mapping...")
+    index_to_id = load_id_mapping(MAPPING_FILE, IDS_FILE, use_mmap=INDEX_MMAP)
+    print(f"✅ Mapping chargé ({type(index_to_id).__name__}, mmap: {INDEX_MMAP})")
+
+    # Ouvrir le stockage des documents (SQLite, rien n'est chargé en mémoire)
+    print("\n📥 Ouverture du stockage des documents...")
+    # Base absente ou plus ancienne que le corpus (normalement construite par
+    # preprocess_data.py) : un seul processus la (re)construit, les autres attendent
+    if ensure_document_store(CORPUS_FILE, DOCUMENT_STORE_FILE):
+        print(f"   {DOCUMENT_STORE_FILE} reconstruit depuis le corpus JSONL")
+    document_store = DocumentStore(DOCUMENT_STORE_FILE)
+    print(f"✅ Stockage des documents ouvert ({len(document_store)} documents)")
+
+    # Remplacement en une seule affectation. Chaque requête lit l'instantané
+    # une fois (`_current_index`) et le passe au batcher et à la collecte des
+    # candidats : elle n'associe jamais un index au mapping d'un autre
+    search_engine_components["index_snapshot"] = IndexSnapshot(
+        index=index,
+        params=index_params,
+        index_to_id=index_to_id,
+        document_store=document_store,
+        version=_compute_index_version(),
+    )
+    # L'ancien DocumentStore n'est pas fermé : des requêtes en cours peuvent
+    # encore le lire ; ses connexions sont libérées avec lui par le ramasse-miettes
+
+    # Les résultats en cache ne correspondent plus au nouvel index
+    embedding_cache.clear()
+    response_cache.clear()
+    semantic_cache.clear()
+
 
 @app.on_event("startup")
 def load_search_engine():
@@ -86,166 +389,656 @@ def load_search_engine():
     print("=" * 80)
 
     # Charger le modèle d'embedding
-    print("\n📥 Chargement du modèle d'embedding...")
-    search_engine_components["model"] = SentenceTransformer(MODEL_NAME)
+    print(f"\n📥 Chargement du modèle d'embedding (backend: {ENCODER_BACKEND})...")
+    search_engine_components["model"] = load_embedding_model(
+        MODEL_NAME, ENCODER_BACKEND
+    )
     print("✅ Modèle d'embedding chargé")
 
     # Charger le modèle de Re-Ranking (Cross-Encoder)
     print("\n📥 Chargement du modèle de Re-Ranking (Cross-Encoder)...")
     try:
-        search_engine_components["reranker"] = CrossEncoder(RERANKER_MODEL_NAME)
+        search_engine_components["reranker"] = load_reranker(
+            RERANKER_MODEL_NAME, ENCODER_BACKEND
+        )
         print("✅ Modèle de Re-Ranking chargé")
     except Exception as e:
         print(f"⚠️ Impossible de charger le Re-Ranker: {e}")
         search_engine_components["reranker"] = None
 
-    # Charger l'index FAISS
-    print("\n📥 Chargement de l'index FAISS...")
-    search_engine_components["index"] = faiss.read_index(INDEX_FILE)
-    print("✅ Index FAISS chargé")
+    # Préchauffage : la première requête ne paie pas l'initialisation des encodeurs
+    warmup = warm_up_encoders(
+        search_engine_components["model"], search_engine_components["reranker"]
+    )
+    search_engine_components["encoder_warmup_ms"] = warmup
+    print(f"✅ Encodeurs préchauffés: {warmup}")
 
-    # Charger le mapping index -> ID
-    print("\n📥 Chargement du mapping...")
-    with open(MAPPING_FILE, "r", encoding="utf-8") as f:
-        index_to_id = json.load(f)
-        search_engine_components["index_to_id"] = {
-            int(k): v for k, v in index_to_id.items()
-        }
-    print("✅ Mapping chargé")
-
-    # Charger le corpus
-    print("\n📥 Chargement du corpus...")
-    documents_by_id = {}
-    with open(CORPUS_FILE, "r", encoding="utf-8") as f:
-        for line in f:
-            doc = json.loads(line)
-            documents_by_id[doc["id"]] = doc
-    search_engine_components["documents_by_id"] = documents_by_id
-    print(f"✅ Corpus chargé ({len(documents_by_id)} documents)")
+    # Charger l'index, le mapping et le corpus (rechargeables via /reload)
+    load_index_and_corpus()
+
+    # Démarrer le micro-batcher des requêtes de recherche
+    print("\n📥 Démarrage du micro-batcher de requêtes...")
+    batcher = QueryBatcher(
+        encode_fn=_encode_queries,
+        max_batch_size=SEARCH_BATCH_MAX_SIZE,
+        max_wait_ms=SEARCH_BATCH_MAX_WAIT_MS,
+    )
+    batcher.start()
+    search_engine_components["batcher"] = batcher
+    print(
+        f"✅ Micro-batcher démarré (batch max: {SEARCH_BATCH_MAX_SIZE}, "
+        f"attente max: {SEARCH_BATCH_MAX_WAIT_MS} ms)"
+    )
 
     # Charger le modèle de résumé LoRA
     print("\n📥 Chargement du modèle de résumé LoRA...")
     try:
-        search_engine_components["summarizer"] = LoRASummarizer(LORA_MODEL_PATH)
+        summary_store = SummaryStore(
+            SUMMARY_STORE_FILE, max_bytes=int(SUMMARY_STORE_MAX_MB * 1024 * 1024)
+        )
+        search_engine_components["summary_store"] = summary_store
+        search_engine_components["summarizer"] = LoRASummarizer(
+            LORA_MODEL_PATH,
+            max_batch_tokens=SUMMARIZER_MAX_BATCH_TOKENS,
+            merge_adapter=SUMMARIZER_MERGE_ADAPTER,
+            quantize=SUMMARIZER_QUANTIZE,
+            summary_store=summary_store,
+            draft_model_path=SUMMARIZER_DRAFT_MODEL or None,
+        )
         print("✅ Modèle de résumé LoRA chargé")
+
+        # Phrases les plus centrales seulement, scorées avec le MiniLM déjà chargé
+        if SUMMARIZER_COMPRESS_TOKENS > 0:
+            search_engine_components["summarizer"].attach_compressor(
+                search_engine_components["model"].encode, SUMMARIZER_COMPRESS_TOKENS
+            )
+            print(
+                f"✅ Pré-compression extractive activée "
+                f"({SUMMARIZER_COMPRESS_TOKENS} tokens max)"
+            )
+
+        # Un seul thread appelle `generate` : les résumés de toutes les requêtes
+        # sont regroupés en batches sous le budget de tokens
+        scheduler = GenerationScheduler(
+            search_engine_components["summarizer"],
+            max_wait_ms=SUMMARIZER_MAX_WAIT_MS,
+        )
+        scheduler.start()
+        search_engine_components["generation_scheduler"] = scheduler
+        print(
+            f"✅ Ordonnanceur de génération démarré "
+            f"(budget: {SUMMARIZER_MAX_BATCH_TOKENS} tokens)"
+        )
     except Exception as e:
         print(f"⚠️  Impossible de charger le modèle de résumé: {e}")
         print("   Le endpoint /summarize ne sera pas disponible.")
         search_engine_components["summarizer"] = None
+        search_engine_components["generation_scheduler"] = None
+
+    # Workers de résumé hors processus (jobs asynchrones)
+    if SUMMARY_JOB_WORKERS > 0:
+        search_engine_components["job_store"] = JobStore(
+            SUMMARY_JOB_STORE_FILE, ttl_s=SUMMARY_JOB_TTL_S
+        )
+        pool = SummaryWorkerPool(
+            SUMMARY_JOB_STORE_FILE,
+            SUMMARY_JOB_WORKERS,
+            summarizer_kwargs={
+                "model_path": LORA_MODEL_PATH,
+                "max_batch_tokens": SUMMARIZER_MAX_BATCH_TOKENS,
+                "merge_adapter": SUMMARIZER_MERGE_ADAPTER,
+                "quantize": SUMMARIZER_QUANTIZE,
+                "draft_model_path": SUMMARIZER_DRAFT_MODEL or None,
+            },
+            compressor_kwargs=(
+                {
+                    "model_name": MODEL_NAME,
+                    "backend": ENCODER_BACKEND,
+                    "target_tokens": SUMMARIZER_COMPRESS_TOKENS,
+                }
+                if SUMMARIZER_COMPRESS_TOKENS > 0
+                else None
+            ),
+            ttl_s=SUMMARY_JOB_TTL_S,
+            summary_store_file=SUMMARY_STORE_FILE,
+            summary_store_max_bytes=int(SUMMARY_STORE_MAX_MB * 1024 * 1024),
+            threads_per_worker=SUMMARY_JOB_THREADS or None,
+        )
+        pool.start()
+        search_engine_components["job_pool"] = pool
+        print(
+            f"✅ File de jobs de résumé démarrée ({SUMMARY_JOB_WORKERS} workers, "
+            f"{pool.threads_per_worker} threads chacun)"
+        )
 
     print("\n" + "=" * 80)
     print("✅ TOUS LES COMPOSANTS CHARGÉS - API PRÊTE!")
     print("=" * 80 + "\n")
 
 
-# --- POINTS DE TERMINAISON DE L'API ---
+@app.on_event("shutdown")
+def stop_background_workers():
+    """Arrête proprement les threads de traitement en arrière-plan."""
+    batcher = search_engine_components.get("batcher")
+    if batcher:
+        batcher.stop()
 
+    scheduler = search_engine_components.get("generation_scheduler")
+    if scheduler:
+        scheduler.stop()
 
-@app.post("/search", response_model=SearchResponse)
-def search(query: SearchQuery):
-    """
-    Prend une requête textuelle et renvoie les k documents les plus similaires.
-    Utilise un Re-Ranking pour améliorer la pertinence.
-    """
+    job_pool = search_engine_components.get("job_pool")
+    if job_pool:
+        job_pool.stop()
+
+    job_store = search_engine_components.get("job_store")
+    if job_store:
+        job_store.close()
+
+    summary_store = search_engine_components.get("summary_store")
+    if summary_store:
+        summary_store.close()
+
+    snapshot = search_engine_components.get("index_snapshot")
+    if snapshot:
+        snapshot.document_store.close()
+
+
+# --- FONCTIONS INTERNES DE RECHERCHE ---
+
+
+def _encode_queries(texts: List[str]) -> np.ndarray:
+    """Encode une liste de requêtes en embeddings normalisés (L2)."""
     model = search_engine_components["model"]
-    index = search_engine_components["index"]
-    index_to_id = search_engine_components["index_to_id"]
-    documents_by_id = search_engine_components["documents_by_id"]
-    reranker = search_engine_components.get("reranker")
+    embeddings = np.ascontiguousarray(model.encode(texts), dtype=np.float32)
+    faiss.normalize_L2(embeddings)
+    return embeddings
 
-    # 1. Créer et normaliser l'embedding de la requête
-    query_embedding = model.encode([query.query])
-    faiss.normalize_L2(query_embedding)
 
-    # 2. Chercher dans l'index (On récupère plus de candidats pour le re-ranking)
-    # Si on a un reranker, on prend 3x plus de candidats, sinon juste top_k
-    fetch_k = query.top_k * 3 if reranker else query.top_k
-    distances, indices = index.search(query_embedding, fetch_k)
+def _current_index() -> IndexSnapshot:
+    """Instantané courant de l'index (à lire une seule fois par requête)"""
+    return search_engine_components["index_snapshot"]
 
-    # 3. Récupérer les documents candidats
-    candidates = []
-    for i in range(fetch_k):
-        if i >= len(indices[0]):
-            break  # Sécurité
 
-        index_pos = indices[0][i]
+def _collect_candidates(
+    distances_row, indices_row, snapshot: IndexSnapshot
+) -> List[dict]:
+    """
+    Transforme une ligne de résultats FAISS en liste de documents candidats
+    (mapping et documents de l'instantané interrogé par la recherche).
+    """
+    index_to_id = snapshot.index_to_id
+    document_store = snapshot.document_store
+
+    hits = []
+    for i in range(len(indices_row)):
+        index_pos = indices_row[i]
         # FAISS peut renvoyer -1 si pas assez de voisins
         if index_pos == -1:
             continue
 
         doc_id = index_to_id.get(index_pos)
         if doc_id:
-            document = documents_by_id.get(doc_id)
-            if document:
-                candidates.append(
-                    {
-                        "doc": document,
-                        "initial_score": float(distances[0][i]),
-                        "id": doc_id,
-                    }
-                )
-
-    # 4. Re-Ranking (Technique 4)
-    final_results = []
-
-    if reranker and candidates:
-        # Préparer les paires [Query, Document Text]
-        pairs = [
-            [
-                query.query,
-                c["doc"].get("title", "") + ". " + c["doc"].get("abstract", ""),
-            ]
-            for c in candidates
+            hits.append((doc_id, float(distances_row[i])))
+
+    # Champs légers de toute la page de candidats en une seule requête
+    documents_by_id = document_store.get_many(doc_id for doc_id, _ in hits)
+
+    candidates = []
+    for doc_id, score in hits:
+        document = documents_by_id.get(doc_id)
+        if document:
+            candidates.append({"doc": document, "initial_score": score, "id": doc_id})
+    return candidates
+
+
+def _to_search_result(
+    candidate: dict, score: float, reranked: bool = True
+) -> SearchResult:
+    return SearchResult(
+        id=candidate["id"],
+        score=score,
+        reranked=reranked,
+        retrieval_score=None if reranked else candidate["initial_score"],
+        title=candidate["doc"].get("title"),
+        source=candidate["doc"].get("source"),
+        url=candidate["doc"].get("url"),
+        abstract=candidate["doc"].get("abstract"),
+    )
+
+
+def _cascade_for(query: SearchQuery) -> CascadeSettings:
+    return cascade_settings.override(
+        enabled=query.cascade,
+        rerank_depth=query.rerank_depth,
+        margin=query.cascade_margin,
+        cheap_scorer=query.cheap_scorer,
+    )
+
+
+def _has_overrides(query: SearchQuery) -> bool:
+    return any(
+        v is not None
+        for v in (
+            query.cascade,
+            query.rerank_depth,
+            query.cascade_margin,
+            query.cheap_scorer,
+        )
+    )
+
+
+def _response_key(query: SearchQuery, normalized: str, version) -> tuple:
+    """Clé du cache de réponses (invalidée quand l'index change)"""
+    return (
+        normalized,
+        query.top_k,
+        version,
+        query.cascade,
+        query.rerank_depth,
+        query.cascade_margin,
+        query.cheap_scorer,
+    )
+
+
+def _uses_semantic_cache(query: SearchQuery) -> bool:
+    # Uniquement avec la configuration de cascade par défaut du serveur
+    reranker = search_engine_components.get("reranker")
+    return reranker is not None and not _has_overrides(query)
+
+
+def _fetch_k(query: SearchQuery) -> int:
+    # Avec un reranker, la cascade décide du nombre de candidats, sinon juste top_k
+    if not search_engine_components.get("reranker"):
+        return query.top_k
+    return _cascade_for(query).fetch_k(query.top_k)
+
+
+def _rank_candidates(
+    queries: List[SearchQuery],
+    candidate_lists: List[List[dict]],
+    pair_budgets: Optional[List[Optional[int]]] = None,
+) -> tuple:
+    """
+    Re-Ranking (Technique 4) de plusieurs requêtes à la fois.
+    La cascade choisit les candidats de chaque requête à envoyer au
+    Cross-Encoder, puis toutes les paires [Query, Document Text] retenues
+    sont scorées en un seul appel à `CrossEncoder.predict`.
+
+    Args:
+        pair_budgets: Nombre maximal de paires à scorer par requête (deadline) ;
+            None = pas de limite
+
+    Returns:
+        (résultats par requête, mode de re-ranking par requête)
+    """
+    reranker = search_engine_components.get("reranker")
+
+    if not reranker:
+        # Fallback si pas de reranker (comportement original)
+        results = [
+            [_to_search_result(c, c["initial_score"]) for c in candidates[: q.top_k]]
+            for q, candidates in zip(queries, candidate_lists)
         ]
+        return results, ["faiss_ranking"] * len(queries)
+
+    if pair_budgets is None:
+        pair_budgets = [None] * len(queries)
+
+    # Étages légers de la cascade (scores FAISS, scoreur lexical)
+    survivor_lists = []
+    scored_lists = []
+    modes = []
+    for q, candidates, budget in zip(queries, candidate_lists, pair_budgets):
+        survivors, counts = select_survivors(
+            q.query, candidates, q.top_k, _cascade_for(q)
+        )
+        survivor_lists.append(survivors)
 
-        # Prédire les scores de pertinence
+        # Le budget de temps limite le nombre de paires envoyées au Cross-Encoder
+        if budget is None or budget >= len(survivors):
+            scored, mode = survivors, "rerank"
+        elif budget >= 2:
+            scored, mode = survivors[:budget], "rerank_prefix"
+        else:
+            scored, mode = [], "faiss_only"
+        scored_lists.append(scored)
+        modes.append(mode)
+
+        counts["survivors"] = len(scored)
+        cascade_stats.record(counts)
+
+    # Préparer les paires [Query, Document Text] de toutes les requêtes
+    pairs = [
+        [q.query, candidate_text(c)]
+        for q, scored in zip(queries, scored_lists)
+        for c in scored
+    ]
+
+    # Prédire les scores de pertinence (un seul appel pour tout le batch)
+    rerank_scores = []
+    if pairs:
+        start = time.perf_counter()
         rerank_scores = reranker.predict(pairs)
+        rerank_latency.observe(len(pairs), (time.perf_counter() - start) * 1000.0)
 
+    all_results = []
+    offset = 0
+    for q, survivors, scored, mode in zip(
+        queries, survivor_lists, scored_lists, modes
+    ):
         # Associer les scores aux candidats
-        for i, candidate in enumerate(candidates):
-            candidate["rerank_score"] = float(rerank_scores[i])
-
-        # Trier par score de re-ranking (décroissant)
-        candidates.sort(key=lambda x: x["rerank_score"], reverse=True)
-
-        # Garder les top_k
-        top_candidates = candidates[: query.top_k]
-
-        for c in top_candidates:
-            final_results.append(
-                SearchResult(
-                    id=c["id"],
-                    score=c["rerank_score"],  # On renvoie le score du reranker
-                    title=c["doc"].get("title"),
-                    source=c["doc"].get("source"),
-                    url=c["doc"].get("url"),
-                    abstract=c["doc"].get("abstract"),
-                )
+        for i, candidate in enumerate(scored):
+            candidate["rerank_score"] = float(rerank_scores[offset + i])
+        offset += len(scored)
+
+        # Trier par score de re-ranking (décroissant) et garder les top_k
+        ranked = sorted(scored, key=lambda x: x["rerank_score"], reverse=True)
+        # On renvoie le score du reranker
+        results = [_to_search_result(c, c["rerank_score"]) for c in ranked]
+
+        # Mode dégradé : le reste des candidats suit, dans l'ordre de la cascade,
+        # avec son score FAISS et reranked=False
+        for c in survivors[len(scored) :]:
+            results.append(_to_search_result(c, c["initial_score"], reranked=False))
+
+        all_results.append(results[: q.top_k])
+
+    return all_results, modes
+
+
+# --- POINTS DE TERMINAISON DE L'API ---
+
+
+@app.post("/search", response_model=SearchResponse)
+def search(query: SearchQuery):
+    """
+    Prend une requête textuelle et renvoie les k documents les plus similaires.
+    Utilise un Re-Ranking pour améliorer la pertinence.
+    Avec `deadline_ms`, le re-ranking est réduit à un préfixe des candidats,
+    voire sauté (classement FAISS), si le budget restant ne le permet pas.
+    """
+    batcher = search_engine_components["batcher"]
+    snapshot = _current_index()
+    tracker = StageTracker(query.deadline_ms)
+
+    # 0. Cache de réponses complètes (invalidé quand l'index change)
+    normalized = normalize_query(query.query)
+    response_key = _response_key(query, normalized, snapshot.version)
+    with tracker.stage("response_cache"):
+        cached_response = response_cache.get(response_key)
+    if cached_response is not None:
+        return _with_stages(cached_response, tracker)
+
+    # 1-2. Encoder la requête et chercher dans l'index via le micro-batcher
+    # (les requêtes concurrentes partagent un seul encodage et un seul index.search)
+    # L'encodage est sauté si l'embedding de la requête est déjà en cache
+    with tracker.stage("retrieval"):
+        cached_embedding = embedding_cache.get(normalized)
+        query_embedding, distances, indices = batcher.search(
+            query.query, _fetch_k(query), snapshot.index, embedding=cached_embedding
+        )
+    if cached_embedding is None:
+        embedding_cache.put(normalized, query_embedding)
+
+    # 3. Cache sémantique : une requête très proche a déjà été re-rankée
+    index_version = snapshot.version
+    use_semantic_cache = _uses_semantic_cache(query)
+    if use_semantic_cache:
+        with tracker.stage("semantic_cache"):
+            semantic_hit = semantic_cache.lookup(
+                query_embedding, query.top_k, index_version
             )
+        if semantic_hit is not None:
+            response = SearchResponse(results=semantic_hit[0])
+            response_cache.put(response_key, response)
+            return _with_stages(response, tracker)
 
-    else:
-        # Fallback si pas de reranker (comportement original)
-        top_candidates = candidates[: query.top_k]
-        for c in top_candidates:
-            final_results.append(
-                SearchResult(
-                    id=c["id"],
-                    score=c["initial_score"],
-                    title=c["doc"].get("title"),
-                    source=c["doc"].get("source"),
-                    url=c["doc"].get("url"),
-                    abstract=c["doc"].get("abstract"),
-                )
+    # 4. Récupérer les documents candidats
+    with tracker.stage("candidates"):
+        candidates = _collect_candidates(distances[0], indices[0], snapshot)
+
+    # 5. Re-Ranking, dans la limite du budget restant
+    remaining_ms = tracker.remaining_ms()
+    pair_budget = (
+        None if remaining_ms is None else rerank_latency.affordable_pairs(remaining_ms)
+    )
+    start = time.perf_counter()
+    ranked, modes = _rank_candidates([query], [candidates], [pair_budget])
+    final_results, mode = ranked[0], modes[0]
+    tracker.record(mode, (time.perf_counter() - start) * 1000.0)
+
+    response = SearchResponse(results=final_results)
+
+    # Les résultats dégradés ne sont pas mis en cache
+    if mode not in DEGRADED_MODES:
+        if use_semantic_cache:
+            semantic_cache.put(
+                query_embedding, query.top_k, index_version, final_results, query.query
             )
+        response_cache.put(response_key, response)
 
-    return SearchResponse(results=final_results)
+    return _with_stages(response, tracker)
+
+
+def _with_stages(response: SearchResponse, tracker: StageTracker) -> SearchResponse:
+    """Copie de la réponse annotée avec les étapes exécutées pour cette requête"""
+    return response.model_copy(
+        update={
+            "stages": list(tracker.stages),
+            "degraded": any(stage in DEGRADED_MODES for stage in tracker.stages),
+            "timings_ms": {
+                **tracker.timings_ms,
+                "total": tracker.elapsed_ms(),
+            },
+        }
+    )
+
+
+@app.post("/search/batch", response_model=BatchSearchResponse)
+def search_batch(request: BatchSearchRequest):
+    """
+    Recherche pour plusieurs requêtes (jobs hors-ligne), par le même chemin que
+    /search : cache de réponses, cache d'embeddings, micro-batcher (recherche
+    FAISS au fetch_k de chaque requête), cache sémantique. Les requêtes absentes
+    des caches sont re-rankées en un seul appel au reranker ; résultats
+    identiques à des appels successifs à /search.
+    """
+    if not request.queries:
+        return BatchSearchResponse(responses=[])
+
+    batcher = search_engine_components["batcher"]
+    snapshot = _current_index()
+    responses = [None] * len(request.queries)
+
+    # 0. Cache de réponses complètes
+    pending = []
+    for position, query in enumerate(request.queries):
+        normalized = normalize_query(query.query)
+        key = _response_key(query, normalized, snapshot.version)
+        cached_response = response_cache.get(key)
+        if cached_response is not None:
+            responses[position] = cached_response.model_copy(
+                update={"stages": ["response_cache"]}
+            )
+        else:
+            pending.append((position, query, normalized, key))
+
+    # 1-2. Toutes les requêtes restantes sont soumises d'un coup au micro-batcher :
+    # un encodage groupé (sauf embeddings en cache), une recherche par fetch_k
+    futures = [
+        batcher.submit(
+            query.query,
+            _fetch_k(query),
+            snapshot.index,
+            embedding=embedding_cache.get(normalized),
+        )
+        for _, query, normalized, _ in pending
+    ]
+    to_rank = []
+    for (position, query, normalized, key), future in zip(pending, futures):
+        query_embedding, distances, indices = future.result()
+        embedding_cache.put(normalized, query_embedding)
+
+        # 3. Cache sémantique
+        stages = ["retrieval"]
+        if _uses_semantic_cache(query):
+            stages.append("semantic_cache")
+            semantic_hit = semantic_cache.lookup(
+                query_embedding, query.top_k, snapshot.version
+            )
+            if semantic_hit is not None:
+                response = SearchResponse(results=semantic_hit[0])
+                response_cache.put(key, response)
+                responses[position] = response.model_copy(update={"stages": stages})
+                continue
+
+        # 4. Candidats
+        candidates = _collect_candidates(distances[0], indices[0], snapshot)
+        to_rank.append((position, query, key, query_embedding, stages, candidates))
+
+    # 5. Re-Ranking groupé des requêtes absentes des caches
+    if to_rank:
+        ranked, modes = _rank_candidates(
+            [item[1] for item in to_rank], [item[5] for item in to_rank]
+        )
+        for (position, query, key, query_embedding, stages, _), results, mode in zip(
+            to_rank, ranked, modes
+        ):
+            response = SearchResponse(results=results)
+            if mode not in DEGRADED_MODES:
+                if _uses_semantic_cache(query):
+                    semantic_cache.put(
+                        query_embedding,
+                        query.top_k,
+                        snapshot.version,
+                        results,
+                        query.query,
+                    )
+                response_cache.put(key, response)
+            responses[position] = response.model_copy(
+                update={"stages": stages + ["candidates", mode]}
+            )
+
+    return BatchSearchResponse(responses=responses)
+
+
+def _check_profile(requested: Optional[str]) -> str:
+    """Profil demandé (ou par défaut) ; 422 s'il est inconnu"""
+    profile = requested or SUMMARIZER_DEFAULT_PROFILE
+    if profile not in GENERATION_PROFILES:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Profil inconnu: {profile} (choix: {', '.join(PROFILE_ORDER)})",
+        )
+    return profile
+
+
+def _resolve_profile(requested: Optional[str], allow_downgrade: bool):
+    """
+    Profil de génération : celui demandé (ou par défaut), abaissé d'un cran par
+    tranche de SUMMARIZER_DOWNGRADE_QUEUE_DEPTH jobs en file de génération.
+    L'abaissement ne concerne que les résumés absents du cache : le cache est
+    d'abord consulté avec le profil demandé (résumés épinglés compris).
+
+    Returns:
+        (profil demandé, profil de génération)
+    """
+    profile = _check_profile(requested)
+    used = profile
+    scheduler = search_engine_components.get("generation_scheduler")
+    if allow_downgrade and scheduler and SUMMARIZER_DOWNGRADE_QUEUE_DEPTH > 0:
+        steps = scheduler.queue_depth() // SUMMARIZER_DOWNGRADE_QUEUE_DEPTH
+        used = downgrade_profile(profile, steps)
+    recent_profiles.append((profile, used))
+    return profile, used
+
+
+def _summarize(
+    articles: List[dict],
+    full_text: bool = False,
+    profile: Optional[str] = None,
+    allow_downgrade: bool = True,
+    cancel_token: Optional[CancellationToken] = None,
+) -> SummarizeResponse:
+    """Résumés individuels + global (batches partagés avec les autres requêtes)"""
+    summarizer = search_engine_components["summarizer"]
+    scheduler = search_engine_components.get("generation_scheduler")
+    batch_fn = scheduler.summarize_batch if scheduler else summarizer.summarize_batch
+    profile, used = _resolve_profile(profile, allow_downgrade)
+    result = summarize_documents(
+        summarizer,
+        _with_full_text(articles) if full_text else articles,
+        profile=profile,
+        full_text=full_text,
+        batch_fn=partial(batch_fn, cancel_token=cancel_token),
+        time_budget_s=LONG_DOCUMENT_TIME_BUDGET_S or None,
+        generation_profile=used,
+    )
+    return SummarizeResponse(**result, profile_downgraded=used != profile)
+
+
+def _with_full_text(articles: List[dict]) -> List[dict]:
+    """Articles complétés par leur texte intégral lu dans le DocumentStore"""
+    document_store = _current_index().document_store
+    return [
+        {**article, "full_text": document_store.get_full_text(article.get("id"))}
+        if article.get("id")
+        else article
+        for article in articles
+    ]
+
+
+def _articles_for_ids(ids: List[str]) -> List[dict]:
+    """Articles lus dans le DocumentStore, dans l'ordre des IDs demandés"""
+    documents = _current_index().document_store.get_many(ids)
+    missing = [doc_id for doc_id in ids if doc_id not in documents]
+    if missing:
+        raise HTTPException(
+            status_code=404, detail=f"Documents introuvables: {', '.join(missing)}"
+        )
+    return [documents[doc_id] for doc_id in ids]
+
+
+async def _run_cancellable(http_request: Request, fn, *args):
+    """
+    Exécute `fn(*args, cancel_token=...)` dans le threadpool. Le jeton est
+    annulé si le client se déconnecte ou si une requête plus récente de la même
+    session (en-tête X-Session-ID) arrive : la génération s'arrête alors.
+    """
+    session_id = http_request.headers.get(SESSION_HEADER)
+    token = session_registry.begin(session_id)
+    task = asyncio.ensure_future(run_in_threadpool(fn, *args, cancel_token=token))
+    try:
+        while not task.done():
+            await asyncio.wait({task}, timeout=DISCONNECT_POLL_S)
+            if not task.done() and await http_request.is_disconnected():
+                session_registry.cancel(token, DISCONNECT)
+        return task.result()
+    except GenerationCancelled as e:
+        # 499 : convention nginx "client closed request" (le client est parti)
+        raise HTTPException(
+            status_code=409 if e.reason == SUPERSEDED else 499, detail=str(e)
+        )
+    finally:
+        session_registry.end(session_id, token)
 
 
 @app.post("/summarize", response_model=SummarizeResponse)
-def summarize_articles(request: SummarizeRequest):
+async def summarize_articles(request: SummarizeRequest, http_request: Request):
     """
     Résume plusieurs articles individuellement et crée un résumé global.
+
+    Les articles sont fournis complets (`articles`) ou par identifiant (`ids`) :
+    dans ce cas leur texte est lu côté serveur. La génération est abandonnée
+    si le client se déconnecte ou envoie une nouvelle requête (même session).
     """
+    return await _run_cancellable(http_request, _summarize_request, request)
+
+
+def _summarize_request(
+    request: SummarizeRequest, cancel_token: Optional[CancellationToken] = None
+) -> SummarizeResponse:
     summarizer = search_engine_components.get("summarizer")
 
     if not summarizer:
@@ -254,10 +1047,365 @@ def summarize_articles(request: SummarizeRequest):
             detail="Le modèle de résumé n'est pas disponible. Vérifiez que le modèle LoRA est chargé.",
         )
 
+    articles = _articles_for_ids(request.ids) if request.ids else request.articles
+    if not articles:
+        raise HTTPException(status_code=422, detail="Fournir `articles` ou `ids`.")
+
     # Générer les résumés
-    result = summarizer.summarize_multiple(request.articles)
+    return _summarize(
+        articles,
+        full_text=request.full_text,
+        profile=request.profile,
+        allow_downgrade=request.allow_downgrade,
+        cancel_token=cancel_token,
+    )
+
+
+@app.post("/search_and_summarize", response_model=SearchAndSummarizeResponse)
+async def search_and_summarize(
+    request: SearchAndSummarizeRequest, http_request: Request
+):
+    """
+    Recherche puis résumé des meilleurs résultats en un seul appel : les
+    articles re-rankés sont résumés dès la fin du re-ranking, sans renvoyer
+    leurs abstracts au client puis au serveur.
+    """
+    return await _run_cancellable(http_request, _search_and_summarize, request)
+
+
+def _search_and_summarize(
+    request: SearchAndSummarizeRequest,
+    cancel_token: Optional[CancellationToken] = None,
+) -> SearchAndSummarizeResponse:
+    started_at = time.perf_counter()
+    search_response = search(request)
+
+    summaries = None
+    if search_engine_components.get("summarizer") and search_response.results:
+        top_results = search_response.results[: request.summarize_top or None]
+        summarize_start = time.perf_counter()
+        summaries = _summarize(
+            [r.model_dump() for r in top_results],
+            full_text=request.full_text,
+            profile=request.profile,
+            allow_downgrade=request.allow_downgrade,
+            cancel_token=cancel_token,
+        )
+        summarize_ms = (time.perf_counter() - summarize_start) * 1000.0
+    else:
+        summarize_ms = 0.0
+
+    return SearchAndSummarizeResponse(
+        **search_response.model_dump(exclude={"timings_ms"}),
+        timings_ms={
+            **search_response.timings_ms,
+            "summarize": summarize_ms,
+            "total": (time.perf_counter() - started_at) * 1000.0,
+        },
+        summaries=summaries,
+    )
+
+
+def _sse(event: str, data: dict) -> str:
+    """Un événement Server-Sent Events"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def _require_summarizer(request=None):
+    if not search_engine_components.get("summarizer"):
+        raise HTTPException(
+            status_code=503,
+            detail="Le modèle de résumé n'est pas disponible. Vérifiez que le modèle LoRA est chargé.",
+        )
+    if request is not None and request.full_text:
+        raise HTTPException(
+            status_code=422,
+            detail="`full_text` n'est pas disponible en streaming.",
+        )
 
-    return SummarizeResponse(**result)
+
+def _summary_events(
+    articles: List[dict],
+    stream_tokens: bool,
+    started_at: float,
+    profile: tuple,
+    cancel_token: Optional[CancellationToken] = None,
+):
+    """
+    Événements SSE des résumés : `individual` (un par article, dès qu'il est
+    prêt), `token` (morceaux du résumé global si stream_tokens), `global`,
+    puis `done` avec le délai avant le premier résumé et le profil utilisé.
+    Si la requête est remplacée par une plus récente : `cancelled`.
+
+    Args:
+        profile: (profil demandé, profil de génération) de `_resolve_profile`
+    """
+    summarizer = search_engine_components["summarizer"]
+    scheduler = search_engine_components["generation_scheduler"]
+    first_summary_ms = None
+    try:
+        for kind, position, payload in summarizer.iter_summaries(
+            articles,
+            submit_fn=partial(scheduler.submit, cancel_token=cancel_token),
+            stream_fn=(
+                partial(scheduler.submit_stream, cancel_token=cancel_token)
+                if stream_tokens
+                else None
+            ),
+            profile=profile[0],
+            generation_profile=profile[1],
+        ):
+            if kind == "individual":
+                if first_summary_ms is None:
+                    first_summary_ms = (time.perf_counter() - started_at) * 1000.0
+                    stream_first_summary_ms.append(first_summary_ms)
+                yield _sse("individual", {"position": position, **payload})
+            elif kind == "token":
+                yield _sse("token", {"text": payload})
+            else:
+                yield _sse("global", {"global_summary": payload})
+    except GenerationCancelled as e:
+        yield _sse("cancelled", {"reason": e.reason})
+        return
+    except Exception as e:
+        yield _sse("error", {"detail": str(e)})
+        return
+
+    yield _sse(
+        "done",
+        {
+            "total_articles": len(articles),
+            "time_to_first_summary_ms": first_summary_ms,
+            "total_ms": (time.perf_counter() - started_at) * 1000.0,
+            "profile": profile[1],
+            "profile_downgraded": profile[1] != profile[0],
+        },
+    )
+
+
+async def _cancellable_stream(events, session_id: Optional[str], token):
+    """
+    Sert les événements SSE depuis le threadpool. Si le flux est interrompu
+    (client déconnecté), le jeton est annulé et la génération s'arrête.
+    """
+    completed = False
+    try:
+        async for chunk in iterate_in_threadpool(events):
+            yield chunk
+        completed = True
+    finally:
+        if not completed:
+            session_registry.cancel(token, DISCONNECT)
+        session_registry.end(session_id, token)
+
+
+@app.post("/summarize/stream")
+def summarize_articles_stream(request: SummarizeStreamRequest, http_request: Request):
+    """
+    Variante en streaming (Server-Sent Events) de /summarize : chaque résumé
+    individuel est envoyé dès qu'il est généré, puis le résumé global.
+    """
+    started_at = time.perf_counter()
+    _require_summarizer(request)
+    articles = _articles_for_ids(request.ids) if request.ids else request.articles
+    if not articles:
+        raise HTTPException(status_code=422, detail="Fournir `articles` ou `ids`.")
+
+    profile = _resolve_profile(request.profile, request.allow_downgrade)
+    session_id = http_request.headers.get(SESSION_HEADER)
+    token = session_registry.begin(session_id)
+
+    events = _summary_events(
+        articles, request.stream_tokens, started_at, profile, token
+    )
+    return StreamingResponse(
+        _cancellable_stream(events, session_id, token),
+        media_type="text/event-stream",
+    )
+
+
+@app.post("/search_and_summarize/stream")
+def search_and_summarize_stream(
+    request: SearchAndSummarizeStreamRequest, http_request: Request
+):
+    """
+    Variante en streaming de /search_and_summarize : un événement `results`
+    (résultats de recherche), puis les événements de /summarize/stream.
+    """
+    started_at = time.perf_counter()
+    _require_summarizer(request)
+    search_response = search(request)
+    top_results = search_response.results[: request.summarize_top or None]
+    profile = _resolve_profile(request.profile, request.allow_downgrade)
+    session_id = http_request.headers.get(SESSION_HEADER)
+    token = session_registry.begin(session_id)
+
+    def events():
+        yield _sse("results", search_response.model_dump())
+        if top_results:
+            yield from _summary_events(
+                [r.model_dump() for r in top_results],
+                request.stream_tokens,
+                started_at,
+                profile,
+                token,
+            )
+        else:
+            yield _sse("done", {"total_articles": 0})
+
+    return StreamingResponse(
+        _cancellable_stream(events(), session_id, token),
+        media_type="text/event-stream",
+    )
+
+
+def _require_job_store() -> JobStore:
+    job_store = search_engine_components.get("job_store")
+    if job_store is None:
+        raise HTTPException(
+            status_code=503,
+            detail="File de jobs de résumé désactivée (SUMMARY_JOB_WORKERS=0).",
+        )
+    return job_store
+
+
+def _job_response(job_store: JobStore, job_id: str) -> SummaryJobResponse:
+    # Workers tous arrêtés : le job en file échoue au lieu d'attendre sans fin
+    search_engine_components["job_pool"].fail_queued_if_dead(job_store)
+    job = job_store.get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=404, detail=f"Job introuvable ou expiré: {job_id}"
+        )
+    return SummaryJobResponse(job_id=job.pop("id"), **job)
+
+
+@app.post("/summarize/jobs", response_model=SummaryJobResponse, status_code=202)
+def submit_summary_job(request: SummarizeRequest):
+    """
+    Variante asynchrone de /summarize : le job est mis en file et traité par un
+    processus worker ; la réponse contient l'identifiant à interroger.
+    """
+    job_store = _require_job_store()
+    if search_engine_components["job_pool"].alive() == 0:
+        raise HTTPException(
+            status_code=503,
+            detail="Aucun worker de résumé actif (voir /health, summary_jobs).",
+        )
+    articles = _articles_for_ids(request.ids) if request.ids else request.articles
+    if not articles:
+        raise HTTPException(status_code=422, detail="Fournir `articles` ou `ids`.")
+    # Les workers ont leur propre modèle : pas d'abaissement selon la file locale
+    # (ni de statistiques de profils, qui portent sur les résumés synchrones)
+    profile = _check_profile(request.profile)
+
+    job_store.purge_expired()
+    job_id = job_store.submit(
+        {
+            "articles": _with_full_text(articles) if request.full_text else articles,
+            "profile": profile,
+            "full_text": request.full_text,
+            "time_budget_s": LONG_DOCUMENT_TIME_BUDGET_S or None,
+        }
+    )
+    return _job_response(job_store, job_id)
+
+
+@app.get("/summarize/jobs/{job_id}", response_model=SummaryJobResponse)
+async def get_summary_job(job_id: str, wait_s: float = 0.0):
+    """
+    État et résultat d'un job. Avec `wait_s` (long-polling, 60 s max), la
+    réponse attend que le job soit terminé ou que le délai soit écoulé.
+    """
+    job_store = _require_job_store()
+    deadline = time.perf_counter() + min(max(0.0, wait_s), SUMMARY_JOB_MAX_WAIT_S)
+    # Lectures SQLite (bloquantes) dans le threadpool ; l'attente entre deux
+    # lectures est asynchrone et n'occupe aucun thread
+    response = await run_in_threadpool(_job_response, job_store, job_id)
+    while response.status not in FINAL_STATES and time.perf_counter() < deadline:
+        await asyncio.sleep(0.1)
+        response = await run_in_threadpool(_job_response, job_store, job_id)
+    return response
+
+
+@app.delete("/summarize/jobs/{job_id}", response_model=SummaryJobResponse)
+def cancel_summary_job(job_id: str):
+    """Annule un job en file ou en cours (sans effet sur un job terminé)"""
+    job_store = _require_job_store()
+    if job_store.cancel(job_id) is None:
+        raise HTTPException(
+            status_code=404, detail=f"Job introuvable ou expiré: {job_id}"
+        )
+    return _job_response(job_store, job_id)
+
+
+def _require_admin(http_request: Request):
+    """Jeton ADMIN_TOKEN exigé s'il est défini, sinon client local uniquement"""
+    if ADMIN_TOKEN:
+        token = http_request.headers.get(ADMIN_TOKEN_HEADER, "")
+        if not secrets.compare_digest(token, ADMIN_TOKEN):
+            raise HTTPException(
+                status_code=403, detail="Jeton d'administration invalide."
+            )
+    elif http_request.client is None or http_request.client.host not in (
+        "127.0.0.1",
+        "::1",
+        "localhost",
+    ):
+        raise HTTPException(
+            status_code=403,
+            detail="Réservé à la machine locale (ou définir ADMIN_TOKEN).",
+        )
+
+
+@app.post("/reload")
+def reload_index(http_request: Request):
+    """
+    Recharge l'index FAISS, le mapping et le corpus depuis le disque
+    (après une réindexation) et invalide les caches de recherche.
+    Protégé : en-tête X-Admin-Token (si ADMIN_TOKEN est défini) ou client local.
+    """
+    _require_admin(http_request)
+    load_index_and_corpus()
+    snapshot = _current_index()
+    return {
+        "status": "reloaded",
+        "index_version": snapshot.version,
+        "total_documents": len(snapshot.document_store),
+    }
+
+
+def _profile_stats() -> dict:
+    """Profils utilisés par les requêtes de résumé récentes"""
+    recent = list(recent_profiles)
+    used = {name: 0 for name in PROFILE_ORDER}
+    for _, profile in recent:
+        used[profile] += 1
+    downgraded = sum(1 for requested, profile in recent if requested != profile)
+    return {
+        "default": SUMMARIZER_DEFAULT_PROFILE,
+        "downgrade_queue_depth": SUMMARIZER_DOWNGRADE_QUEUE_DEPTH,
+        "used": used,
+        "downgrade_rate": (downgraded / len(recent)) if recent else 0.0,
+        "samples": len(recent),
+    }
+
+
+def _job_stats() -> Optional[dict]:
+    job_store = search_engine_components.get("job_store")
+    if job_store is None:
+        return None
+    return {
+        "workers_alive": search_engine_components["job_pool"].alive(),
+        **job_store.stats(),
+    }
+
+
+def _compression_stats() -> Optional[dict]:
+    summarizer = search_engine_components.get("summarizer")
+    if summarizer is None or summarizer.compressor is None:
+        return None
+    return summarizer.compressor.stats()
 
 
 @app.get("/health")
@@ -265,6 +1413,7 @@ def health_check():
     """
     Vérification de l'état de l'API et de ses composants.
     """
+    snapshot = search_engine_components.get("index_snapshot")
     return {
         "status": "healthy",
         "search_engine": "loaded"
@@ -276,7 +1425,45 @@ def health_check():
         "summarizer": "loaded"
         if search_engine_components.get("summarizer")
         else "not loaded",
-        "total_documents": len(search_engine_components.get("documents_by_id", {})),
+        "total_documents": len(snapshot.document_store) if snapshot else 0,
+        "query_batcher": search_engine_components["batcher"].stats()
+        if search_engine_components.get("batcher")
+        else None,
+        "generation_scheduler": search_engine_components[
+            "generation_scheduler"
+        ].stats()
+        if search_engine_components.get("generation_scheduler")
+        else None,
+        "cascade": {
+            "enabled": cascade_settings.enabled,
+            **cascade_stats.stats(),
+        },
+        "summarizer_compression": _compression_stats(),
+        "generation_profiles": _profile_stats(),
+        "summary_jobs": _job_stats(),
+        "cancellation": session_registry.stats(),
+        "summary_stream": {
+            "time_to_first_summary_ms": {
+                "p50": percentile(sorted(stream_first_summary_ms), 0.50),
+                "p95": percentile(sorted(stream_first_summary_ms), 0.95),
+            },
+            "samples": len(stream_first_summary_ms),
+        },
+        "summarizer_draft_model": SUMMARIZER_DRAFT_MODEL or None,
+        "encoder_backend": ENCODER_BACKEND,
+        "encoder_warmup_ms": search_engine_components.get("encoder_warmup_ms"),
+        "rerank_latency": rerank_latency.stats(),
+        "index_version": snapshot.version if snapshot else None,
+        "index_params": snapshot.params if snapshot else None,
+        "index_mmap": INDEX_MMAP,
+        "caches": {
+            "embeddings": embedding_cache.stats(),
+            "responses": response_cache.stats(),
+            "semantic": semantic_cache.stats(),
+            "summaries": search_engine_components["summary_store"].stats()
+            if search_engine_components.get("summary_store")
+            else None,
+        },
     }
 
 
@@ -288,7 +1475,12 @@ def root():
         "version": "2.1.0",
         "endpoints": {
             "/search": "Recherche sémantique avec Re-Ranking",
-            "/summarize": "Résumé multi-documents avec IA",
+            "/search/batch": "Recherche groupée (plusieurs requêtes en un appel)",
+            "/summarize": "Résumé multi-documents avec IA (articles ou IDs)",
+            "/search_and_summarize": "Recherche + résumé des meilleurs résultats",
+            "/summarize/stream": "Résumés en streaming (Server-Sent Events)",
+            "/search_and_summarize/stream": "Recherche + résumés en streaming (SSE)",
+            "/reload": "Recharge l'index et le corpus (invalide les caches)",
             "/health": "Statut de l'API",
             "/docs": "Documentation interactive",
         },
@@ -0,0 +1,16 @@
+"""
+Quantification dynamique int8 partagée par le résumeur et les encodeurs (CPU)
+"""
+
+import torch
+
+
+def quantize_linear_int8(model: torch.nn.Module) -> torch.nn.Module:
+    """
+    Quantification dynamique int8 des couches Linear (poids int8, activations
+    quantifiées à la volée). CPU uniquement.
+    """
+    model.eval()
+    return torch.quantization.quantize_dynamic(
+        model, {torch.nn.Linear}, dtype=torch.qint8
+    )
@@ -0,0 +1,202 @@
+"""
+Re-Ranking en cascade : scores FAISS -> scoreur lexical léger -> Cross-Encoder
+"""
+
+import re
+import threading
+from typing import List, Optional, Tuple
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def candidate_text(candidate: dict) -> str:
+    """Texte d'un candidat tel que présenté au Cross-Encoder"""
+    doc = candidate["doc"]
+    return (doc.get("title") or "") + ". " + (doc.get("abstract") or "")
+
+
+class CascadeSettings:
+    """
+    Paramètres de la cascade de re-ranking.
+
+    La profondeur de chaque étage s'adapte à l'écart de score entre les
+    candidats : on garde tous ceux dont le score est à moins de `margin` du
+    k-ième meilleur. Une requête nette (gros écart après le top_k) envoie peu
+    de candidats au Cross-Encoder, une requête ambiguë en envoie davantage.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        max_depth_factor: int = 5,
+        faiss_margin: float = 0.05,
+        cheap_scorer: bool = True,
+        cheap_margin: float = 0.05,
+        cheap_weight: float = 0.1,
+        rerank_depth: Optional[int] = None,
+    ):
+        """
+        Args:
+            enabled: False = comportement historique (tout re-ranker, top_k x 3)
+            max_depth_factor: Candidats FAISS récupérés au maximum (x top_k)
+            faiss_margin: Marge de score FAISS (cosinus) de l'étage 1
+            cheap_scorer: Active l'étage 2 (recouvrement lexical requête/document)
+            cheap_margin: Marge sur le score combiné de l'étage 2
+            cheap_weight: Poids du score lexical ajouté au score FAISS
+            rerank_depth: Nombre fixe de candidats envoyés au Cross-Encoder
+                (désactive la profondeur adaptative)
+        """
+        self.enabled = enabled
+        self.max_depth_factor = max(1, int(max_depth_factor))
+        self.faiss_margin = faiss_margin
+        self.cheap_scorer = cheap_scorer
+        self.cheap_margin = cheap_margin
+        self.cheap_weight = cheap_weight
+        self.rerank_depth = rerank_depth
+
+    def override(
+        self,
+        enabled: Optional[bool] = None,
+        rerank_depth: Optional[int] = None,
+        margin: Optional[float] = None,
+        cheap_scorer: Optional[bool] = None,
+    ) -> "CascadeSettings":
+        """Copie des paramètres avec les surcharges d'une requête"""
+        return CascadeSettings(
+            enabled=self.enabled if enabled is None else enabled,
+            max_depth_factor=self.max_depth_factor,
+            faiss_margin=self.faiss_margin if margin is None else margin,
+            cheap_scorer=self.cheap_scorer if cheap_scorer is None else cheap_scorer,
+            cheap_margin=self.cheap_margin if margin is None else margin,
+            cheap_weight=self.cheap_weight,
+            rerank_depth=self.rerank_depth if rerank_depth is None else rerank_depth,
+        )
+
+    def fetch_k(self, top_k: int) -> int:
+        """Nombre de candidats à demander à FAISS"""
+        if not self.enabled:
+            return top_k * 3
+        return max(top_k * self.max_depth_factor, self.rerank_depth or 0)
+
+
+def adaptive_depth(
+    sorted_scores: List[float], top_k: int, margin: float, max_depth: int
+) -> int:
+    """
+    Nombre de candidats à garder parmi des scores triés par ordre décroissant :
+    au moins top_k, puis tous ceux à moins de `margin` du k-ième score.
+    """
+    n = len(sorted_scores)
+    if n <= top_k:
+        return n
+    threshold = sorted_scores[top_k - 1] - margin
+    depth = top_k
+    while depth < min(n, max_depth) and sorted_scores[depth] >= threshold:
+        depth += 1
+    return depth
+
+
+def lexical_overlap(query_terms: set, text: str) -> float:
+    """Part des termes de la requête présents dans le texte (scoreur léger)"""
+    if not query_terms:
+        return 0.0
+    doc_terms = set(_TOKEN_RE.findall(text.lower()))
+    return len(query_terms & doc_terms) / len(query_terms)
+
+
+def select_survivors(
+    query_text: str, candidates: List[dict], top_k: int, settings: CascadeSettings
+) -> Tuple[List[dict], dict]:
+    """
+    Étages 1 et 2 de la cascade : choisit les candidats envoyés au Cross-Encoder.
+
+    Returns:
+        (survivants, nombre de candidats restant après chaque étage)
+    """
+    counts = {"faiss": len(candidates)}
+    if not settings.enabled:
+        counts["survivors"] = len(candidates)
+        return candidates, counts
+
+    max_depth = settings.max_depth_factor * top_k
+    if settings.rerank_depth:
+        max_depth = max(settings.rerank_depth, top_k)
+
+    # Étage 1 : scores FAISS (déjà triés par l'index)
+    ranked = sorted(candidates, key=lambda c: c["initial_score"], reverse=True)
+    if settings.rerank_depth:
+        depth = min(len(ranked), max_depth)
+    else:
+        depth = adaptive_depth(
+            [c["initial_score"] for c in ranked], top_k, settings.faiss_margin, max_depth
+        )
+    survivors = ranked[:depth]
+    counts["stage1"] = len(survivors)
+
+    # Étage 2 (optionnel) : score FAISS + recouvrement lexical
+    if settings.cheap_scorer and not settings.rerank_depth and len(survivors) > top_k:
+        query_terms = {t for t in _TOKEN_RE.findall(query_text.lower()) if len(t) > 2}
+        for c in survivors:
+            c["cheap_score"] = c["initial_score"] + settings.cheap_weight * (
+                lexical_overlap(query_terms, candidate_text(c))
+            )
+        survivors.sort(key=lambda c: c["cheap_score"], reverse=True)
+        depth = adaptive_depth(
+            [c["cheap_score"] for c in survivors],
+            top_k,
+            settings.cheap_margin,
+            len(survivors),
+        )
+        survivors = survivors[:depth]
+        counts["stage2"] = len(survivors)
+
+    counts["survivors"] = len(survivors)
+    return survivors, counts
+
+
+def cascade_rerank(
+    query_text: str,
+    candidates: List[dict],
+    top_k: int,
+    reranker,
+    settings: CascadeSettings,
+) -> Tuple[List[dict], dict]:
+    """
+    Cascade complète pour une requête (utilisée par les benchmarks) :
+    sélection des survivants puis Cross-Encoder sur ceux-ci uniquement.
+    """
+    survivors, counts = select_survivors(query_text, candidates, top_k, settings)
+    if survivors:
+        scores = reranker.predict([[query_text, candidate_text(c)] for c in survivors])
+        for c, score in zip(survivors, scores):
+            c["rerank_score"] = float(score)
+    ranked = sorted(survivors, key=lambda c: c["rerank_score"], reverse=True)
+    return ranked[:top_k], counts
+
+
+class CascadeStats:
+    """Compteurs d'appels au Cross-Encoder économisés par la cascade"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.queries = 0
+        self.candidates = 0
+        self.reranked = 0
+
+    def record(self, counts: dict):
+        with self._lock:
+            self.queries += 1
+            self.candidates += counts["faiss"]
+            self.reranked += counts["survivors"]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "queries": self.queries,
+                "candidates_fetched": self.candidates,
+                "pairs_reranked": self.reranked,
+                "pairs_saved": self.candidates - self.reranked,
+                "avg_rerank_depth": (self.reranked / self.queries)
+                if self.queries
+                else 0.0,
+            }
@@ -2,50 +2,446 @@
 Module de résumé avec le modèle LoRA fine-tuné
 """
 
-from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+from transformers import AutoTokenizer, AutoModelForSeq2SeqLM, TextIteratorStreamer
 from peft import PeftModel, PeftConfig
 import torch
-from typing import List, Optional
+import hashlib
+import io
+import os
+import time
+from concurrent.futures import Future, as_completed
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from .cancellation import CancellationToken, cancellation_criteria
+from .compression import ExtractiveCompressor
+from .quantization import quantize_linear_int8
+from .summary_store import summary_key
+
+# Longueur maximale (en tokens) des entrées du modèle BART
+MAX_INPUT_TOKENS = 1024
+
+# Paramètres de `summarize_batch` / `summarize_single` quand ils ne sont pas précisés
+DEFAULT_GENERATION_PARAMS = {
+    "max_length": 150,
+    "min_length": 50,
+    "num_beams": 4,
+    "length_penalty": 2.0,
+}
+
+# Paramètres des résumés individuels de `summarize_multiple` (et du pré-résumé)
+INDIVIDUAL_MAX_LENGTH = 120
+INDIVIDUAL_MIN_LENGTH = 40
+
+
+def generation_kwargs(
+    max_length: int, min_length: int, num_beams: int, length_penalty: float
+) -> dict:
+    # Génération avec paramètres anti-répétition (Technique 1)
+    return {
+        "max_length": max_length,
+        "min_length": min_length,
+        "length_penalty": length_penalty,
+        "num_beams": num_beams,
+        "no_repeat_ngram_size": 3,  # Empêche les répétitions de 3 mots
+        "repetition_penalty": 1.2,  # Punit les répétitions
+        "early_stopping": True,
+    }
+
+
+def cache_key(text: str, model_version: str, **params) -> str:
+    """Clé du cache persistant pour un texte et des paramètres de génération"""
+    full_params = {**DEFAULT_GENERATION_PARAMS, **params}
+    return summary_key(text, model_version, generation_kwargs(**full_params))
+
+
+# Paramètres du résumé global (synthèse des résumés individuels)
+GLOBAL_MAX_LENGTH = 250
+GLOBAL_SUMMARY_PARAMS = {
+    "min_length": 100,
+    "num_beams": 5,  # Qualité maximale pour le résumé final
+    "length_penalty": 2.5,
+}
+
+# Profils de génération, du moins coûteux au plus coûteux : paramètres des
+# résumés individuels et du résumé global. "balanced" reprend les paramètres
+# historiques (mêmes clés de cache que le pré-résumé du corpus).
+GENERATION_PROFILES = {
+    "fast": {
+        "individual": {
+            "max_length": 80,
+            "min_length": 30,
+            "num_beams": 1,  # Recherche gloutonne
+            "length_penalty": 1.0,
+        },
+        "global": {
+            "max_length": 160,
+            "min_length": 60,
+            "num_beams": 2,
+            "length_penalty": 1.5,
+        },
+    },
+    "balanced": {
+        "individual": {
+            "max_length": INDIVIDUAL_MAX_LENGTH,
+            "min_length": INDIVIDUAL_MIN_LENGTH,
+            "num_beams": DEFAULT_GENERATION_PARAMS["num_beams"],
+            "length_penalty": DEFAULT_GENERATION_PARAMS["length_penalty"],
+        },
+        "global": {"max_length": GLOBAL_MAX_LENGTH, **GLOBAL_SUMMARY_PARAMS},
+    },
+    "quality": {
+        "individual": {
+            "max_length": 150,
+            "min_length": 50,
+            "num_beams": 6,
+            "length_penalty": 2.0,
+        },
+        "global": {
+            "max_length": 300,
+            "min_length": 120,
+            "num_beams": 6,
+            "length_penalty": 2.5,
+        },
+    },
+}
+PROFILE_ORDER = ("fast", "balanced", "quality")
+DEFAULT_PROFILE = "balanced"
+
+
+def profile_params(profile: str, stage: str, max_length: Optional[int] = None) -> dict:
+    """
+    Paramètres de génération d'un profil pour une étape ("individual" ou
+    "global"), avec éventuellement une longueur maximale imposée
+    """
+    params = dict(GENERATION_PROFILES[profile][stage])
+    if max_length is not None:
+        params["max_length"] = max_length
+    return params
+
+
+def fallback_profile_params(
+    profile: str,
+    generation_profile: Optional[str],
+    stage: str,
+    max_length: Optional[int] = None,
+) -> Optional[dict]:
+    """Paramètres du profil abaissé, None s'il n'y a pas d'abaissement"""
+    if generation_profile is None or generation_profile == profile:
+        return None
+    return profile_params(generation_profile, stage, max_length)
+
+
+def downgrade_profile(profile: str, steps: int = 1) -> str:
+    """Profil `steps` crans moins coûteux (borné au plus rapide)"""
+    index = PROFILE_ORDER.index(profile)
+    return PROFILE_ORDER[max(0, index - max(0, steps))]
+
+
+def individual_summary(article: dict, summary: str) -> dict:
+    return {
+        "id": article.get("id"),
+        "title": article.get("title"),
+        "summary": summary,
+        "source": article.get("source"),
+        "url": article.get("url"),
+    }
+
+
+def build_synthesis_prompt(
+    summaries: List[str], compress_fn: Optional[Callable[[str], str]] = None
+) -> str:
+    combined_text = " ".join(
+        [f"Source {i + 1}: {summary}" for i, summary in enumerate(summaries)]
+    )
+    if compress_fn is not None:
+        combined_text = compress_fn(combined_text)
+    # Prompt spécifique pour la synthèse
+    return (
+        "Synthesize these summaries into a single coherent technical overview:"
+        f"\n\n{combined_text}"
+    )
+
+
+def article_text(
+    article: dict, compress_fn: Optional[Callable[[str], str]] = None
+) -> str:
+    """Texte d'un article présenté au modèle (titre + abstract pour le contexte)"""
+    content = article.get("abstract", "")
+    if compress_fn is not None and content:
+        content = compress_fn(content)
+    return f"Title: {article.get('title', '')}\nContent: {content}"
+
+
+def compute_model_version(model_path: str, quantized: bool = False) -> str:
+    """
+    Empreinte des fichiers du modèle (noms, tailles, dates) : change quand les
+    adaptateurs ou le checkpoint sont ré-entraînés. La quantification, qui
+    modifie les sorties, en fait partie.
+    """
+    signature = [os.path.basename(os.path.normpath(model_path))]
+    if os.path.isdir(model_path):
+        for name in sorted(os.listdir(model_path)):
+            stat = os.stat(os.path.join(model_path, name))
+            signature.append(f"{name}:{stat.st_size}:{int(stat.st_mtime)}")
+    if quantized:
+        signature.append("int8")
+    return hashlib.sha1("|".join(signature).encode("utf-8")).hexdigest()[:12]
+
+
+def is_adapter_checkpoint(model_path: str) -> bool:
+    """True si le dossier contient des adaptateurs LoRA (et non un modèle fusionné)"""
+    return os.path.exists(os.path.join(model_path, "adapter_config.json"))
+
+
+def load_seq2seq_model(model_path: str, merge_adapter: bool = False):
+    """
+    Charge le modèle de résumé depuis un dossier d'adaptateurs LoRA
+    (modèle de base + PEFT) ou depuis un checkpoint déjà fusionné.
+
+    Args:
+        merge_adapter: Fusionne les poids LoRA dans le modèle de base et retire
+            le wrapper PEFT (plus de matmuls low-rank à chaque forward)
+
+    Returns:
+        (modèle, True si le modèle servi n'a pas de couches d'adaptateurs)
+    """
+    if not is_adapter_checkpoint(model_path):
+        # Checkpoint fusionné (scripts/merge_lora.py) : chargement direct
+        return AutoModelForSeq2SeqLM.from_pretrained(model_path), True
+
+    # Charger la configuration LoRA
+    config = PeftConfig.from_pretrained(model_path)
+
+    # Charger le modèle de base
+    base_model = AutoModelForSeq2SeqLM.from_pretrained(config.base_model_name_or_path)
+
+    # Charger les adaptateurs LoRA
+    model = PeftModel.from_pretrained(base_model, model_path)
+
+    if merge_adapter:
+        return model.merge_and_unload(), True
+    return model, False
+
+
+def load_draft_model(draft_model_path: str, tokenizer):
+    """
+    Modèle brouillon du décodage assisté (petit seq2seq distillé, ex.
+    distilbart-cnn-12-6). Il doit partager le vocabulaire du modèle de résumé :
+    ses propositions sont vérifiées token par token par le modèle LoRA.
+    """
+    draft_tokenizer = AutoTokenizer.from_pretrained(draft_model_path)
+    if draft_tokenizer.get_vocab() != tokenizer.get_vocab():
+        raise ValueError(
+            f"Le modèle brouillon {draft_model_path} n'a pas le vocabulaire "
+            "du modèle de résumé"
+        )
+    return AutoModelForSeq2SeqLM.from_pretrained(draft_model_path)
+
+
+def model_size_mb(model) -> float:
+    """Taille des poids sérialisés (inclut les poids int8 packés)"""
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return buffer.getbuffer().nbytes / (1024 * 1024)
+
+
+def save_merged_checkpoint(adapter_path: str, output_path: str):
+    """Écrit un checkpoint fusionné (modèle de base + LoRA) et son tokenizer"""
+    model, _ = load_seq2seq_model(adapter_path, merge_adapter=True)
+    model.save_pretrained(output_path)
+    AutoTokenizer.from_pretrained(adapter_path).save_pretrained(output_path)
 
 
 class LoRASummarizer:
     """Classe pour gérer le résumé avec le modèle LoRA"""
 
-    def __init__(self, model_path: str):
+    def __init__(
+        self,
+        model_path: str,
+        max_batch_tokens: int = 16384,
+        merge_adapter: bool = False,
+        quantize: bool = False,
+        summary_store=None,
+        draft_model_path: Optional[str] = None,
+    ):
         """
         Initialise le résumeur avec le modèle LoRA
 
         Args:
-            model_path: Chemin vers le dossier du modèle LoRA
+            model_path: Chemin vers le dossier du modèle LoRA (adaptateurs)
+                ou vers un checkpoint fusionné
+            max_batch_tokens: Budget de tokens d'un batch de génération
+                (séquences x beams x (entrée + sortie)), pour borner la mémoire
+            merge_adapter: Fusionne les adaptateurs dans les poids au chargement
+            quantize: Quantification dynamique int8 des couches Linear (CPU),
+                après fusion des adaptateurs
+            summary_store: SummaryStore consulté avant chaque génération
+            draft_model_path: Modèle brouillon du décodage assisté, utilisé pour
+                les générations gloutonnes (num_beams=1) ; sans effet sur le
+                résultat, seulement sur la vitesse
         """
         print(f"🤖 Chargement du modèle de résumé depuis {model_path}...")
 
-        try:
-            # Charger la configuration LoRA
-            config = PeftConfig.from_pretrained(model_path)
+        self.max_batch_tokens = max_batch_tokens
+        self.summary_store = summary_store
+        # Pré-compression extractive des entrées (voir attach_compressor)
+        self.compressor = None
 
-            # Charger le modèle de base
-            base_model = AutoModelForSeq2SeqLM.from_pretrained(
-                config.base_model_name_or_path
+        try:
+            # Les couches LoRA ne sont pas des nn.Linear standards : on fusionne
+            # avant de quantifier
+            self.model, self.merged = load_seq2seq_model(
+                model_path, merge_adapter or quantize
             )
 
-            # Charger les adaptateurs LoRA
-            self.model = PeftModel.from_pretrained(base_model, model_path)
-
             # Charger le tokenizer
             self.tokenizer = AutoTokenizer.from_pretrained(model_path)
 
-            # Détecter le device
-            self.device = "cuda" if torch.cuda.is_available() else "cpu"
+            # Détecter le device (les noyaux int8 dynamiques sont CPU uniquement)
+            self.quantized = quantize
+            self.model_version = compute_model_version(model_path, quantize)
+            if quantize:
+                self.device = "cpu"
+                self.model.eval()
+                self.model = quantize_linear_int8(self.model)
+            else:
+                self.device = "cuda" if torch.cuda.is_available() else "cpu"
             self.model.to(self.device)
             self.model.eval()
 
-            print(f"✅ Modèle chargé sur {self.device.upper()}")
+            # Décodage assisté (optionnel)
+            self.draft_model = None
+            self.draft_model_path = draft_model_path
+            if draft_model_path:
+                self.draft_model = load_draft_model(draft_model_path, self.tokenizer)
+                self.draft_model.eval()
+                if quantize:
+                    self.draft_model = quantize_linear_int8(self.draft_model)
+                self.draft_model.to(self.device)
+                self.draft_model.eval()
+                print(f"✅ Modèle brouillon chargé ({draft_model_path})")
+
+            print(
+                f"✅ Modèle chargé sur {self.device.upper()} "
+                f"({'fusionné' if self.merged else 'adaptateurs LoRA'}"
+                f"{', int8' if self.quantized else ''})"
+            )
 
         except Exception as e:
             print(f"❌ Erreur lors du chargement du modèle: {e}")
             raise
 
+    @staticmethod
+    def build_prompt(text: str) -> str:
+        # Technique 2: Prompt Engineering (Contextualisation)
+        return f"Summarize the following technical article concisely:\n\n{text}"
+
+    _generation_kwargs = staticmethod(generation_kwargs)
+
+    def _tokenize_prompts(self, texts: List[str]) -> List[List[int]]:
+        """Tokenise les prompts sans padding (tronqués à MAX_INPUT_TOKENS)"""
+        return self.tokenizer(
+            [self.build_prompt(text) for text in texts],
+            max_length=MAX_INPUT_TOKENS,
+            truncation=True,
+        )["input_ids"]
+
+    def _generate_batch(self, token_lists: List[List[int]], **gen_kwargs) -> List[str]:
+        """
+        Un seul appel à `generate` pour plusieurs prompts déjà tokenisés.
+        Padding dynamique à la plus longue séquence du batch.
+        """
+        assisted = self.draft_model is not None and gen_kwargs.get("num_beams") == 1
+        if assisted and len(token_lists) == 1:
+            # Le décodage assisté ne traite qu'une séquence par appel : au-delà,
+            # le batch glouton est plus rapide que des appels assistés en série
+            return [
+                self.tokenizer.decode(
+                    self.generate_ids(token_lists[0], assisted=True, **gen_kwargs),
+                    skip_special_tokens=True,
+                )
+            ]
+
+        inputs = self.tokenizer.pad(
+            {"input_ids": token_lists}, padding=True, return_tensors="pt"
+        ).to(self.device)
+
+        with torch.no_grad():
+            summary_ids = self.model.generate(
+                input_ids=inputs["input_ids"],
+                attention_mask=inputs["attention_mask"],
+                **gen_kwargs,
+            )
+
+        return self.tokenizer.batch_decode(summary_ids, skip_special_tokens=True)
+
+    def generate_ids(
+        self, token_ids: List[int], assisted: bool = False, **gen_kwargs
+    ) -> torch.Tensor:
+        """
+        IDs générés pour un seul prompt tokenisé. Avec `assisted`, le modèle
+        brouillon propose plusieurs tokens que le modèle LoRA valide en un seul
+        forward (recherche gloutonne uniquement : même sortie que sans brouillon).
+        """
+        if assisted:
+            if self.draft_model is None:
+                raise RuntimeError("Aucun modèle brouillon chargé (draft_model_path)")
+            gen_kwargs = {**gen_kwargs, "assistant_model": self.draft_model}
+
+        input_ids = torch.tensor([token_ids], device=self.device)
+        with torch.no_grad():
+            return self.model.generate(
+                input_ids=input_ids,
+                attention_mask=torch.ones_like(input_ids),
+                **gen_kwargs,
+            )[0]
+
+    def count_tokens(self, text: str) -> int:
+        return len(self.tokenizer(text, add_special_tokens=False)["input_ids"])
+
+    def attach_compressor(self, encode_fn: Callable, target_tokens: int):
+        """
+        Active la pré-compression extractive : les textes au-delà de
+        `target_tokens` sont réduits à leurs phrases les plus centrales avant
+        `generate` (le cache est indexé sur le texte compressé)
+        """
+        self.compressor = ExtractiveCompressor(
+            encode_fn, self.count_tokens, target_tokens=target_tokens
+        )
+
+    def _compress_fn(self) -> Optional[Callable[[str], str]]:
+        return self.compressor.compress if self.compressor else None
+
+    def build_streamer(self, timeout: float = 120.0):
+        """Itérateur de texte alimenté token par token pendant `generate`"""
+        return TextIteratorStreamer(
+            self.tokenizer, skip_prompt=True, skip_special_tokens=True, timeout=timeout
+        )
+
+    def _length_buckets(
+        self, token_lists: List[List[int]], num_beams: int, max_length: int
+    ) -> List[List[int]]:
+        """
+        Regroupe les séquences par longueur (limite le padding) en batches
+        dont le coût séquences x beams x (entrée + sortie) tient dans le budget.
+        Retourne des listes d'indices.
+        """
+        order = sorted(range(len(token_lists)), key=lambda i: len(token_lists[i]))
+        buckets = []
+        current = []
+        for i in order:
+            # Triées par longueur croissante : la dernière est la plus longue
+            candidate_cost = (
+                (len(current) + 1) * num_beams * (len(token_lists[i]) + max_length)
+            )
+            if current and candidate_cost > self.max_batch_tokens:
+                buckets.append(current)
+                current = []
+            current.append(i)
+        if current:
+            buckets.append(current)
+        return buckets
+
     def summarize_single(
         self,
         text: str,
@@ -53,85 +449,313 @@ class LoRASummarizer:
         min_length: int = 50,
         num_beams: int = 4,  # Augmenté pour la qualité
         length_penalty: float = 2.0,
+        cancel_token: Optional[CancellationToken] = None,
     ) -> str:
         """
         Résume un seul article avec des paramètres optimisés pour la qualité
+
+        Args:
+            cancel_token: Interrompt la génération dès qu'il est annulé
+                (lève GenerationCancelled)
         """
-        # Technique 2: Prompt Engineering (Contextualisation)
-        prompt = f"Summarize the following technical article concisely:\n\n{text}"
+        prompt = self.build_prompt(text)
 
         # Tokenizer
         inputs = self.tokenizer(
-            prompt, return_tensors="pt", max_length=1024, truncation=True
+            prompt, return_tensors="pt", max_length=MAX_INPUT_TOKENS, truncation=True
         ).to(self.device)
 
-        # Génération avec paramètres anti-répétition (Technique 1)
+        gen_kwargs = self._generation_kwargs(
+            max_length, min_length, num_beams, length_penalty
+        )
+        if cancel_token is not None:
+            cancel_token.raise_if_cancelled()
+            gen_kwargs["stopping_criteria"] = cancellation_criteria([cancel_token])
+
         with torch.no_grad():
             summary_ids = self.model.generate(
-                input_ids=inputs["input_ids"],
-                max_length=max_length,
-                min_length=min_length,
-                length_penalty=length_penalty,
-                num_beams=num_beams,
-                no_repeat_ngram_size=3,  # Empêche les répétitions de 3 mots
-                repetition_penalty=1.2,  # Punit les répétitions
-                early_stopping=True,
+                input_ids=inputs["input_ids"], **gen_kwargs
             )
+        if cancel_token is not None:
+            # Sortie tronquée par le critère d'arrêt : inutilisable
+            cancel_token.raise_if_cancelled()
 
         # Décoder
         summary = self.tokenizer.decode(summary_ids[0], skip_special_tokens=True)
         return summary
 
+    def summarize_batch(
+        self,
+        texts: List[str],
+        max_length: int = 150,
+        min_length: int = 50,
+        num_beams: int = 4,
+        length_penalty: float = 2.0,
+        cancel_token: Optional[CancellationToken] = None,
+    ) -> List[str]:
+        """
+        Résume plusieurs textes avec les mêmes paramètres que `summarize_single`,
+        en un `generate` par batch (batches groupés par longueur, bornés par
+        `max_batch_tokens`). Les résumés sont renvoyés dans l'ordre des textes.
+        """
+        if not texts:
+            return []
+
+        gen_kwargs = self._generation_kwargs(
+            max_length, min_length, num_beams, length_penalty
+        )
+        if cancel_token is not None:
+            gen_kwargs["stopping_criteria"] = cancellation_criteria([cancel_token])
+        token_lists = self._tokenize_prompts(texts)
+
+        summaries: List[Optional[str]] = [None] * len(texts)
+        for bucket in self._length_buckets(token_lists, num_beams, max_length):
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
+            outputs = self._generate_batch(
+                [token_lists[i] for i in bucket], **gen_kwargs
+            )
+            for i, summary in zip(bucket, outputs):
+                summaries[i] = summary
+        if cancel_token is not None:
+            cancel_token.raise_if_cancelled()
+        return summaries
+
+    def _summarize_sequential(self, texts: List[str], **params) -> List[str]:
+        """Un appel à `summarize_single` par texte (chemin non batché)"""
+        return [self.summarize_single(text, **params) for text in texts]
+
+    def _generate_cached(
+        self,
+        batch_fn: Callable[..., List[str]],
+        texts: List[str],
+        doc_ids: Optional[List[Optional[str]]] = None,
+        pinned: bool = False,
+        fallback_params: Optional[dict] = None,
+        **params,
+    ) -> List[str]:
+        """
+        `batch_fn(texts, **params)` en ne générant que les textes absents du
+        cache persistant (les nouveaux résumés y sont ajoutés).
+
+        Args:
+            fallback_params: Paramètres des résumés absents du cache (profil
+                abaissé) : le cache est d'abord consulté avec `params`, puis
+                les manquants sont cherchés / générés avec ces paramètres
+        """
+        if self.summary_store is None:
+            return batch_fn(texts, **(fallback_params or params))
+
+        doc_ids = doc_ids or [None] * len(texts)
+        keys, found = self._cache_lookup(texts, **params)
+
+        missing = [i for i, key in enumerate(keys) if key not in found]
+        if missing and fallback_params is not None:
+            generated = self._generate_cached(
+                batch_fn,
+                [texts[i] for i in missing],
+                doc_ids=[doc_ids[i] for i in missing],
+                pinned=pinned,
+                **fallback_params,
+            )
+            for i, summary in zip(missing, generated):
+                found[keys[i]] = summary
+        elif missing:
+            start = time.perf_counter()
+            generated = batch_fn([texts[i] for i in missing], **params)
+            per_item_ms = (time.perf_counter() - start) * 1000.0 / len(missing)
+            entries = []
+            for i, summary in zip(missing, generated):
+                found[keys[i]] = summary
+                entries.append((keys[i], doc_ids[i], summary, per_item_ms))
+            self._cache_store(entries, pinned=pinned, **params)
+
+        return [found[key] for key in keys]
+
+    def _cache_lookup(self, texts: List[str], **params):
+        """(clés, résumés déjà en cache par clé) ; cache vide si pas de store"""
+        keys = [cache_key(text, self.model_version, **params) for text in texts]
+        if self.summary_store is None:
+            return keys, {}
+        return keys, self.summary_store.get_many(keys)
+
+    def _cache_store(self, entries: list, pinned: bool = False, **params):
+        if self.summary_store is None:
+            return
+        key_params = generation_kwargs(**{**DEFAULT_GENERATION_PARAMS, **params})
+        self.summary_store.put_many(
+            entries, self.model_version, key_params, pinned=pinned
+        )
+
     def summarize_multiple(
         self,
         articles: List[dict],
-        individual_max_length: int = 120,
-        global_max_length: int = 250,
+        individual_max_length: Optional[int] = None,
+        global_max_length: Optional[int] = None,
+        batched: bool = True,
+        batch_fn: Optional[Callable[..., List[str]]] = None,
+        summaries: Optional[List[str]] = None,
+        profile: str = DEFAULT_PROFILE,
+        generation_profile: Optional[str] = None,
     ) -> dict:
         """
         Résume plusieurs articles avec une stratégie Map-Reduce améliorée
+
+        Args:
+            batched: Résume les articles en batch (sinon un `generate` par article)
+            batch_fn: Fonction de génération à utiliser à la place du modèle local
+                (même signature que `summarize_batch`, ex. GenerationScheduler)
+            summaries: Résumés individuels déjà calculés (ex. résumé
+                hiérarchique du texte intégral) : seule la synthèse est générée
+            profile: Profil de génération (GENERATION_PROFILES) ; les longueurs
+                maximales, si précisées, remplacent celles du profil
+            generation_profile: Profil des résumés absents du cache (profil
+                abaissé sous charge) ; le cache est d'abord consulté avec
+                `profile`, pour réutiliser les résumés déjà générés
         """
-        individual_summaries = []
+        if batch_fn is None:
+            batch_fn = self.summarize_batch if batched else self._summarize_sequential
 
         # 1. Résumer chaque article individuellement
-        for article in articles:
-            # On combine titre et abstract pour plus de contexte
-            text = f"Title: {article.get('title', '')}\nContent: {article.get('abstract', '')}"
-
-            summary = self.summarize_single(
-                text, max_length=individual_max_length, min_length=40
-            )
-            individual_summaries.append(
-                {
-                    "title": article.get("title"),
-                    "summary": summary,
-                    "source": article.get("source"),
-                    "url": article.get("url"),
-                }
+        # On combine titre et abstract pour plus de contexte
+        if summaries is None:
+            compress_fn = self._compress_fn()
+            texts = [article_text(article, compress_fn) for article in articles]
+            summaries = self._generate_cached(
+                batch_fn,
+                texts,
+                doc_ids=[article.get("id") for article in articles],
+                fallback_params=fallback_profile_params(
+                    profile, generation_profile, "individual", individual_max_length
+                ),
+                **profile_params(profile, "individual", individual_max_length),
             )
 
+        individual_summaries = [
+            individual_summary(article, summary)
+            for article, summary in zip(articles, summaries)
+        ]
+
         # 2. Créer un résumé global (Technique 3: Stratégie améliorée)
         # On utilise les résumés individuels comme base
-        combined_text = " ".join(
-            [
-                f"Source {i + 1}: {summ['summary']}"
-                for i, summ in enumerate(individual_summaries)
-            ]
-        )
-
-        # Prompt spécifique pour la synthèse
-        synthesis_prompt = f"Synthesize these summaries into a single coherent technical overview:\n\n{combined_text}"
+        synthesis_prompt = build_synthesis_prompt(summaries, self._compress_fn())
 
-        global_summary = self.summarize_single(
-            synthesis_prompt,
-            max_length=global_max_length,
-            min_length=100,
-            num_beams=5,  # Qualité maximale pour le résumé final
-            length_penalty=2.5,
-        )
+        global_summary = self._generate_cached(
+            batch_fn,
+            [synthesis_prompt],
+            fallback_params=fallback_profile_params(
+                profile, generation_profile, "global", global_max_length
+            ),
+            **profile_params(profile, "global", global_max_length),
+        )[0]
 
         return {
             "individual_summaries": individual_summaries,
             "global_summary": global_summary,
             "total_articles": len(articles),
+            "profile": generation_profile or profile,
+        }
+
+    def iter_summaries(
+        self,
+        articles: List[dict],
+        submit_fn: Callable[..., Future],
+        stream_fn: Optional[Callable[..., Tuple[Iterator[str], Future]]] = None,
+        individual_max_length: Optional[int] = None,
+        global_max_length: Optional[int] = None,
+        profile: str = DEFAULT_PROFILE,
+        generation_profile: Optional[str] = None,
+    ) -> Iterator[tuple]:
+        """
+        Version progressive de `summarize_multiple` : produit les événements
+        ("individual", position, résumé) dès que chaque résumé est prêt (ceux en
+        cache d'abord), puis ("token", None, texte) si `stream_fn` est fourni,
+        et enfin ("global", None, résumé global).
+
+        Args:
+            submit_fn: Soumet un texte, renvoie un Future (GenerationScheduler.submit)
+            stream_fn: Génère en streaming token par token, renvoie
+                (itérateur de texte, Future du texte complet). Le streaming n'est
+                possible qu'en recherche gloutonne (pas de beam search)
+            generation_profile: Profil des résumés absents du cache (voir
+                `summarize_multiple`)
+        """
+        params = profile_params(profile, "individual", individual_max_length)
+        gen_params = fallback_profile_params(
+            profile, generation_profile, "individual", individual_max_length
+        )
+        texts = [article_text(article, self._compress_fn()) for article in articles]
+        summaries: List[Optional[str]] = [None] * len(articles)
+
+        # 1. Résumés déjà en cache (profil demandé, puis profil abaissé) : émis
+        # immédiatement
+        keys, found = self._cache_lookup(texts, **params)
+        for i, key in enumerate(keys):
+            if key in found:
+                summaries[i] = found[key]
+                yield "individual", i, individual_summary(articles[i], found[key])
+        if gen_params is not None:
+            missing = [i for i in range(len(articles)) if summaries[i] is None]
+            gen_keys, found = self._cache_lookup(
+                [texts[i] for i in missing], **gen_params
+            )
+            for i, key in zip(missing, gen_keys):
+                keys[i] = key
+                if key in found:
+                    summaries[i] = found[key]
+                    yield "individual", i, individual_summary(articles[i], found[key])
+            params = gen_params
+
+        # 2. Les autres : soumis ensemble, émis dans l'ordre où ils se terminent
+        submitted_at = time.perf_counter()
+        futures = {
+            submit_fn(texts[i], **params): i
+            for i in range(len(articles))
+            if summaries[i] is None
         }
+        for future in as_completed(futures):
+            i = futures[future]
+            summaries[i] = future.result()
+            elapsed_ms = (time.perf_counter() - submitted_at) * 1000.0
+            self._cache_store(
+                [(keys[i], articles[i].get("id"), summaries[i], elapsed_ms)], **params
+            )
+            yield "individual", i, individual_summary(articles[i], summaries[i])
+
+        # 3. Résumé global
+        synthesis_prompt = build_synthesis_prompt(summaries, self._compress_fn())
+        global_params = profile_params(profile, "global", global_max_length)
+        gen_global_params = fallback_profile_params(
+            profile, generation_profile, "global", global_max_length
+        )
+        for candidate in (global_params, gen_global_params):
+            if candidate is None:
+                continue
+            if stream_fn is not None:
+                candidate["num_beams"] = 1
+            (key,), found = self._cache_lookup([synthesis_prompt], **candidate)
+            if key in found:
+                yield "global", None, found[key]
+                return
+        # Clé et paramètres du profil de génération (le dernier consulté)
+        global_params = gen_global_params or global_params
+
+        start = time.perf_counter()
+        if stream_fn is None:
+            global_summary = submit_fn(synthesis_prompt, **global_params).result()
+        else:
+            streamer, future = stream_fn(
+                synthesis_prompt,
+                max_length=global_params["max_length"],
+                min_length=global_params["min_length"],
+                length_penalty=global_params["length_penalty"],
+            )
+            for text in streamer:
+                if text:
+                    yield "token", None, text
+            global_summary = future.result()
+        self._cache_store(
+            [(key, None, global_summary, (time.perf_counter() - start) * 1000.0)],
+            **global_params,
+        )
+        yield "global", None, global_summary
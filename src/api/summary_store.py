@@ -0,0 +1,271 @@
+"""
+Cache persistant des résumés (SQLite), indexé par contenu, version du modèle
+et paramètres de génération, borné par un budget en octets (éviction LRU)
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Limite prudente du nombre de paramètres d'une requête SQLite
+_MAX_SQL_VARIABLES = 500
+# Recalcul périodique (s) du compteur d'octets non épinglés : d'autres
+# processus (workers, pré-résumé) écrivent aussi dans la base
+_RESYNC_INTERVAL_S = 60.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS summaries (
+    key TEXT PRIMARY KEY,
+    doc_id TEXT,
+    model_version TEXT,
+    params TEXT,
+    summary TEXT,
+    size_bytes INTEGER,
+    generate_ms REAL,
+    created_at REAL,
+    last_access REAL,
+    pinned INTEGER DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_summaries_lru ON summaries (pinned, last_access);
+CREATE INDEX IF NOT EXISTS idx_summaries_doc ON summaries (doc_id);
+"""
+
+
+def summary_key(text: str, model_version: str, params: dict) -> str:
+    """
+    Clé d'un résumé : hash du texte présenté au modèle, de la version du modèle
+    et des paramètres de génération (un changement de l'un des trois invalide)
+    """
+    payload = json.dumps(
+        [model_version, params, text], sort_keys=True, ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SummaryStore:
+    """
+    Résumés déjà générés, partagés entre redémarrages et entre processus
+    (mode WAL : l'API lit pendant que le job de pré-résumé écrit).
+
+    Les entrées épinglées (pré-résumés du corpus) ne sont jamais évincées et
+    ne comptent pas dans le budget ; les autres sont évincées par ordre de
+    dernier accès quand leur taille totale dépasse `max_bytes`.
+    """
+
+    def __init__(self, db_file: str, max_bytes: int = 256 * 1024 * 1024):
+        self.db_file = db_file
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_file, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+        # Octets des entrées non épinglées, tenu à jour à chaque écriture
+        # (pas de SUM sur toute la table à chaque ajout)
+        with self._lock:
+            self._resync_locked()
+
+        # Statistiques (depuis le démarrage)
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self.generate_ms_saved = 0.0
+        self.evictions = 0
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, str]:
+        """Résumés présents pour ces clés (met à jour leur dernier accès)"""
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        now = time.time()
+        with self._lock:
+            for start in range(0, len(keys), _MAX_SQL_VARIABLES):
+                chunk = keys[start : start + _MAX_SQL_VARIABLES]
+                placeholders = ", ".join("?" for _ in chunk)
+                rows = self._conn.execute(
+                    "SELECT key, summary, size_bytes, generate_ms FROM summaries "
+                    f"WHERE key IN ({placeholders})",
+                    chunk,
+                ).fetchall()
+                for key, summary, size_bytes, generate_ms in rows:
+                    found[key] = summary
+                    self.bytes_saved += size_bytes or 0
+                    self.generate_ms_saved += generate_ms or 0.0
+                if rows:
+                    self._conn.executemany(
+                        "UPDATE summaries SET last_access = ? WHERE key = ?",
+                        [(now, row[0]) for row in rows],
+                    )
+            self._conn.commit()
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(
+        self,
+        entries: List[Tuple[str, Optional[str], str, float]],
+        model_version: str,
+        params: dict,
+        pinned: bool = False,
+    ):
+        """
+        Ajoute des résumés puis applique le budget.
+
+        Args:
+            entries: (clé, ID du document ou None, résumé, temps de génération ms)
+            pinned: Entrées exclues de l'éviction (pré-résumés du corpus)
+        """
+        if not entries:
+            return
+        now = time.time()
+        params_json = json.dumps(params, sort_keys=True)
+        # Une clé en double dans le lot : la dernière version l'emporte
+        entries = list({entry[0]: entry for entry in entries}.values())
+        rows = [
+            (
+                key,
+                doc_id,
+                model_version,
+                params_json,
+                summary,
+                len(summary.encode("utf-8")),
+                generate_ms,
+                now,
+                now,
+                int(pinned),
+            )
+            for key, doc_id, summary, generate_ms in entries
+        ]
+        with self._lock:
+            if pinned:
+                # Un document modifié : l'ancienne version redevient évinçable
+                doc_ids = list({doc_id for _, doc_id, _, _ in entries if doc_id})
+                self._unpinned_bytes += self._sum_bytes_locked(
+                    "pinned = 1 AND doc_id", doc_ids
+                )
+                self._conn.executemany(
+                    "UPDATE summaries SET pinned = 0 WHERE pinned = 1 AND doc_id = ?",
+                    [(doc_id,) for doc_id in doc_ids],
+                )
+            # Entrées non épinglées remplacées par INSERT OR REPLACE
+            self._unpinned_bytes -= self._sum_bytes_locked(
+                "pinned = 0 AND key", [row[0] for row in rows]
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO summaries VALUES "
+                "(?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            if not pinned:
+                self._unpinned_bytes += sum(row[5] for row in rows)
+            self._evict_locked()
+            self._conn.commit()
+
+    def contains(self, keys: Iterable[str], pinned_only: bool = False) -> set:
+        """Clés déjà présentes (sans compter de hit ni toucher au LRU)"""
+        keys = list(dict.fromkeys(keys))
+        present = set()
+        condition = " AND pinned = 1" if pinned_only else ""
+        with self._lock:
+            for start in range(0, len(keys), _MAX_SQL_VARIABLES):
+                chunk = keys[start : start + _MAX_SQL_VARIABLES]
+                placeholders = ", ".join("?" for _ in chunk)
+                rows = self._conn.execute(
+                    f"SELECT key FROM summaries WHERE key IN ({placeholders})"
+                    + condition,
+                    chunk,
+                )
+                present.update(row[0] for row in rows)
+        return present
+
+    def pin(self, keys: Iterable[str]):
+        """Exclut de l'éviction des entrées déjà présentes"""
+        keys = list(dict.fromkeys(keys))
+        with self._lock:
+            self._unpinned_bytes -= self._sum_bytes_locked("pinned = 0 AND key", keys)
+            self._conn.executemany(
+                "UPDATE summaries SET pinned = 1 WHERE key = ?",
+                [(key,) for key in keys],
+            )
+            self._conn.commit()
+
+    def _sum_bytes_locked(self, column_filter: str, values: List[str]) -> int:
+        """Octets des lignes `<column_filter> IN (values)` (requêtes par blocs)"""
+        total = 0
+        for start in range(0, len(values), _MAX_SQL_VARIABLES):
+            chunk = values[start : start + _MAX_SQL_VARIABLES]
+            placeholders = ", ".join("?" for _ in chunk)
+            total += self._conn.execute(
+                "SELECT COALESCE(SUM(size_bytes), 0) FROM summaries "
+                f"WHERE {column_filter} IN ({placeholders})",
+                chunk,
+            ).fetchone()[0]
+        return total
+
+    def _resync_locked(self):
+        self._unpinned_bytes = self._conn.execute(
+            "SELECT COALESCE(SUM(size_bytes), 0) FROM summaries WHERE pinned = 0"
+        ).fetchone()[0]
+        self._synced_at = time.monotonic()
+
+    def _evict_locked(self):
+        if time.monotonic() - self._synced_at > _RESYNC_INTERVAL_S:
+            self._resync_locked()
+        excess = self._unpinned_bytes - self.max_bytes
+        if excess <= 0:
+            return
+        # Entrées non épinglées les moins récemment utilisées d'abord
+        victims = []
+        freed = 0
+        rows = self._conn.execute(
+            "SELECT key, size_bytes FROM summaries WHERE pinned = 0 "
+            "ORDER BY last_access ASC"
+        )
+        for key, size_bytes in rows:
+            if freed >= excess:
+                break
+            victims.append((key,))
+            freed += size_bytes or 0
+        rows.close()
+        self._conn.executemany("DELETE FROM summaries WHERE key = ?", victims)
+        self._unpinned_bytes -= freed
+        self.evictions += len(victims)
+
+    def clear(self, include_pinned: bool = False):
+        with self._lock:
+            if include_pinned:
+                self._conn.execute("DELETE FROM summaries")
+            else:
+                self._conn.execute("DELETE FROM summaries WHERE pinned = 0")
+            self._conn.commit()
+            self._unpinned_bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, total_bytes, pinned = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0), "
+                "COALESCE(SUM(pinned), 0) FROM summaries"
+            ).fetchone()
+            lookups = self.hits + self.misses
+            return {
+                "entries": entries,
+                "pinned_entries": pinned,
+                "bytes": total_bytes,
+                # Seules les entrées non épinglées comptent dans le budget
+                "unpinned_bytes": self._unpinned_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+                "bytes_saved": self.bytes_saved,
+                "generate_ms_saved": self.generate_ms_saved,
+                "evictions": self.evictions,
+            }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -1,5 +1,8 @@
 # src/ui/app.py
 
+import json
+import uuid
+
 import streamlit as st
 import requests
 
@@ -10,9 +13,19 @@ st.set_page_config(
 
 # URL de notre API FastAPI
 API_SEARCH_URL = "http://127.0.0.1:8000/search"
-API_SUMMARIZE_URL = "http://127.0.0.1:8000/summarize"
+# Recherche + résumés en streaming (Server-Sent Events) : affichage progressif
+# des résumés, le serveur lit lui-même les abstracts
+API_SEARCH_AND_SUMMARIZE_STREAM_URL = (
+    "http://127.0.0.1:8000/search_and_summarize/stream"
+)
 API_HEALTH_URL = "http://127.0.0.1:8000/health"
 
+# Identifiant de session envoyé à l'API : une nouvelle recherche annule côté
+# serveur les résumés encore en cours de la précédente
+if "session_id" not in st.session_state:
+    st.session_state["session_id"] = uuid.uuid4().hex
+SESSION_HEADERS = {"X-Session-ID": st.session_state["session_id"]}
+
 # --- INTERFACE UTILISATEUR ---
 
 st.title("🚀 Moteur de Recommandation + Résumé Intelligent")
@@ -43,6 +56,20 @@ with st.sidebar:
     st.header("⚙️ Options")
     top_k = st.slider("Nombre d'articles", 2, 5, 3)
     generate_summaries = st.checkbox("Générer les résumés IA", value=True)
+    stream_tokens = st.checkbox(
+        "Résumé global mot à mot",
+        value=False,
+        help="Affiche la synthèse pendant sa génération (décodage glouton, "
+        "qualité légèrement inférieure)",
+    )
+    profile = st.selectbox(
+        "Profil de génération",
+        ["fast", "balanced", "quality"],
+        index=1,
+        help="fast : recherche gloutonne, résumés plus courts ; quality : plus "
+        "de beams, plus lent. Le serveur peut choisir un profil plus rapide "
+        "s'il est chargé.",
+    )
 
     st.markdown("### 📖 Comment ça marche?")
     st.markdown("""
@@ -60,130 +87,200 @@ Résumés individuels
 Résumé global
     """)
 
+def iter_sse(response):
+    """Événements (nom, données JSON) d'une réponse Server-Sent Events"""
+    event = None
+    for line in response.iter_lines(decode_unicode=True):
+        if not line:
+            continue
+        if line.startswith("event:"):
+            event = line[len("event:") :].strip()
+        elif line.startswith("data:"):
+            yield event, json.loads(line[len("data:") :].strip())
+
+
+def render_articles(results, with_summaries):
+    """
+    Affiche les articles ; renvoie, pour chaque position, l'emplacement où
+    son résumé IA sera écrit dès qu'il arrive.
+    """
+    st.markdown(
+        "## 📚 Articles Recommandés (avec résumés)"
+        if with_summaries
+        else "## 📚 Articles Recommandés"
+    )
+    summary_placeholders = []
+    for i, result in enumerate(results):
+        with st.expander(
+            f"**{i + 1}. {result['title']}** (Score: {result['score']:.2f})",
+            expanded=(i == 0),
+        ):
+            col1, col2 = st.columns([3, 1])
+
+            with col1:
+                st.markdown(f"**Source :** {result['source']}")
+                st.markdown(f"**URL :** [{result['url']}]({result['url']})")
+
+            with col2:
+                if result.get("reranked", True):
+                    st.metric("Pertinence", f"{result['score']:.3f}")
+                else:
+                    # Non re-ranké (deadline) : similarité cosinus FAISS
+                    st.metric("Similarité", f"{result['retrieval_score']:.3f}")
+
+            if with_summaries:
+                st.markdown("### ✨ Résumé IA (LoRA Fine-tuned)")
+                placeholder = st.empty()
+                placeholder.info("⏳ Résumé en cours de génération...")
+                summary_placeholders.append(placeholder)
+                st.markdown("**📄 Abstract original**")
+            else:
+                st.markdown("### 📄 Abstract")
+            st.write(result["abstract"])
+    return summary_placeholders
+
+
+def show_error_hint():
+    st.error("Le backend est-il bien lancé?")
+    st.info("💡 Lancez le backend avec: `python -m uvicorn src.api.main:app --reload`")
+
+
 # Bouton de recherche
 if st.button("🚀 Rechercher", type="primary"):
     if query:
-        with st.spinner("🔍 Recherche en cours..."):
-            try:
-                # 1. Recherche d'articles
-                payload = {"query": query, "top_k": top_k}
-                response = requests.post(API_SEARCH_URL, json=payload)
+        try:
+            payload = {"query": query, "top_k": top_k}
 
+            if generate_summaries:
+                # Recherche + résumés en streaming : les articles s'affichent dès la
+                # fin de la recherche, chaque résumé dès qu'il est généré
+                payload["stream_tokens"] = stream_tokens
+                payload["profile"] = profile
+                response = requests.post(
+                    API_SEARCH_AND_SUMMARIZE_STREAM_URL,
+                    json=payload,
+                    headers=SESSION_HEADERS,
+                    stream=True,
+                )
+                if response.status_code == 503:
+                    st.warning("⚠️ Résumés indisponibles (modèle non chargé)")
+                    generate_summaries = False
+
+            if not generate_summaries:
+                with st.spinner("🔍 Recherche en cours..."):
+                    response = requests.post(API_SEARCH_URL, json=payload)
                 if response.status_code == 200:
                     results = response.json()["results"]
-
                     if results:
                         st.success(f"✅ {len(results)} articles trouvés pour '{query}'")
+                        render_articles(results, with_summaries=False)
+                    else:
+                        st.warning("Aucun résultat trouvé pour cette recherche.")
+                else:
+                    st.error(f"Erreur de l'API (Code: {response.status_code})")
+                    show_error_hint()
 
-                        # 2. Générer les résumés si demandé
-                        summaries_data = None
-                        if generate_summaries:
-                            status_placeholder = st.empty()
-                            status_placeholder.info(
-                                "🤖 Génération des résumés avec IA (LoRA)... Cela peut prendre quelques secondes."
-                            )
+            elif response.status_code != 200:
+                st.error(f"Erreur de l'API (Code: {response.status_code})")
+                show_error_hint()
 
-                            try:
-                                summarize_payload = {"articles": results}
-                                summarize_response = requests.post(
-                                    API_SUMMARIZE_URL, json=summarize_payload
-                                )
-
-                                if summarize_response.status_code == 200:
-                                    summaries_data = summarize_response.json()
-                                    status_placeholder.empty()  # On nettoie le message de chargement
-                                else:
-                                    status_placeholder.error(
-                                        f"Erreur lors de la génération des résumés: {summarize_response.status_code}"
-                                    )
-                            except Exception as e:
-                                status_placeholder.error(f"Erreur: {e}")
-
-                        # 3. Afficher le résumé global en premier
-                        if summaries_data and summaries_data.get("global_summary"):
-                            st.markdown("---")
-                            st.markdown("## 📋 Résumé Global de Tous les Articles")
-                            st.markdown(
-                                "*Synthèse intelligente combinant tous les articles recommandés*"
+            else:
+                status_placeholder = st.empty()
+                status_placeholder.info("🔍 Recherche en cours...")
+                global_placeholder = None
+                summary_placeholders = []
+                global_text = ""
+                summaries_received = 0
+
+                for event, data in iter_sse(response):
+                    if event == "results":
+                        results = data["results"]
+                        if not results:
+                            status_placeholder.warning(
+                                "Aucun résultat trouvé pour cette recherche."
                             )
+                            break
+                        status_placeholder.info(
+                            "🤖 Génération des résumés avec IA (LoRA)..."
+                        )
+                        st.success(f"✅ {len(results)} articles trouvés pour '{query}'")
+
+                        # Résumé global en premier (rempli à la fin du streaming)
+                        st.markdown("---")
+                        st.markdown("## 📋 Résumé Global de Tous les Articles")
+                        st.markdown(
+                            "*Synthèse intelligente combinant tous les articles recommandés*"
+                        )
+                        global_placeholder = st.empty()
+                        global_placeholder.info(
+                            "⏳ Synthèse après les résumés individuels..."
+                        )
+                        stats_placeholder = st.empty()
+                        st.markdown("---")
+
+                        summary_placeholders = render_articles(
+                            results, with_summaries=True
+                        )
+
+                    elif event == "individual":
+                        summaries_received += 1
+                        summary_placeholders[data["position"]].success(data["summary"])
+                        status_placeholder.info(
+                            f"🤖 {summaries_received}/{len(summary_placeholders)} "
+                            "résumés générés..."
+                        )
 
-                            st.info(summaries_data["global_summary"])
-
-                            # Stats
-                            col1, col2, col3 = st.columns(3)
-                            with col1:
-                                st.metric(
-                                    "Articles analysés",
-                                    summaries_data["total_articles"],
-                                )
-                            with col2:
-                                st.metric(
-                                    "Résumés individuels",
-                                    len(summaries_data["individual_summaries"]),
-                                )
-                            with col3:
-                                st.metric(
-                                    "Longueur résumé global",
-                                    f"{len(summaries_data['global_summary'].split())} mots",
-                                )
-
-                            st.markdown("---")
-
-                        # 4. Afficher les articles individuels
-                        st.markdown("## 📚 Articles Recommandés (avec résumés)")
-
-                        for i, result in enumerate(results):
-                            with st.expander(
-                                f"**{i + 1}. {result['title']}** (Score: {result['score']:.2f})",
-                                expanded=(i == 0),
-                            ):
-                                col1, col2 = st.columns([3, 1])
+                    elif event == "token":
+                        global_text += data["text"]
+                        global_placeholder.info(global_text + " ▌")
 
+                    elif event == "global":
+                        global_text = data["global_summary"]
+                        global_placeholder.info(global_text)
+
+                    elif event == "done":
+                        status_placeholder.empty()
+                        if data.get("profile_downgraded"):
+                            st.caption(
+                                f"⚡ Serveur chargé : profil « {data['profile']} » "
+                                "utilisé"
+                            )
+                        if data.get("total_articles"):
+                            with stats_placeholder.container():
+                                col1, col2, col3 = st.columns(3)
                                 with col1:
-                                    st.markdown(f"**Source :** {result['source']}")
-                                    st.markdown(
-                                        f"**URL :** [{result['url']}]({result['url']})"
+                                    st.metric(
+                                        "Articles analysés", data["total_articles"]
                                     )
-
                                 with col2:
-                                    st.metric("Similarité", f"{result['score']:.3f}")
-
-                                # Résumé IA si disponible
-                                if summaries_data and i < len(
-                                    summaries_data.get("individual_summaries", [])
-                                ):
-                                    st.markdown("### ✨ Résumé IA (LoRA Fine-tuned)")
-                                    st.success(
-                                        summaries_data["individual_summaries"][i][
-                                            "summary"
-                                        ]
+                                    st.metric(
+                                        "Premier résumé",
+                                        f"{data['time_to_first_summary_ms'] / 1000:.1f} s",
+                                    )
+                                with col3:
+                                    st.metric(
+                                        "Longueur résumé global",
+                                        f"{len(global_text.split())} mots",
                                     )
 
-                                    # Abstract original dans un expander
-                                    with st.expander("📄 Voir l'abstract original"):
-                                        st.write(result["abstract"])
-                                else:
-                                    # Pas de résumé, afficher l'abstract
-                                    st.markdown("### 📄 Abstract")
-                                    st.write(result["abstract"])
-                    else:
-                        st.warning("Aucun résultat trouvé pour cette recherche.")
+                    elif event == "cancelled":
+                        # Remplacée par une recherche plus récente
+                        status_placeholder.empty()
+                        break
 
-                else:
-                    st.error(f"Erreur de l'API (Code: {response.status_code})")
-                    st.error("Le backend est-il bien lancé?")
-                    st.info(
-                        "💡 Lancez le backend avec: `python -m uvicorn src.api.main:app --reload`"
-                    )
-
-            except requests.exceptions.ConnectionError:
-                st.error("❌ Impossible de se connecter à l'API")
-                st.error("Assurez-vous que le backend est lancé!")
-                st.info(
-                    "💡 Lancez le backend avec: `python -m uvicorn src.api.main:app --reload`"
-                )
-            except Exception as e:
-                st.error(f"Erreur: {e}")
+                    elif event == "error":
+                        status_placeholder.error(
+                            f"Erreur lors de la génération des résumés: {data['detail']}"
+                        )
+
+        except requests.exceptions.ConnectionError:
+            st.error("❌ Impossible de se connecter à l'API")
+            st.error("Assurez-vous que le backend est lancé!")
+            st.info(
+                "💡 Lancez le backend avec: `python -m uvicorn src.api.main:app --reload`"
+            )
+        except Exception as e:
+            st.error(f"Erreur: {e}")
     else:
         st.info("Veuillez entrer une question pour lancer la recherche.")
 